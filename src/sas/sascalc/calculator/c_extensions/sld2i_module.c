@@ -123,7 +123,10 @@ PyObject * genicom_inputXY(PyObject *self, PyObject *args) {
 	// Sanity check
 	//if(n_q!=n_out) return Py_BuildValue("i",-1);
 
+	// The arrays are held by the caller; let other threads run meanwhile
+	Py_BEGIN_ALLOW_THREADS
 	genicomXY(sld2i, (int)n_qx, qx, qy, I_out);
+	Py_END_ALLOW_THREADS
 	//printf("done calc\n");
 	//return PyCObject_FromVoidPtr(s, del_genicom);
 	return Py_BuildValue("i",1);
@@ -149,7 +152,10 @@ PyObject * genicom_input(PyObject *self, PyObject *args) {
 	// Sanity check
 	//if (n_q!=n_out) return Py_BuildValue("i",-1);
 
+	// The arrays are held by the caller; let other threads run meanwhile
+	Py_BEGIN_ALLOW_THREADS
 	genicom(sld2i, (int)n_q, q, I_out);
+	Py_END_ALLOW_THREADS
 	return Py_BuildValue("i",1);
 }
 
@@ -0,0 +1,159 @@
+"""
+NumPy computation of the scattering from sld (n & m) arrays.
+
+These functions compute the same intensities as genicom and genicomXY of
+the sld2i C library, for machines where the library is unavailable or
+slow. Rather than looping over pixels for each q, the phase factors of a
+block of q points and all the pixels are computed at once, and the sums
+over the pixels are done with matrix products.
+"""
+from __future__ import division
+
+import numpy as np
+
+# Number of (q, pixel) pairs computed at once; bounds the memory used
+BLOCK_SIZE = 2**20
+
+
+def Iq(q, x, y, z, sld, vol, is_avg=False, block_size=BLOCK_SIZE):
+    """
+    Compute the 1D isotropic intensity, as genicom does.
+
+    :param q: q values [1/A]
+    :param x, y, z: pixel positions [A]
+    :param sld: pixel sld, relative to the solvent [1/A^2]
+    :param vol: pixel volumes [A^3]
+    :param is_avg: use the spherically symmetric approximation, summing
+        over the distance of each pixel to the origin instead of over all
+        pixel pairs
+    :param block_size: number of (q, pixel) pairs computed at once
+    :return: I(q) [1/cm]
+    """
+    q = np.asarray(q, 'd')
+    x, y, z = np.asarray(x, 'd'), np.asarray(y, 'd'), np.asarray(z, 'd')
+    weights = np.asarray(sld, 'd') * np.asarray(vol, 'd')
+    I_out = np.zeros(len(q))
+    if is_avg:
+        r = np.sqrt(x*x + y*y + z*z)
+        rows = max(1, block_size // max(len(r), 1))
+        for start in range(0, len(q), rows):
+            block = slice(start, start + rows)
+            # np.sinc(x) is sin(pi x) / (pi x)
+            I_out[block] = np.dot(np.sinc(np.outer(q[block], r / np.pi)),
+                                  weights)
+        I_out *= I_out
+    else:
+        npix = len(weights)
+        # Blocks of rows x cols pixel pairs, each with blocks of q, so that
+        # no array holds more than block_size values
+        cols = max(1, min(npix, block_size))
+        rows = max(1, block_size // max(cols * len(q), 1))
+        qrows = max(1, block_size // (rows * cols))
+        for start in range(0, npix, rows):
+            block = slice(start, start + rows)
+            for col_start in range(0, npix, cols):
+                cols_block = slice(col_start, col_start + cols)
+                dx = x[block, None] - x[None, cols_block]
+                dy = y[block, None] - y[None, cols_block]
+                dz = z[block, None] - z[None, cols_block]
+                dist = np.sqrt(dx*dx + dy*dy + dz*dz).ravel()
+                pair_weights = (weights[block, None]
+                                * weights[None, cols_block]).ravel()
+                for q_start in range(0, len(q), qrows):
+                    q_block = slice(q_start, q_start + qrows)
+                    I_out[q_block] += np.dot(
+                        np.sinc(np.outer(q[q_block], dist / np.pi)),
+                        pair_weights)
+    # in cm (unit) / number; to be multiplied by vol_pix
+    return I_out * (1.0E+8 / np.sum(vol))
+
+
+def Iqxy(qx, qy, x, y, sld, vol, mx, my, mz, in_spin, out_spin, s_theta,
+         block_size=BLOCK_SIZE):
+    """
+    Compute the 2D (magnetic) intensity, as genicomXY does.
+
+    The magnetic sld of each pixel enters the four spin cross sections
+    linearly, with coefficients which only depend on the direction of q,
+    so the sums over the pixels reduce to five phase weighted sums: the
+    nuclear sld of the magnetic and of the non-magnetic pixels, and the
+    three magnetic sld components.
+
+    :param qx, qy: q values [1/A]
+    :param x, y: pixel positions [A]
+    :param sld: pixel nuclear sld, relative to the solvent [1/A^2]
+    :param vol: pixel volumes [A^3]
+    :param mx, my, mz: pixel magnetic sld [1/A^2]
+    :param in_spin: fraction of up spins in the incident beam
+    :param out_spin: fraction of up spins in the scattered beam
+    :param s_theta: angle of the up spin from the x axis [deg]
+    :param block_size: number of (q, pixel) pairs computed at once
+    :return: I(qx, qy) [1/cm]
+    """
+    qx, qy = np.asarray(qx, 'd'), np.asarray(qy, 'd')
+    x, y = np.asarray(x, 'd'), np.asarray(y, 'd')
+    sld, vol = np.asarray(sld, 'd'), np.asarray(vol, 'd')
+    npix = len(sld)
+    mx, my, mz = [np.asarray(m, 'd') if m is not None and np.size(m) == npix
+                  else np.zeros(npix) for m in (mx, my, mz)]
+
+    # Pixels without any sld are skipped, including in the total volume
+    keep = (sld != 0.0) | (mx != 0.0) | (my != 0.0) | (mz != 0.0)
+    x, y, sld, vol = x[keep], y[keep], sld[keep], vol[keep]
+    mx, my, mz = mx[keep], my[keep], mz[keep]
+    # cal_msld takes the components in the order mx, mz, my
+    is_mag = ((np.fabs(mx) >= 1.0e-32) | (np.fabs(my) >= 1.0e-32)
+              | (np.fabs(mz) >= 1.0e-32))
+    weights = np.column_stack((
+        sld * is_mag, sld * ~is_mag, mx * is_mag, mz * is_mag, my * is_mag))
+
+    # Phase weighted sums over the pixels, in blocks of q
+    sums = np.empty((len(qx), 5), dtype=complex)
+    rows = max(1, block_size // max(len(sld), 1))
+    for start in range(0, len(qx), rows):
+        block = slice(start, start + rows)
+        phase = np.outer(qx[block], x) + np.outer(qy[block], y)
+        sums[block].real = np.dot(np.cos(phase) * vol, weights)
+        sums[block].imag = np.dot(np.sin(phase) * vol, weights)
+    sld_mag, sld_non, m_x, m_y, m_z = sums.T
+
+    # Direction of q, as in cal_msld
+    with np.errstate(divide='ignore', invalid='ignore'):
+        q_angle = np.where(qx == 0.0, np.pi / 2.0, np.arctan(qy / qx))
+    q_angle[(qy < 0.0) & (qx < 0.0)] -= np.pi
+    q_angle[(qy > 0.0) & (qx < 0.0)] += np.pi
+    q_angle = np.pi / 2.0 - q_angle
+    q_angle[q_angle > np.pi] -= 2.0 * np.pi
+    q_angle[q_angle < -np.pi] += 2.0 * np.pi
+    # The first component has no effect at q = 0
+    m_perp = np.where((np.fabs(qx) < 1.0e-16) & (np.fabs(qy) < 1.0e-16),
+                      0.0, 1.0)
+    m_perp = m_x * m_perp * np.cos(q_angle) - m_y * np.sin(q_angle)
+    s_theta = np.radians(s_theta)
+    sigma_x = m_perp * (np.cos(-q_angle) * np.cos(-s_theta)
+                        - np.sin(-q_angle) * np.sin(-s_theta))
+    sigma_y = m_perp * (np.cos(-q_angle) * np.sin(-s_theta)
+                        + np.sin(-q_angle) * np.cos(-s_theta))
+    sigma_z = m_z
+
+    # Spin fractions are only clipped for the magnetic pixels
+    clip_in = min(max(in_spin, 0.0), 1.0)
+    clip_out = min(max(out_spin, 0.0), 1.0)
+    root4 = lambda v: np.sqrt(np.sqrt(v))
+    I_out = np.zeros(len(qx))
+    if in_spin > 0.0 and out_spin > 0.0:
+        I_out += np.abs(
+            root4(clip_in * clip_out) * (sld_mag - sigma_x)
+            + root4(in_spin * out_spin) * sld_non)**2
+    if in_spin < 1.0 and out_spin < 1.0:
+        I_out += np.abs(
+            root4((1.0 - clip_in) * (1.0 - clip_out)) * (sld_mag + sigma_x)
+            + root4((1.0 - in_spin) * (1.0 - out_spin)) * sld_non)**2
+    if in_spin > 0.0 and out_spin < 1.0:
+        I_out += np.abs(root4(clip_in * (1.0 - clip_out))
+                        * (sigma_y + 1j * sigma_z))**2
+    if in_spin < 1.0 and out_spin > 0.0:
+        I_out += np.abs(root4((1.0 - clip_in) * clip_out)
+                        * (sigma_y - 1j * sigma_z))**2
+    # in cm (unit) / number; to be multiplied by vol_pix
+    return I_out * (1.0E+8 / np.sum(vol))
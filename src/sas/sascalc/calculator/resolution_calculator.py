@@ -40,6 +40,13 @@ class ResolutionCalculator(object):
         # 2d image of the resolution
         self.image = []
         self.image_lam = []
+        # number of pixels of the image along each axis
+        self.image_size = 1000
+        # the gaussians of the image are only computed within this
+        # number of sigmas of their center; None for the whole image
+        self.image_nsigma = 6.0
+        # q range and values of the image pixels
+        self._image_grid = None
         # resolutions
         # lamda in r-direction
         self.sigma_lamd = 0
@@ -214,8 +221,8 @@ class ResolutionCalculator(object):
                 coord='cartesian', tof=False):
         """
         Compute the Q resoltuion in || and + direction of 2D
-        : qx_value: x component of q
-        : qy_value: y component of q
+        : qx_value: x component of q, float or array
+        : qy_value: y component of q, float or array
         """
         coord = 'cartesian'
         lamb = wavelength
@@ -233,11 +240,8 @@ class ResolutionCalculator(object):
         # vacuum wave transfer
         knot = 2*pi/lamb
         # scattering angle theta; always true for plane detector
-        # aligned vertically to the ko direction
-        if qr_value > knot:
-            theta = pi/2
-        else:
-            theta = math.asin(qr_value/knot)
+        # aligned vertically to the ko direction; pi/2 if qr_value > knot
+        theta = np.arcsin(np.minimum(qr_value/knot, 1.0))
         # source aperture size
         rone = self.source_aperture_size
         # sample aperture size
@@ -259,7 +263,7 @@ class ResolutionCalculator(object):
         l1_cor = (l_ssa * l_two) / (l_sas + l_two)
         lp_cor = (l_ssa * l_two) / (l_one + l_two)
         # the radial distance to the pixel from the center of the detector
-        radius = math.tan(theta) * l_two
+        radius = np.tan(theta) * l_two
         #Lp = l_one*l_two/(l_one+l_two)
         # default polar coordinate
         comp1 = 'radial'
@@ -295,8 +299,8 @@ class ResolutionCalculator(object):
         # for 2d
         #sigma_1 += sigma_wave_1
         # normalize
-        sigma_1 = knot * sqrt(sigma_1 / 12)
-        sigma_r = knot * sqrt(sigma_wave_1 / (tof_factor *12))
+        sigma_1 = knot * np.sqrt(sigma_1 / 12)
+        sigma_r = knot * np.sqrt(sigma_wave_1 / (tof_factor *12))
         # sigma in the phi/y direction
         # for source apperture
         sigma_2 = self.get_variance(rone, l1_cor, phi, comp2)
@@ -327,8 +331,8 @@ class ResolutionCalculator(object):
         #sigma_2 =  knot*sqrt(sigma_2/12)
         #sigma_2 += sigma_wave_2
         # normalize
-        sigma_2 = knot * sqrt(sigma_2 / 12)
-        sigma1d = sqrt(variance_1d_1 + variance_1d_2)
+        sigma_2 = knot * np.sqrt(sigma_2 / 12)
+        sigma1d = np.sqrt(variance_1d_1 + variance_1d_2)
         # set sigmas
         self.sigma_1 = sigma_1
         self.sigma_lamd = sigma_r
@@ -336,6 +340,52 @@ class ResolutionCalculator(object):
         self.sigma_1d = sigma1d
         return qr_value, phi, sigma_1, sigma_2, sigma_r, sigma1d
 
+    def compute_detector_map(self, qx_value=None, qy_value=None,
+                             coord='cartesian'):
+        """
+        Compute the Q resolution at each pixel of the detector, averaged
+        over the wavelength list weighted by the intensity as in
+        compute_and_plot
+
+        : qx_value: x component of q, or None for the detector pixels
+        : qy_value: y component of q, or None for the detector pixels
+
+        : return: qx_value, qy_value, sigma_1, sigma_2, sigma_r, sigma_1d
+            arrays of the shape of the pixels
+        """
+        # make sure to update all the variables need.
+        self.get_all_instrument_params()
+        if qx_value is None or qy_value is None:
+            # pixels at the current wavelength
+            pixels = self._get_detector_qxqy_pixels()
+            qx_value, qy_value = pixels.qx_data, pixels.qy_data
+        qx_value, qy_value = np.broadcast_arrays(np.asarray(qx_value, 'd'),
+                                                 np.asarray(qy_value, 'd'))
+        # wavelength etc.
+        lamda_list, dlamb_list = self.get_wave_list()
+        tof = len(lamda_list) > 1
+        variances = [np.zeros(qx_value.shape) for _ in range(4)]
+        total_intensity = 0
+        for lam, dlam in zip(lamda_list, dlamb_list):
+            intens = self.setup_tof(lam, dlam)
+            sigmas = self.compute(lam, dlam, qx_value, qy_value, coord, tof)[2:]
+            # set variance as sigmas
+            for variance, sigma in zip(variances, sigmas):
+                variance += sigma * sigma * intens
+            total_intensity += intens
+        if total_intensity != 0:
+            # average variance
+            sigma_1, sigma_2, sigma_r, sigma1d = \
+                [np.sqrt(variance / total_intensity) for variance in variances]
+            # set sigmas
+            self.sigma_1 = sigma_1
+            self.sigma_lamd = sigma_r
+            self.sigma_2 = sigma_2
+            self.sigma_1d = sigma1d
+        else:
+            sigma_1, sigma_2, sigma_r, sigma1d = variances
+        return qx_value, qy_value, sigma_1, sigma_2, sigma_r, sigma1d
+
     def _within_detector_range(self, qx_value, qy_value):
         """
         check if qvalues are within detector range
@@ -392,19 +442,28 @@ class ResolutionCalculator(object):
             return None
 
         # Make an empty graph in the detector scale
-        dx_size = (self.qx_max - self.qx_min) / (1000 - 1)
-        dy_size = (self.qy_max - self.qy_min) / (1000 - 1)
-        x_val = np.arange(self.qx_min, self.qx_max, dx_size)
-        y_val = np.arange(self.qy_max, self.qy_min, -dy_size)
-        q_1, q_2 = np.meshgrid(x_val, y_val)
-        #q_phi = numpy.arctan(q_1,q_2)
+        x_val, y_val = self._get_image_grid()
+        if len(self.image_lam) == 0:
+            self.image_lam = np.zeros((len(y_val), len(x_val)))
+        # out side of detector
+        if not self._within_detector_range(qx_value, qy_value):
+            self.intensity = 0.0
+            return self.image_lam
+
         # check whether polar or cartesian
         if coord == 'polar':
             # Find polar values
             qr_value, phi = self._get_polar_value(qx_value, qy_value)
-            q_1, q_2 = self._rotate_z(q_1, q_2, phi)
             qc_1 = qr_value
             qc_2 = 0.0
+            # Gaussian coordinates of the rotated q values
+            sigma_x = sqrt(sigma_1 * sigma_1 + sigma_r * sigma_r)
+            transform = np.dot(np.diag([1.0 / sigma_x, 1.0 / sigma_2]),
+                               self._rotation(phi))
+            rows, cols = self._get_image_window(x_val, y_val,
+                                                qx_value, qy_value, transform)
+            q_1, q_2 = np.meshgrid(x_val[cols], y_val[rows])
+            q_1, q_2 = self._rotate_z(q_1, q_2, phi)
             # Calculate the 2D Gaussian distribution image
             image = self._gaussian2d_polar(q_1, q_2, qc_1, qc_2,
                                            sigma_1, sigma_2, sigma_r)
@@ -414,24 +473,84 @@ class ResolutionCalculator(object):
             qc_1 = qx_value
             # qy_center
             qc_2 = qy_value
-
+            # Gaussian coordinates of the distance to the center,
+            # as computed in _gaussian2d
+            new_sig_x = sqrt(sigma_r * sigma_r / (sigma_1 * sigma_1) + 1)
+            new_sig_y = sqrt(sigma_r * sigma_r / (sigma_2 * sigma_2) + 1)
+            cos_phi = np.cos(self.gravity_phi)
+            sin_phi = np.sin(self.gravity_phi)
+            transform = np.dot(
+                np.array([[cos_phi / new_sig_x / sigma_1, -sin_phi / sigma_1],
+                          [sin_phi / new_sig_y / sigma_2, cos_phi / sigma_2]]),
+                self._rotation(self.gravity_phi))
+            rows, cols = self._get_image_window(x_val, y_val,
+                                                qc_1, qc_2, transform)
+            q_1, q_2 = np.meshgrid(x_val[cols], y_val[rows])
             # Calculate the 2D Gaussian distribution image
             image = self._gaussian2d(q_1, q_2, qc_1, qc_2,
                                      sigma_1, sigma_2, sigma_r)
-        # out side of detector
-        if not self._within_detector_range(qx_value, qy_value):
-            image *= 0.0
-            self.intensity = 0.0
-            #return self.image
 
-        # Add it if there are more than one inputs.
-        if len(self.image_lam) > 0:
-            self.image_lam += image * self.intensity
-        else:
-            self.image_lam = image * self.intensity
+        # Add it to the images of the other wavelengths
+        self.image_lam[rows, cols] += image * self.intensity
 
         return self.image_lam
 
+    def _get_image_grid(self):
+        """
+        Get the q values of the image pixels; they are only computed
+        again when the q range or the size of the image changes
+
+        : return: x_val, y_val arrays
+        """
+        key = (self.qx_min, self.qx_max, self.qy_min, self.qy_max,
+               self.image_size)
+        if self._image_grid is None or self._image_grid[0] != key:
+            dx_size = (self.qx_max - self.qx_min) / (self.image_size - 1)
+            dy_size = (self.qy_max - self.qy_min) / (self.image_size - 1)
+            x_val = np.arange(self.qx_min, self.qx_max, dx_size)
+            y_val = np.arange(self.qy_max, self.qy_min, -dy_size)
+            self._image_grid = key, x_val, y_val
+        return self._image_grid[1:]
+
+    def _get_image_window(self, x_val, y_val, x0_val, y0_val, transform):
+        """
+        Get the part of the image within image_nsigma of a gaussian
+
+        : x_val: x values of the image
+        : y_val: y values of the image
+        : x0_val: mean value in x-axis
+        : y0_val: mean value in y-axis
+        : transform: matrix from the distance to the mean to the
+            coordinates in which the gaussian has unit variance
+
+        : return: row and column slices of the image
+        """
+        whole = (slice(None), slice(None))
+        if self.image_nsigma is None:
+            return whole
+        # half size of the box around the ellipse at image_nsigma
+        try:
+            inverse = np.linalg.inv(transform)
+        except (np.linalg.LinAlgError, ValueError):
+            return whole
+        half_x, half_y = self.image_nsigma * np.sqrt(np.sum(inverse**2, axis=1))
+        if not (np.isfinite(half_x) and np.isfinite(half_y)):
+            return whole
+        cols = np.flatnonzero(np.fabs(x_val - x0_val) <= half_x)
+        rows = np.flatnonzero(np.fabs(y_val - y0_val) <= half_y)
+        if len(cols) == 0 or len(rows) == 0:
+            return slice(0, 0), slice(0, 0)
+        return slice(rows[0], rows[-1] + 1), slice(cols[0], cols[-1] + 1)
+
+    def _rotation(self, theta):
+        """
+        Matrix of _rotate_z
+
+        : theta: angle to rotate by in rad
+        """
+        return np.array([[math.cos(theta), math.sin(theta)],
+                         [-math.sin(theta), math.cos(theta)]])
+
     def plot_image(self, image):
         """
         Plot image using pyplot
@@ -477,11 +596,11 @@ class ResolutionCalculator(object):
 
         # define sigma component direction
         if comp == 'radial':
-            phi_x = math.cos(phi)
-            phi_y = math.sin(phi)
+            phi_x = np.cos(phi)
+            phi_y = np.sin(phi)
         elif comp == 'phi':
-            phi_x = math.sin(phi)
-            phi_y = math.cos(phi)
+            phi_x = np.sin(phi)
+            phi_y = np.cos(phi)
         elif comp == 'x':
             phi_x = 1
             phi_y = 0
@@ -530,27 +649,27 @@ class ResolutionCalculator(object):
             return 0, 0
         else:
             # calculate sigma^2 for 1d
-            sigma1d = 2 * math.pow(radius/distance*spread, 2)
+            sigma1d = 2 * np.power(radius/distance*spread, 2)
             if comp == 'x':
-                sigma1d *= (math.cos(phi)*math.cos(phi))
+                sigma1d *= (np.cos(phi)*np.cos(phi))
             elif comp == 'y':
-                sigma1d *= (math.sin(phi)*math.sin(phi))
+                sigma1d *= (np.sin(phi)*np.sin(phi))
             else:
                 sigma1d *= 1
             # sigma^2 for 2d
             # shift the coordinate due to the gravitational shift
-            rad_x = radius * math.cos(phi)
-            rad_y = A_value - radius * math.sin(phi)
-            radius = math.sqrt(rad_x * rad_x + rad_y * rad_y)
+            rad_x = radius * np.cos(phi)
+            rad_y = A_value - radius * np.sin(phi)
+            radius = np.sqrt(rad_x * rad_x + rad_y * rad_y)
             # new phi
-            phi = math.atan2(-rad_y, rad_x)
+            phi = np.arctan2(-rad_y, rad_x)
             self.gravity_phi = phi
             # calculate sigma^2
-            sigma = 2 * math.pow(radius/distance*spread, 2)
+            sigma = 2 * np.power(radius/distance*spread, 2)
             if comp == 'x':
-                sigma *= (math.cos(phi)*math.cos(phi))
+                sigma *= (np.cos(phi)*np.cos(phi))
             elif comp == 'y':
-                sigma *= (math.sin(phi)*math.sin(phi))
+                sigma *= (np.sin(phi)*np.sin(phi))
             else:
                 sigma *= 1
 
@@ -885,14 +1004,9 @@ class ResolutionCalculator(object):
 
         : return: gaussian (value)
         """
-        # phi values at each points (not at the center)
+        # distance to the center
         x_value = x_val - x0_val
         y_value = y_val - y0_val
-        phi_i = np.arctan2(y_val, x_val)
-
-        # phi correction due to the gravity shift (in phi)
-        phi_0 = math.atan2(y0_val, x0_val)
-        phi_i = phi_i - phi_0 + self.gravity_phi
 
         sin_phi = np.sin(self.gravity_phi)
         cos_phi = np.cos(self.gravity_phi)
@@ -970,7 +1084,7 @@ class ResolutionCalculator(object):
 
         : return phi: the azimuthal angle of q on x-y plane
         """
-        phi = math.atan2(qy_value, qx_value)
+        phi = np.arctan2(qy_value, qx_value)
         return phi
 
     def _get_detector_qxqy_pixels(self):
@@ -1042,17 +1156,10 @@ class ResolutionCalculator(object):
         detector_ind_x = detector_ind_x * pix_x_size
         detector_ind_y = detector_ind_y * pix_y_size
 
-        qx_value = np.zeros(len(detector_ind_x))
-        qy_value = np.zeros(len(detector_ind_y))
-        i = 0
-
-        for indx in detector_ind_x:
-            qx_value[i] = self._get_qx(indx, sample2detector_distance, wavelength)
-            i += 1
-        i = 0
-        for indy in detector_ind_y:
-            qy_value[i] = self._get_qx(indy, sample2detector_distance, wavelength)
-            i += 1
+        qx_value = self._get_qx(detector_ind_x, sample2detector_distance,
+                                wavelength)
+        qy_value = self._get_qx(detector_ind_y, sample2detector_distance,
+                                wavelength)
 
         # qx_value and qy_value values in array
         qx_value = qx_value.repeat(detector_pix_nums_y)
@@ -1100,7 +1207,7 @@ class ResolutionCalculator(object):
 
     def _get_qx(self, dx_size, det_dist, wavelength):
         """
-        :param dx_size: x-distance from beam center [cm]
+        :param dx_size: x-distance from beam center [cm], float or array
         :param det_dist: sample to detector distance [cm]
 
         :return: q-value at the given position
@@ -1119,7 +1226,7 @@ class ResolutionCalculator(object):
         : return qr_value, phi
         """
         # find |q| on detector plane
-        qr_value = sqrt(qx_value*qx_value + qy_value*qy_value)
+        qr_value = np.sqrt(qx_value*qx_value + qy_value*qy_value)
         # find angle phi
         phi = self._atan_phi(qy_value, qx_value)
 
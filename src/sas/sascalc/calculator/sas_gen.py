@@ -8,12 +8,25 @@ import os
 import sys
 import copy
 import logging
+import multiprocessing
+import warnings
+
+try:
+    from concurrent import futures
+except ImportError:
+    # CRUFT: python 2 without the futures backport computes serially
+    futures = None
 
 from periodictable import formula
 from periodictable import nsf
 import numpy as np
 
-from . import _sld2i
+try:
+    from . import _sld2i
+except ImportError:
+    # The NumPy engine is used when the C library is not built
+    _sld2i = None
+from . import geni
 from .BaseComponent import BaseComponent
 
 logger = logging.getLogger(__name__)
@@ -30,6 +43,8 @@ MFACTOR_MT = 2.3164E-9
 METER2ANG = 1.0E+10
 #Avogadro constant [1/mol]
 NA = 6.02214129e+23
+# Minimum number of q points computed by each call to the C library
+MIN_CHUNK_SIZE = 16
 
 def mag2sld(mag, v_unit=None):
     """
@@ -56,6 +71,54 @@ def transform_center(pos_x, pos_y, pos_z):
     posz = pos_z - (min(pos_z) + max(pos_z)) / 2.0
     return posx, posy, posz
 
+def pair_histogram(pos_x, pos_y, pos_z, weights, bin_width, block_size=2**20):
+    """
+    Histogram of the distances between all pairs of pixels, weighted by
+    the product of the pixel weights.
+
+    The weight of each pair is shared between the two nearest nodes of a
+    grid of distances r = i * bin_width, in proportion to its distance to
+    them, so that a function of r summed over the histogram is exact to
+    second order in the bin width. Each pair is counted twice, as (j, k)
+    and (k, j), and the pixels with themselves are counted at r = 0.
+
+    :param pos_x, pos_y, pos_z: pixel positions [A]
+    :param weights: pixel weights, such as sld * volume
+    :param bin_width: distance between the nodes of the histogram [A]
+    :param block_size: number of pairs computed at once
+    :return: r, hist where r are the nodes and hist the weights summed
+        on each node
+    """
+    pos_x, pos_y, pos_z = _vec(pos_x), _vec(pos_y), _vec(pos_z)
+    weights = _vec(weights)
+    n_pix = len(weights)
+    extent = np.sqrt((pos_x.max() - pos_x.min())**2
+                     + (pos_y.max() - pos_y.min())**2
+                     + (pos_z.max() - pos_z.min())**2) if n_pix else 0.0
+    n_bins = int(extent / bin_width) + 3
+    hist = np.zeros(n_bins)
+    rows = max(1, block_size // max(n_pix, 1))
+    for start in range(0, n_pix, rows):
+        stop = min(start + rows, n_pix)
+        # Pairs (j, k) with j in the block and k > j
+        dx = pos_x[start:stop, None] - pos_x[None, start:]
+        dy = pos_y[start:stop, None] - pos_y[None, start:]
+        dz = pos_z[start:stop, None] - pos_z[None, start:]
+        dist = np.sqrt(dx*dx + dy*dy + dz*dz) / bin_width
+        pair_weights = weights[start:stop, None] * weights[None, start:]
+        pair_weights[:, :stop-start] *= np.triu(
+            np.ones((stop-start, stop-start)), k=1)
+        index = dist.astype(int)
+        upper = (dist - index) * pair_weights
+        index, upper = index.ravel(), upper.ravel()
+        hist += np.bincount(index, weights=pair_weights.ravel() - upper,
+                            minlength=n_bins)[:n_bins]
+        hist += np.bincount(index + 1, weights=upper,
+                            minlength=n_bins)[:n_bins]
+    hist *= 2.0
+    hist[0] += np.sum(weights * weights)
+    return np.arange(n_bins) * bin_width, hist
+
 class GenSAS(BaseComponent):
     """
     Generic SAS computation Model based on sld (n & m) arrays
@@ -78,6 +141,14 @@ class GenSAS(BaseComponent):
         self.data_mz = None
         self.data_vol = None #[A^3]
         self.is_avg = False
+        ## Bin width [A] of the pair distance histogram, or None for the
+        ## exact 1D calculation
+        self.bin_width = None
+        self._histogram = None
+        ## Number of threads computing the q points
+        self.nworkers = 1
+        ## Engine of the calculation: 'c' for the sld2i library or 'numpy'
+        self.engine = 'c' if _sld2i is not None else 'numpy'
         ## Name of the model
         self.name = "GenSAS"
         ## Define parameters
@@ -110,6 +181,7 @@ class GenSAS(BaseComponent):
         if self.data_vol is None:
             raise TypeError("data_vol is missing")
         self.data_vol = volume
+        self._histogram = None
 
     def set_is_avg(self, is_avg=False):
         """
@@ -117,6 +189,51 @@ class GenSAS(BaseComponent):
         """
         self.is_avg = is_avg
 
+    def set_engine(self, engine='c'):
+        """
+        Sets the engine of the calculation: 'c' for the sld2i C library,
+        or 'numpy' for the equivalent matrix computation of geni
+        """
+        if engine not in ('c', 'numpy'):
+            raise ValueError("Unknown engine %s" % engine)
+        if engine == 'c' and _sld2i is None:
+            raise ValueError("The sld2i library is not available")
+        self.engine = engine
+
+    def set_nworkers(self, nworkers=1):
+        """
+        Sets the number of threads among which the q points are split,
+        or None for one per processor. The threads share the pixel arrays
+        and give the same results as a single thread.
+        """
+        self.nworkers = nworkers
+
+    def set_bin_width(self, bin_width=None):
+        """
+        Sets the bin width [A] of the pair distance histogram used for the
+        1D calculation without averaging, or None to sum over all the
+        pixel pairs for each q.
+
+        The histogram is computed once and reused for any q until the
+        sld data, the solvent sld or the bin width change.
+        """
+        self.bin_width = bin_width
+
+    def get_histogram(self):
+        """
+        Get the pair distance histogram of the sld data, relative to the
+        solvent, computing it if needed
+
+        :return: r, hist, see pair_histogram()
+        """
+        key = (self.params['solvent_SLD'], self.bin_width)
+        if self._histogram is None or self._histogram[0] != key:
+            weights = (self.data_sldn - self.params['solvent_SLD']) * self.data_vol
+            hist = pair_histogram(self.data_x, self.data_y, self.data_z,
+                                  weights, self.bin_width)
+            self._histogram = key, hist
+        return self._histogram[1]
+
     def _gen(self, qx, qy):
         """
         Evaluate the function
@@ -125,6 +242,8 @@ class GenSAS(BaseComponent):
         :Param i: array of initial i-value
         :return: function value
         """
+        if not len(qy) and not self.is_avg and self.bin_width:
+            return self._gen_histogram(qx)
         pos_x = self.data_x
         pos_y = self.data_y
         pos_z = self.data_z
@@ -132,6 +251,17 @@ class GenSAS(BaseComponent):
             pos_x, pos_y, pos_z = transform_center(pos_x, pos_y, pos_z)
         sldn = copy.deepcopy(self.data_sldn)
         sldn -= self.params['solvent_SLD']
+        if self.engine == 'numpy':
+            if len(qy):
+                I_out = geni.Iqxy(
+                    qx, qy, pos_x, pos_y, sldn, self.data_vol,
+                    self.data_mx, self.data_my, self.data_mz,
+                    self.params['Up_frac_in'], self.params['Up_frac_out'],
+                    self.params['Up_theta'])
+            else:
+                I_out = geni.Iq(qx, pos_x, pos_y, pos_z, sldn, self.data_vol,
+                                is_avg=bool(self.is_avg))
+            return self._scale(I_out)
         # **** WARNING **** new_GenI holds pointers to numpy vectors
         # be sure that they are contiguous double precision arrays and make 
         # sure the GC doesn't eat them before genicom is called.
@@ -149,22 +279,68 @@ class GenSAS(BaseComponent):
             qx, qy = _vec(qx), _vec(qy)
             I_out = np.empty_like(qx)
             #print("npoints", qx.shape, "npixels", pos_x.shape)
-            _sld2i.genicomXY(model, qx, qy, I_out)
+            def compute(start, stop):
+                _sld2i.genicomXY(model, qx[start:stop], qy[start:stop],
+                                 I_out[start:stop])
             #print("I_out after", I_out)
         else:
             qx = _vec(qx)
             I_out = np.empty_like(qx)
-            _sld2i.genicom(model, qx, I_out)
+            def compute(start, stop):
+                _sld2i.genicom(model, qx[start:stop], I_out[start:stop])
+        self._run_chunks(compute, len(qx))
+        return self._scale(I_out)
+
+    def _scale(self, I_out):
+        """
+        Apply the scale, volume correction and background to I_out
+        """
         vol_correction = self.data_total_volume / self.params['total_volume']
         result = (self.params['scale'] * vol_correction * I_out
                   + self.params['background'])
         return result
 
+    def _run_chunks(self, compute, npoints):
+        """
+        Call compute(start, stop) over consecutive chunks of the q points,
+        in a pool of self.nworkers threads. The C library releases the GIL
+        while it computes and each q point is computed independently, so
+        the chunks run concurrently without changing the result.
+        """
+        nworkers = self.nworkers
+        if nworkers is None:
+            nworkers = multiprocessing.cpu_count()
+        nchunks = min(nworkers or 1, npoints // MIN_CHUNK_SIZE)
+        if nchunks <= 1 or futures is None:
+            compute(0, npoints)
+            return
+        bounds = np.linspace(0, npoints, nchunks + 1).astype(int)
+        with futures.ThreadPoolExecutor(max_workers=nchunks) as executor:
+            jobs = [executor.submit(compute, start, stop)
+                    for start, stop in zip(bounds[:-1], bounds[1:])]
+            for job in jobs:
+                job.result()
+
+    def _gen_histogram(self, q):
+        """
+        Evaluate the 1D function from the pair distance histogram
+        :Param q: array of q-values
+        :return: function value
+        """
+        r, hist = self.get_histogram()
+        q = _vec(q)
+        # np.sinc(x) is sin(pi x) / (pi x)
+        I_out = np.dot(np.sinc(np.outer(q, r / np.pi)), hist)
+        # in cm (unit) / number; to be multiplied by vol_pix
+        I_out *= 1.0E+8 / np.sum(self.data_vol)
+        return self._scale(I_out)
+
     def set_sld_data(self, sld_data=None):
         """
         Sets sld_data
         """
         self.sld_data = sld_data
+        self._histogram = None
         self.data_pos_unit = sld_data.pos_unit
         self.data_x = _vec(sld_data.pos_x)
         self.data_y = _vec(sld_data.pos_y)
@@ -371,129 +547,185 @@ class OMFReader(object):
     ## List of allowed extensions
     ext = ['.omf', '.OMF']
 
+    ## Header entries, matched anywhere in the name of a header line
+    header_keys = ["oommf", "title", "desc", "meshtype", "meshunit",
+                   "xbase", "ybase", "zbase",
+                   "xstepsize", "ystepsize", "zstepsize",
+                   "xnodes", "ynodes", "znodes",
+                   "xmin", "ymin", "zmin", "xmax", "ymax", "zmax",
+                   "valueunit", "valuemultiplier",
+                   "valuerangeminmag", "valuerangemaxmag"]
+    ## Check values starting the binary data, by size of the values
+    binary_check = {4: 1234567.0, 8: 123456789012345.0}
+
     def read(self, path):
         """
         Load data file
         :param path: file path
         :return: x, y, z, sld_n, sld_mx, sld_my, sld_mz
         """
-        desc = ""
-        mx = np.zeros(0)
-        my = np.zeros(0)
-        mz = np.zeros(0)
         try:
             input_f = open(path, 'rb')
-            buff = decode(input_f.read())
-            lines = buff.split('\n')
+            buff = input_f.read()
             input_f.close()
+            header, data_format, offset = self._read_header(buff)
             output = OMFData()
-            valueunit = None
-            for line in lines:
-                line = line.strip()
-                # Read data
-                if line and not line.startswith('#'):
-                    try:
-                        toks = line.split()
-                        _mx = float(toks[0])
-                        _my = float(toks[1])
-                        _mz = float(toks[2])
-                        _mx = mag2sld(_mx, valueunit)
-                        _my = mag2sld(_my, valueunit)
-                        _mz = mag2sld(_mz, valueunit)
-                        mx = np.append(mx, _mx)
-                        my = np.append(my, _my)
-                        mz = np.append(mz, _mz)
-                    except Exception as exc:
-                        # Skip non-data lines
-                        logger.error(str(exc)+" when processing %r"%line)
-                #Reading Header; Segment count ignored
-                s_line = line.split(":", 1)
-                if s_line[0].lower().count("oommf") > 0:
-                    oommf = s_line[1].lstrip()
-                if s_line[0].lower().count("title") > 0:
-                    title = s_line[1].lstrip()
-                if s_line[0].lower().count("desc") > 0:
-                    desc += s_line[1].lstrip()
-                    desc += '\n'
-                if s_line[0].lower().count("meshtype") > 0:
-                    meshtype = s_line[1].lstrip()
-                if s_line[0].lower().count("meshunit") > 0:
-                    meshunit = s_line[1].lstrip()
-                    if meshunit.count("m") < 1:
-                        msg = "Error: \n"
-                        msg += "We accept only m as meshunit"
-                        raise ValueError(msg)
-                if s_line[0].lower().count("xbase") > 0:
-                    xbase = s_line[1].lstrip()
-                if s_line[0].lower().count("ybase") > 0:
-                    ybase = s_line[1].lstrip()
-                if s_line[0].lower().count("zbase") > 0:
-                    zbase = s_line[1].lstrip()
-                if s_line[0].lower().count("xstepsize") > 0:
-                    xstepsize = s_line[1].lstrip()
-                if s_line[0].lower().count("ystepsize") > 0:
-                    ystepsize = s_line[1].lstrip()
-                if s_line[0].lower().count("zstepsize") > 0:
-                    zstepsize = s_line[1].lstrip()
-                if s_line[0].lower().count("xnodes") > 0:
-                    xnodes = s_line[1].lstrip()
-                if s_line[0].lower().count("ynodes") > 0:
-                    ynodes = s_line[1].lstrip()
-                if s_line[0].lower().count("znodes") > 0:
-                    znodes = s_line[1].lstrip()
-                if s_line[0].lower().count("xmin") > 0:
-                    xmin = s_line[1].lstrip()
-                if s_line[0].lower().count("ymin") > 0:
-                    ymin = s_line[1].lstrip()
-                if s_line[0].lower().count("zmin") > 0:
-                    zmin = s_line[1].lstrip()
-                if s_line[0].lower().count("xmax") > 0:
-                    xmax = s_line[1].lstrip()
-                if s_line[0].lower().count("ymax") > 0:
-                    ymax = s_line[1].lstrip()
-                if s_line[0].lower().count("zmax") > 0:
-                    zmax = s_line[1].lstrip()
-                if s_line[0].lower().count("valueunit") > 0:
-                    valueunit = s_line[1].lstrip().rstrip()
-                if s_line[0].lower().count("valuemultiplier") > 0:
-                    valuemultiplier = s_line[1].lstrip()
-                if s_line[0].lower().count("valuerangeminmag") > 0:
-                    valuerangeminmag = s_line[1].lstrip()
-                if s_line[0].lower().count("valuerangemaxmag") > 0:
-                    valuerangemaxmag = s_line[1].lstrip()
-                if s_line[0].lower().count("end") > 0:
-                    output.filename = os.path.basename(path)
-                    output.oommf = oommf
-                    output.title = title
-                    output.desc = desc
-                    output.meshtype = meshtype
-                    output.xbase = float(xbase) * METER2ANG
-                    output.ybase = float(ybase) * METER2ANG
-                    output.zbase = float(zbase) * METER2ANG
-                    output.xstepsize = float(xstepsize) * METER2ANG
-                    output.ystepsize = float(ystepsize) * METER2ANG
-                    output.zstepsize = float(zstepsize) * METER2ANG
-                    output.xnodes = float(xnodes)
-                    output.ynodes = float(ynodes)
-                    output.znodes = float(znodes)
-                    output.xmin = float(xmin) * METER2ANG
-                    output.ymin = float(ymin) * METER2ANG
-                    output.zmin = float(zmin) * METER2ANG
-                    output.xmax = float(xmax) * METER2ANG
-                    output.ymax = float(ymax) * METER2ANG
-                    output.zmax = float(zmax) * METER2ANG
-                    output.valuemultiplier = valuemultiplier
-                    output.valuerangeminmag = mag2sld(float(valuerangeminmag), \
-                                                      valueunit)
-                    output.valuerangemaxmag = mag2sld(float(valuerangemaxmag), \
-                                                      valueunit)
-            output.set_m(mx, my, mz)
+            output.filename = os.path.basename(path)
+            output.oommf = header.get("oommf", output.oommf)
+            output.title = header.get("title", output.title)
+            output.desc = header["desc"]
+            output.meshtype = header["meshtype"]
+            output.xbase = float(header["xbase"]) * METER2ANG
+            output.ybase = float(header["ybase"]) * METER2ANG
+            output.zbase = float(header["zbase"]) * METER2ANG
+            output.xstepsize = float(header["xstepsize"]) * METER2ANG
+            output.ystepsize = float(header["ystepsize"]) * METER2ANG
+            output.zstepsize = float(header["zstepsize"]) * METER2ANG
+            output.xnodes = float(header["xnodes"])
+            output.ynodes = float(header["ynodes"])
+            output.znodes = float(header["znodes"])
+            output.xmin = float(header["xmin"]) * METER2ANG
+            output.ymin = float(header["ymin"]) * METER2ANG
+            output.zmin = float(header["zmin"]) * METER2ANG
+            output.xmax = float(header["xmax"]) * METER2ANG
+            output.ymax = float(header["ymax"]) * METER2ANG
+            output.zmax = float(header["zmax"]) * METER2ANG
+            # OVF 2.0 files give the unit of each component
+            valueunit = header["valueunit"].split()[0]
+            # The value range is not given by OVF 2.0 files
+            if "valuemultiplier" in header:
+                output.valuemultiplier = header["valuemultiplier"]
+            if "valuerangeminmag" in header:
+                output.valuerangeminmag = mag2sld(
+                    float(header["valuerangeminmag"]), valueunit)
+            if "valuerangemaxmag" in header:
+                output.valuerangemaxmag = mag2sld(
+                    float(header["valuerangemaxmag"]), valueunit)
+            if data_format == "text":
+                values = self._read_text(buff, offset)
+            else:
+                size = int(data_format.split()[1])
+                count = int(output.xnodes * output.ynodes * output.znodes)
+                values = self._read_binary(buff, offset, size, count)
+            # The vectors are the first three columns
+            values = mag2sld(values[:, :3], valueunit)
+            output.set_m(values[:, 0], values[:, 1], values[:, 2])
             return output
         except Exception:
             msg = "%s is not supported: \n" % path
-            msg += "We accept only Text format OMF file."
+            msg += "We accept only rectangular OMF files, "
+            msg += "with Text or Binary 4/8 data."
             raise RuntimeError(msg)
 
+    def _read_header(self, buff):
+        """
+        Read the header lines, up to the start of the data
+
+        :param buff: file contents
+        :return: header entries, format of the data ('text', 'binary 4'
+            or 'binary 8'), and offset of the data in buff
+        """
+        header = {"desc": ""}
+        start = 0
+        while True:
+            end = buff.find(b'\n', start)
+            if end < 0:
+                raise ValueError("No data found")
+            line = decode(buff[start:end]).strip()
+            start = end + 1
+            s_line = line.split(":", 1)
+            if len(s_line) < 2:
+                continue
+            name = s_line[0].lower()
+            if name.count("begin") > 0 and s_line[1].lower().count("data") > 0:
+                data_format = " ".join(s_line[1].lower().split()[1:])
+                return header, data_format, start
+            value = s_line[1].strip()
+            for key in self.header_keys:
+                if name.count(key) > 0:
+                    if key == "desc":
+                        header[key] += value + '\n'
+                    else:
+                        header[key] = value
+            if name.count("meshunit") > 0 and value.count("m") < 1:
+                msg = "Error: \n"
+                msg += "We accept only m as meshunit"
+                raise ValueError(msg)
+
+    def _read_text(self, buff, offset):
+        """
+        Convert the text data block starting at offset in a single call
+
+        :param buff: file contents
+        :param offset: position of the first data line in buff
+        :return: array of the values with one row per data line
+        """
+        end = buff.find(b'#', offset)
+        block = decode(buff[offset:end if end >= 0 else len(buff)])
+        ncols = len(block.lstrip().split('\n', 1)[0].split())
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            values = np.fromstring(block, dtype=float, sep=' ')
+        # numpy warns when it stops on a value which is not a number
+        if not caught and ncols > 0 and len(values) % ncols == 0:
+            return values.reshape(-1, ncols)
+        # Otherwise convert the lines one by one, skipping non-data lines
+        rows = []
+        for line in decode(buff[offset:]).split('\n'):
+            line = line.strip()
+            if line.startswith('#'):
+                if line.lower().count("end: data") > 0:
+                    break
+            elif line:
+                try:
+                    toks = line.split()
+                    rows.append([float(toks[0]), float(toks[1]),
+                                 float(toks[2])])
+                except Exception as exc:
+                    # Skip non-data lines
+                    logger.error(str(exc)+" when processing %r"%line)
+        return np.array(rows).reshape(-1, 3)
+
+    def _read_binary(self, buff, offset, size, count):
+        """
+        Get the binary data block starting at offset
+
+        The block starts with a check value, which is big endian in OVF
+        1.0 files and little endian in OVF 2.0 files.
+
+        :param buff: file contents
+        :param offset: position of the check value in buff
+        :param size: size of the values in bytes, 4 or 8
+        :param count: number of vectors
+        :return: array of the values with one row per vector
+        """
+        for order in ('>', '<'):
+            dtype = np.dtype('%sf%d' % (order, size))
+            check = np.frombuffer(buff, dtype=dtype, count=1, offset=offset)
+            if check[0] == self.binary_check[size]:
+                values = np.frombuffer(buff, dtype=dtype, count=3 * count,
+                                       offset=offset + size)
+                return values.astype(float).reshape(count, 3)
+        raise ValueError("Invalid check value of the binary data")
+
+def _atom_sld_volume(atom_name):
+    """
+    Get the neutron sld and the volume of an atom
+
+    :param atom_name: element symbol
+    :return: (sld [1/A^2], volume [A^3]), or zeros if the element is unknown
+    """
+    try:
+        # sld in Ang^-2 unit
+        val = nsf.neutron_sld(atom_name)[0] * 1.0e-6
+        atom = formula(atom_name)
+        # cm to A units
+        vol = 1.0e+24 * atom.mass / atom.density / NA
+        return val, vol
+    except Exception:
+        logger.error("Error: set the sld of %s to zero" % atom_name)
+        return 0.0, 0.0
+
 class PDBReader(object):
     """
     PDB reader class: limited for reading the lines starting with 'ATOM'
@@ -512,21 +744,18 @@ class PDBReader(object):
         :return: MagSLD
         :raise RuntimeError: when the file can't be opened
         """
-        pos_x = np.zeros(0)
-        pos_y = np.zeros(0)
-        pos_z = np.zeros(0)
-        sld_n = np.zeros(0)
-        sld_mx = np.zeros(0)
-        sld_my = np.zeros(0)
-        sld_mz = np.zeros(0)
-        vol_pix = np.zeros(0)
-        pix_symbol = np.zeros(0)
-        x_line = []
-        y_line = []
-        z_line = []
-        x_lines = []
-        y_lines = []
-        z_lines = []
+        # Columns are collected in lists and converted once at the end
+        pos_x = []
+        pos_y = []
+        pos_z = []
+        sld_n = []
+        vol_pix = []
+        pix_symbol = []
+        # (sld, volume) of each element, looked up once per file
+        elements = {}
+        # Bonds as (atom, atom) index pairs, in the order they are found
+        bonds = []
+        bond_set = set()
         try:
             input_f = open(path, 'rb')
             buff = decode(input_f.read())
@@ -554,25 +783,15 @@ class PDBReader(object):
                         _pos_x = float(line[30:38].strip())
                         _pos_y = float(line[38:46].strip())
                         _pos_z = float(line[46:54].strip())
-                        pos_x = np.append(pos_x, _pos_x)
-                        pos_y = np.append(pos_y, _pos_y)
-                        pos_z = np.append(pos_z, _pos_z)
-                        try:
-                            val = nsf.neutron_sld(atom_name)[0]
-                            # sld in Ang^-2 unit
-                            val *= 1.0e-6
-                            sld_n = np.append(sld_n, val)
-                            atom = formula(atom_name)
-                            # cm to A units
-                            vol = 1.0e+24 * atom.mass / atom.density / NA
-                            vol_pix = np.append(vol_pix, vol)
-                        except Exception:
-                            logger.error("Error: set the sld of %s to zero"% atom_name)
-                            sld_n = np.append(sld_n, 0.0)
-                        sld_mx = np.append(sld_mx, 0)
-                        sld_my = np.append(sld_my, 0)
-                        sld_mz = np.append(sld_mz, 0)
-                        pix_symbol = np.append(pix_symbol, atom_name)
+                        if atom_name not in elements:
+                            elements[atom_name] = _atom_sld_volume(atom_name)
+                        val, vol = elements[atom_name]
+                        pos_x.append(_pos_x)
+                        pos_y.append(_pos_y)
+                        pos_z.append(_pos_z)
+                        sld_n.append(val)
+                        vol_pix.append(vol)
+                        pix_symbol.append(atom_name)
                     elif line[0:6].strip().count('CONECT') > 0:
                         toks = line.split()
                         num = int(toks[1]) - 1
@@ -588,20 +807,29 @@ class PDBReader(object):
                         #need val_list ordered
                         for val in val_list:
                             index = val - 1
-                            if (pos_x[index], pos_x[num]) in x_line and \
-                               (pos_y[index], pos_y[num]) in y_line and \
-                               (pos_z[index], pos_z[num]) in z_line:
+                            if max(index, num) >= len(pos_x):
+                                raise IndexError("CONECT of a missing atom")
+                            if (index, num) in bond_set or \
+                                    (num, index) in bond_set:
                                 continue
-                            x_line.append((pos_x[num], pos_x[index]))
-                            y_line.append((pos_y[num], pos_y[index]))
-                            z_line.append((pos_z[num], pos_z[index]))
-                    if len(x_line) > 0:
-                        x_lines.append(x_line)
-                        y_lines.append(y_line)
-                        z_lines.append(z_line)
+                            bond_set.add((num, index))
+                            bonds.append((num, index))
                 except Exception as exc:
                     logger.error(exc)
 
+            pos_x = np.array(pos_x)
+            pos_y = np.array(pos_y)
+            pos_z = np.array(pos_z)
+            sld_n = np.array(sld_n)
+            vol_pix = np.array(vol_pix)
+            pix_symbol = np.array(pix_symbol)
+            sld_mx = np.zeros(len(sld_n))
+            sld_my = np.zeros(len(sld_n))
+            sld_mz = np.zeros(len(sld_n))
+            start, end = np.array(bonds, dtype=int).reshape(-1, 2).T
+            x_line = list(zip(pos_x[start], pos_x[end]))
+            y_line = list(zip(pos_y[start], pos_y[end]))
+            z_line = list(zip(pos_z[start], pos_z[end]))
             output = MagSLD(pos_x, pos_y, pos_z, sld_n, sld_mx, sld_my, sld_mz)
             output.set_conect_lines(x_line, y_line, z_line)
             output.filename = os.path.basename(path)
@@ -10,6 +10,23 @@ from __future__ import division  # Get true division
 import numpy as np
 
 
+def _power(X, n):
+    """
+    X**n computed in the same way for numpy arrays and scalars.
+
+    For arrays, numpy computes the powers 2, -1 and 0.5 with a product,
+    a division and a square root, but it calls pow() for scalars, which
+    can differ in the last bit.
+    """
+    if n == 2:
+        return X*X
+    elif n == -1:
+        return 1.0/X
+    elif n == 0.5:
+        return np.sqrt(X)
+    return X**n
+
+
 def div(X, varX, Y, varY):
     """Division with error propagation"""
     # Direct algorithm:
@@ -18,10 +35,10 @@ def div(X, varX, Y, varY):
     #        = (varX + varY * Z**2) / Y**2
     # Indirect algorithm to minimize intermediates
     Z = X/Y      # truediv => Z is a float
-    varZ = Z**2  # Z is a float => varZ is a float
+    varZ = Z*Z   # Z is a float => varZ is a float
     varZ *= varY
     varZ += varX
-    T = Y**2     # Doesn't matter if T is float or int
+    T = Y*Y      # Doesn't matter if T is float or int
     varZ /= T
     return Z, varZ
 
@@ -30,7 +47,7 @@ def mul(X, varX, Y, varY):
     """Multiplication with error propagation"""
     # Direct algorithm:
     Z = X * Y
-    varZ = Y**2 * varX + X**2 * varY
+    varZ = Y*Y * varX + X*X * varY
     # Indirect algorithm won't ensure floating point results
     #   varZ = Y**2
     #   varZ *= varX
@@ -59,14 +76,14 @@ def add(X, varX, Y, varY):
 def exp(X, varX):
     """Exponentiation with error propagation"""
     Z = np.exp(X)
-    varZ = varX * Z**2
+    varZ = varX * (Z*Z)
     return Z, varZ
 
 
 def log(X, varX):
     """Logarithm with error propagation"""
     Z = np.log(X)
-    varZ = varX / X**2
+    varZ = varX / (X*X)
     return Z, varZ
 
 # Confirm this formula before using it
@@ -83,7 +100,7 @@ def pow(X, varX, n):
     #   Z = X**n
     #   varZ = n*n * varX/X**2 * Z**2
     # Indirect algorithm to minimize intermediates
-    Z = X**n
+    Z = _power(X, n)
     varZ = varX / X
     varZ /= X
     varZ *= Z
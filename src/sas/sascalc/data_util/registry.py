@@ -61,6 +61,9 @@ class ExtensionRegistry(object):
     """
     def __init__(self, **kw):
         self.loaders = {}
+        # Sorted extensions, and the keys of loaders they were taken from
+        self._extensions = []
+        self._extension_keys = set()
 
     def __setitem__(self, ext, loader):
         if ext not in self.loaders:
@@ -85,9 +88,12 @@ class ExtensionRegistry(object):
         """
         Return a sorted list of registered extensions.
         """
-        exts = [a for a in self.loaders.keys() if a.startswith('.')]
-        exts.sort()
-        return exts
+        # Only sort them again when loaders were registered or removed
+        if self.loaders.keys() != self._extension_keys:
+            self._extension_keys = set(self.loaders.keys())
+            self._extensions = sorted(a for a in self._extension_keys
+                                      if a.startswith('.'))
+        return list(self._extensions)
 
     def lookup(self, path):
         """
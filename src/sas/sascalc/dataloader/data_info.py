@@ -24,8 +24,6 @@ from __future__ import print_function
 #from sas.guitools.plottables import Data1D as plottable_1D
 from sas.sascalc.data_util.uncertainty import Uncertainty
 import numpy as np
-import math
-from math import fabs
 
 class plottable_1D(object):
     """
@@ -82,6 +80,206 @@ class plottable_1D(object):
         self._yunit = unit
 
 
+class SortedIndex(object):
+    """
+    Permutation sorting an array of values, so that the points with a
+    value within a range can be found with two binary searches instead
+    of a scan of the whole array.
+    """
+    def __init__(self, values):
+        """
+        :param values: 1D array of values to index
+        """
+        self.values = values
+        self.order = np.argsort(values, kind='mergesort')
+        self.sorted_values = values[self.order]
+
+    def bounds(self, v_min, v_max):
+        """
+        Find the slice of the sorted values within a range.
+
+        :param v_min: lower limit of the range, included
+        :param v_max: upper limit of the range, included
+        :return: start and end of the slice of sorted values
+        """
+        start = np.searchsorted(self.sorted_values, v_min, side='left')
+        end = np.searchsorted(self.sorted_values, v_max, side='right')
+        return start, max(start, end)
+
+    def count(self, v_min, v_max):
+        """
+        Number of points with v_min <= value <= v_max
+        """
+        start, end = self.bounds(v_min, v_max)
+        return end - start
+
+    def select(self, v_min, v_max):
+        """
+        Indices of the points with v_min <= value <= v_max, ordered by
+        increasing value.
+        """
+        start, end = self.bounds(v_min, v_max)
+        return self.order[start:end]
+
+    def mask(self, v_min, v_max):
+        """
+        Boolean mask of the points with v_min <= value <= v_max
+        """
+        start, end = self.bounds(v_min, v_max)
+        if end - start > len(self.order) // 4:
+            # Comparing every value is cheaper than scattering most of them
+            return (v_min <= self.values) & (self.values <= v_max)
+        out = np.zeros(len(self.order), dtype=bool)
+        out[self.order[start:end]] = True
+        return out
+
+
+class Geometry2D(object):
+    """
+    Polar geometry of the points of a 2D data set.
+
+    Each quantity is computed the first time it is requested and then
+    reused. The geometry holds on to the arrays it was derived from so
+    that plottable_2D.get_geometry() can tell when one of them has been
+    replaced and a new geometry is needed.
+    """
+    def __init__(self, data2d):
+        """
+        :param data2d: plottable_2D object the geometry describes
+        """
+        self.data = data2d.data
+        self.qx_data = data2d.qx_data
+        self.qy_data = data2d.qy_data
+        self.q_data = data2d.q_data
+        self._finite = None
+        self._phi = None
+        self._finite_phi = None
+        self._q = None
+        self._q_index = None
+        self._finite_q_data_index = None
+        self._inversion_orbits = None
+
+    def matches(self, data2d):
+        """
+        Check that the geometry was computed from the current arrays of
+        a data set.
+
+        :param data2d: plottable_2D object
+        :return: True if the data and q arrays are the ones used here
+        """
+        return (self.data is data2d.data and self.qx_data is data2d.qx_data
+                and self.qy_data is data2d.qy_data
+                and self.q_data is data2d.q_data)
+
+    @property
+    def finite(self):
+        """
+        Boolean mask of the points with a finite intensity
+        """
+        if self._finite is None:
+            self._finite = np.isfinite(self.data)
+        return self._finite
+
+    @property
+    def phi(self):
+        """
+        Azimuthal angle of each point, atan2(qy, qx), in [-pi, pi]
+        """
+        if self._phi is None:
+            self._phi = np.arctan2(self.qy_data, self.qx_data)
+        return self._phi
+
+    @property
+    def finite_phi(self):
+        """
+        Azimuthal angle of the points with a finite intensity
+        """
+        if self._finite_phi is None:
+            self._finite_phi = self.phi[self.finite]
+        return self._finite_phi
+
+    @property
+    def q(self):
+        """
+        Magnitude of the q-vector of each point in the detector plane
+        """
+        if self._q is None:
+            self._q = np.sqrt(self.qx_data * self.qx_data +
+                              self.qy_data * self.qy_data)
+        return self._q
+
+    @property
+    def q_index(self):
+        """
+        SortedIndex of the points by magnitude of q in the detector plane
+        """
+        if self._q_index is None:
+            self._q_index = SortedIndex(self.q)
+        return self._q_index
+
+    @property
+    def finite_q_data_index(self):
+        """
+        SortedIndex by q_data of the points with a finite intensity
+        """
+        if self._finite_q_data_index is None:
+            self._finite_q_data_index = SortedIndex(self.q_data[self.finite])
+        return self._finite_q_data_index
+
+    @property
+    def inversion_orbits(self):
+        """
+        Pairs of points related by the inversion (qx, qy) -> (-qx, -qy),
+        matched to 1e-10 of the largest q component.
+
+        :return: orbit number of each point and index of the first point
+            of each orbit, or None if some q values are not finite
+        """
+        if self._inversion_orbits is None:
+            qx, qy = self.qx_data, self.qy_data
+            if not (len(qx) and np.all(np.isfinite(qx))
+                    and np.all(np.isfinite(qy))):
+                return None
+            scale = max(np.max(np.abs(qx)), np.max(np.abs(qy))) * 1e-10
+            key = np.empty((len(qx), 2), dtype=np.int64)
+            key[:, 0] = np.rint(qx / scale) if scale > 0 else 0
+            key[:, 1] = np.rint(qy / scale) if scale > 0 else 0
+            # Move the points to the half plane qx > 0 or qx = 0, qy >= 0
+            flip = (key[:, 0] < 0) | ((key[:, 0] == 0) & (key[:, 1] < 0))
+            key[flip] *= -1
+            _, first, orbit = np.unique(key, axis=0, return_index=True,
+                                        return_inverse=True)
+            self._inversion_orbits = orbit.ravel(), first
+        return self._inversion_orbits
+
+    def eval_symmetric(self, fn, index):
+        """
+        Evaluate fn([qx, qy]) on the points selected by index, assuming that
+        fn gives the same value at q and -q.
+
+        Each pair of points is only evaluated once. When this does not save
+        much, for example if the beam is far from the detector centre, fn is
+        evaluated on every point.
+
+        :param fn: function of [qx, qy] arrays, such as evalDistribution
+        :param index: boolean mask of the points to evaluate
+        :return: the values of fn on the points of index
+        """
+        orbits = self.inversion_orbits
+        if orbits is not None:
+            orbit, first = orbits
+            selected = orbit[index]
+            needed = np.zeros(len(first), dtype=bool)
+            needed[selected] = True
+            points = first[needed]
+            if len(points) < 0.9 * len(selected):
+                values = np.asarray(fn([self.qx_data[points],
+                                        self.qy_data[points]]))
+                position = np.cumsum(needed) - 1
+                return values[position[selected]]
+        return fn([self.qx_data[index], self.qy_data[index]])
+
+
 class plottable_2D(object):
     """
     Data2D is a place holder for 2D plottables.
@@ -98,6 +296,8 @@ class plottable_2D(object):
     dqx_data = None
     dqy_data = None
     mask = None
+    ## Cached polar geometry, see get_geometry()
+    _geometry = None
 
     # Units
     _xaxis = ''
@@ -146,6 +346,26 @@ class plottable_2D(object):
         self._zaxis = label
         self._zunit = unit
 
+    def get_geometry(self):
+        """
+        Return the polar geometry of the data points.
+
+        The geometry is cached and reused as long as the data, qx_data,
+        qy_data and q_data arrays are not replaced. Call reset_geometry()
+        after modifying any of those arrays in place.
+
+        :return: Geometry2D object
+        """
+        if self._geometry is None or not self._geometry.matches(self):
+            self._geometry = Geometry2D(self)
+        return self._geometry
+
+    def reset_geometry(self):
+        """
+        Discard the cached polar geometry
+        """
+        self._geometry = None
+
 
 class Vector(object):
     """
@@ -805,10 +1025,10 @@ class Data1D(plottable_1D, DataInfo):
                 raise ValueError(msg)
             # Here we could also extrapolate between data points
             TOLERANCE = 0.01
-            for i in range(len(self.x)):
-                if fabs(self.x[i] - other.x[i]) > self.x[i]*TOLERANCE:
-                    msg = "Incompatible data sets: x-values do not match"
-                    raise ValueError(msg)
+            x, x_other = np.asarray(self.x), np.asarray(other.x)
+            if np.any(np.fabs(x - x_other) > x*TOLERANCE):
+                msg = "Incompatible data sets: x-values do not match"
+                raise ValueError(msg)
 
             # Check that the other data set has errors, otherwise
             # create zero vector
@@ -838,34 +1058,34 @@ class Data1D(plottable_1D, DataInfo):
         else:
             result.dxl = np.zeros(len(self.x))
 
-        for i in range(len(self.x)):
-            result.x[i] = self.x[i]
-            if self.dx is not None and len(self.x) == len(self.dx):
-                result.dx[i] = self.dx[i]
-            if self.dxw is not None and len(self.x) == len(self.dxw):
-                result.dxw[i] = self.dxw[i]
-            if self.dxl is not None and len(self.x) == len(self.dxl):
-                result.dxl[i] = self.dxl[i]
-
-            a = Uncertainty(self.y[i], dy[i]**2)
-            if isinstance(other, Data1D):
-                b = Uncertainty(other.y[i], dy_other[i]**2)
-                if other.dx is not None:
-                    result.dx[i] *= self.dx[i]
-                    result.dx[i] += (other.dx[i]**2)
-                    result.dx[i] /= 2
-                    result.dx[i] = math.sqrt(result.dx[i])
-                if result.dxl is not None and other.dxl is not None:
-                    result.dxl[i] *= self.dxl[i]
-                    result.dxl[i] += (other.dxl[i]**2)
-                    result.dxl[i] /= 2
-                    result.dxl[i] = math.sqrt(result.dxl[i])
-            else:
-                b = other
-
-            output = operation(a, b)
-            result.y[i] = output.x
-            result.dy[i] = math.sqrt(math.fabs(output.variance))
+        result.x[:] = self.x
+        if self.dx is not None and len(self.x) == len(self.dx):
+            result.dx[:] = self.dx
+        if self.dxw is not None and len(self.x) == len(self.dxw):
+            result.dxw[:] = self.dxw
+        if self.dxl is not None and len(self.x) == len(self.dxl):
+            result.dxl[:] = self.dxl
+
+        # Propagate the uncertainties on the whole arrays at once
+        a = Uncertainty(np.asarray(self.y), np.square(dy))
+        if isinstance(other, Data1D):
+            b = Uncertainty(np.asarray(other.y), np.square(dy_other))
+            if other.dx is not None:
+                result.dx *= self.dx
+                result.dx += np.square(other.dx)
+                result.dx /= 2
+                np.sqrt(result.dx, out=result.dx)
+            if result.dxl is not None and other.dxl is not None:
+                result.dxl *= self.dxl
+                result.dxl += np.square(other.dxl)
+                result.dxl /= 2
+                np.sqrt(result.dxl, out=result.dxl)
+        else:
+            b = other
+
+        output = operation(a, b)
+        result.y[:] = output.x
+        result.dy[:] = np.sqrt(np.fabs(output.variance))
         return result
 
     def _validity_check_union(self, other):
@@ -1037,13 +1257,19 @@ class Data2D(plottable_2D, DataInfo):
                 len(self.qy_data) != len(other.qy_data):
                 msg = "Unable to perform operation: data length are not equal"
                 raise ValueError(msg)
-            for ind in range(len(self.data)):
-                if fabs(self.qx_data[ind] - other.qx_data[ind]) > fabs(self.qx_data[ind])*TOLERANCE:
+            qx, qx_other = np.asarray(self.qx_data), np.asarray(other.qx_data)
+            qy, qy_other = np.asarray(self.qy_data), np.asarray(other.qy_data)
+            bad_qx = np.fabs(qx - qx_other) > np.fabs(qx)*TOLERANCE
+            bad_qy = np.fabs(qy - qy_other) > np.fabs(qy)*TOLERANCE
+            # Report the first point that does not match
+            bad = np.flatnonzero(bad_qx | bad_qy)
+            if len(bad) > 0:
+                ind = bad[0]
+                if bad_qx[ind]:
                     msg = "Incompatible data sets: qx-values do not match: %s %s" % (self.qx_data[ind], other.qx_data[ind])
-                    raise ValueError(msg)
-                if fabs(self.qy_data[ind] - other.qy_data[ind]) > fabs(self.qy_data[ind])*TOLERANCE:
+                else:
                     msg = "Incompatible data sets: qy-values do not match: %s %s" % (self.qy_data[ind], other.qy_data[ind])
-                    raise ValueError(msg)
+                raise ValueError(msg)
 
             # Check that the scales match
             err_other = other.err_data
@@ -1074,40 +1300,36 @@ class Data2D(plottable_2D, DataInfo):
         else:
             result.dqx_data = np.zeros(len(self.data))
             result.dqy_data = np.zeros(len(self.data))
-        for i in range(np.size(self.data)):
-            result.data[i] = self.data[i]
-            if self.err_data is not None and \
-                            np.size(self.data) == np.size(self.err_data):
-                result.err_data[i] = self.err_data[i]
-            if self.dqx_data is not None:
-                result.dqx_data[i] = self.dqx_data[i]
-            if self.dqy_data is not None:
-                result.dqy_data[i] = self.dqy_data[i]
-            result.qx_data[i] = self.qx_data[i]
-            result.qy_data[i] = self.qy_data[i]
-            result.q_data[i] = self.q_data[i]
-            result.mask[i] = self.mask[i]
-
-            a = Uncertainty(self.data[i], dy[i]**2)
-            if isinstance(other, Data2D):
-                b = Uncertainty(other.data[i], dy_other[i]**2)
-                if other.dqx_data is not None and \
-                        result.dqx_data is not None:
-                    result.dqx_data[i] *= self.dqx_data[i]
-                    result.dqx_data[i] += (other.dqx_data[i]**2)
-                    result.dqx_data[i] /= 2
-                    result.dqx_data[i] = math.sqrt(result.dqx_data[i])
-                if other.dqy_data is not None and \
-                        result.dqy_data is not None:
-                    result.dqy_data[i] *= self.dqy_data[i]
-                    result.dqy_data[i] += (other.dqy_data[i]**2)
-                    result.dqy_data[i] /= 2
-                    result.dqy_data[i] = math.sqrt(result.dqy_data[i])
-            else:
-                b = other
-            output = operation(a, b)
-            result.data[i] = output.x
-            result.err_data[i] = math.sqrt(math.fabs(output.variance))
+        result.data[:] = self.data
+        if result.dqx_data is not None:
+            result.dqx_data[:] = self.dqx_data
+            result.dqy_data[:] = self.dqy_data
+        result.qx_data[:] = self.qx_data
+        result.qy_data[:] = self.qy_data
+        result.q_data[:] = self.q_data
+        result.mask[:] = self.mask
+
+        # Propagate the uncertainties on the whole arrays at once
+        a = Uncertainty(np.asarray(self.data), np.square(dy))
+        if isinstance(other, Data2D):
+            b = Uncertainty(np.asarray(other.data), np.square(dy_other))
+            if other.dqx_data is not None and \
+                    result.dqx_data is not None:
+                result.dqx_data *= self.dqx_data
+                result.dqx_data += np.square(other.dqx_data)
+                result.dqx_data /= 2
+                np.sqrt(result.dqx_data, out=result.dqx_data)
+            if other.dqy_data is not None and \
+                    result.dqy_data is not None:
+                result.dqy_data *= self.dqy_data
+                result.dqy_data += np.square(other.dqy_data)
+                result.dqy_data /= 2
+                np.sqrt(result.dqy_data, out=result.dqy_data)
+        else:
+            b = other
+        output = operation(a, b)
+        result.data[:] = output.x
+        result.err_data[:] = np.sqrt(np.fabs(output.variance))
         return result
 
     def _validity_check_union(self, other):
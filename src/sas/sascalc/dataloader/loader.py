@@ -22,6 +22,7 @@
 
 import os
 import sys
+import codecs
 import logging
 import time
 from zipfile import ZipFile
@@ -35,9 +36,60 @@ from .loader_exceptions import NoKnownLoaderException, FileContentsException,\
 from .readers import ascii_reader
 from .readers import cansas_reader
 from .readers import cansas_reader_HDF5
+from .readers import red2d_reader
 
 logger = logging.getLogger(__name__)
 
+# Number of bytes read at the start of a file to guess its format
+SNIFF_SIZE = 4096
+# Signature of HDF5 files, at the start of the file or after a user block
+HDF5_SIGNATURE = b'\x89HDF\r\n\x1a\n'
+
+
+def guess_reader(path):
+    """
+    Guess which of the default readers can load a file from the first
+    bytes of its contents.
+
+    :param path: file path
+    :return: reader module, or None if the contents are not recognized
+    """
+    try:
+        with open(path, 'rb') as f_open:
+            head = f_open.read(SNIFF_SIZE)
+    except (IOError, OSError):
+        return None
+    # The user block before the HDF5 signature is 0, 512, 1024, ... bytes
+    offset = 0
+    while offset < len(head):
+        if head[offset:offset + len(HDF5_SIGNATURE)] == HDF5_SIGNATURE:
+            return cansas_reader_HDF5
+        offset = 2 * offset if offset else 512
+    if b'\0' in head:
+        return None
+    text = head[len(codecs.BOM_UTF8):] if head.startswith(codecs.BOM_UTF8) \
+        else head
+    text = text.lstrip()
+    if text.startswith(b'<?xml') or text.startswith(b'<SASroot'):
+        return cansas_reader
+    # IGOR 2D Q map header
+    if b'ASCII data' in head:
+        return red2d_reader
+    lines = head.splitlines()
+    if len(head) == SNIFF_SIZE:
+        # The last line may be cut
+        lines = lines[:-1]
+    for line in lines:
+        toks = line.replace(b',', b' ').split()
+        if len(toks) < 2:
+            continue
+        try:
+            [float(tok) for tok in toks]
+        except ValueError:
+            continue
+        return ascii_reader
+    return None
+
 
 class Registry(ExtensionRegistry):
     """
@@ -69,7 +121,9 @@ class Registry(ExtensionRegistry):
         :param debug: when True, print the traceback for each loader that fails
 
         Defaults to the ascii (multi-column), cansas XML, and cansas NeXuS
-        readers if no reader was registered for the file's extension.
+        readers if no reader was registered for the file's extension. Those
+        which cannot read the contents of the file, as found by guess_reader,
+        are skipped.
         """
         import traceback
 
@@ -91,38 +145,56 @@ class Registry(ExtensionRegistry):
             pass
 
         # File has no associated reader, or the associated reader failed.
+        # Skip the default readers which cannot load its contents
+        guess = guess_reader(path)
+
+        # IGOR 2D files are only read by the red2d reader, whatever their
+        # extension; the usual readers are tried if it fails
+        if guess is red2d_reader \
+                and os.path.splitext(path)[1] not in red2d_reader.Reader.ext:
+            try:
+                red2d_loader = red2d_reader.Reader()
+                red2d_loader.allow_all = True
+                output = red2d_loader.read(path)
+                if output:
+                    return output
+            except Exception:
+                if debug: traceback.print_exc()
+
         # Try the ASCII reader
-        try:
-            ascii_loader = ascii_reader.Reader()
-            return ascii_loader.read(path)
-        except NoKnownLoaderException:
-            if debug: traceback.print_exc()
-            pass  # Try the Cansas XML reader
-        except DefaultReaderException:
-            if debug: traceback.print_exc()
-            pass  # Loader specific error to try the cansas XML reader
-        except FileContentsException as e:
-            if debug: traceback.print_exc()
-            if msg_from_reader is None:
-                raise RuntimeError(e.message)
+        if guess not in (cansas_reader, cansas_reader_HDF5):
+            try:
+                ascii_loader = ascii_reader.Reader()
+                return ascii_loader.read(path)
+            except NoKnownLoaderException:
+                if debug: traceback.print_exc()
+                pass  # Try the Cansas XML reader
+            except DefaultReaderException:
+                if debug: traceback.print_exc()
+                pass  # Loader specific error to try the cansas XML reader
+            except FileContentsException as e:
+                if debug: traceback.print_exc()
+                if msg_from_reader is None:
+                    raise RuntimeError(e.message)
 
         # ASCII reader failed - try CanSAS xML reader
-        try:
-            cansas_loader = cansas_reader.Reader()
-            return cansas_loader.read(path)
-        except NoKnownLoaderException:
-            if debug: traceback.print_exc()
-            pass  # Try the NXcanSAS reader
-        except DefaultReaderException:
-            if debug: traceback.print_exc()
-            pass  # Loader specific error to try the NXcanSAS reader
-        except FileContentsException as e:
-            if debug: traceback.print_exc()
-            if msg_from_reader is None:
-                raise RuntimeError(e.message)
-        except Exception:
-            if debug: traceback.print_exc()
-            pass
+        if guess is not cansas_reader_HDF5:
+            try:
+                cansas_loader = cansas_reader.Reader()
+                return cansas_loader.read(path)
+            except NoKnownLoaderException:
+                if debug: traceback.print_exc()
+                pass  # Try the NXcanSAS reader
+            except DefaultReaderException:
+                if debug: traceback.print_exc()
+                pass  # Loader specific error to try the NXcanSAS reader
+            except FileContentsException as e:
+                if debug: traceback.print_exc()
+                if msg_from_reader is None:
+                    raise RuntimeError(e.message)
+            except Exception:
+                if debug: traceback.print_exc()
+                pass
 
         # CanSAS XML reader failed - try NXcanSAS reader
         try:
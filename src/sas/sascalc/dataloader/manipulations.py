@@ -220,9 +220,9 @@ def get_dq_data(data2D):
     # Final protection of dq
     if dq_overlap < 0:
         dq_overlap = dqy_at_z_min
-    dqx_data = data2D.dqx_data[np.isfinite(data2D.data)]
-    dqy_data = data2D.dqy_data[np.isfinite(
-        data2D.data)] - dq_overlap
+    finite = data2D.get_geometry().finite
+    dqx_data = data2D.dqx_data[finite]
+    dqy_data = data2D.dqy_data[finite] - dq_overlap
     # def; dqx_data = dq_r dqy_data = dq_phi
     # Convert dq 2D to 1D here
     dq_data = np.sqrt(dqx_data**2 + dqx_data**2)
@@ -290,15 +290,65 @@ class Binning(object):
         '''
         The general formula logarithm binning is:
         bin = floor(N * (log(x) - log(min)) / (log(max) - log(min)))
+
+        :param value: value, or array of values, to bin
+        :return: bin index, or array of bin indices
         '''
         if self.base:
-            temp_x = self.n_bins * (math.log(value, self.base) - math.log(self.min, self.base))
+            log_base = math.log(self.base)
+            temp_x = self.n_bins * (np.log(value) / log_base - math.log(self.min, self.base))
             temp_y = math.log(self.max, self.base) - math.log(self.min, self.base)
         else:
             temp_x = self.n_bins * (value - self.min)
             temp_y = self.max - self.min
         # Bin index calulation
-        return int(math.floor(temp_x / temp_y))
+        i_bin = np.floor(temp_x / temp_y)
+        if np.ndim(i_bin) == 0:
+            return int(i_bin)
+        return i_bin.astype(int)
+
+
+def _bin_sums(bin_index, nbins, data, err_data, q_data=None, dq_data=None):
+    """
+    Accumulate, in a single pass over the points, the per-bin sums used
+    by the averaging classes.
+
+    The sums are built with np.bincount, which adds the points in the
+    same order as a loop over the data would, so the results match a
+    point-by-point accumulation exactly.
+
+    :param bin_index: bin index of each point included in the average
+    :param nbins: number of bins
+    :param data: intensity of each point
+    :param err_data: uncertainty on the intensity of each point
+    :param q_data: q-value of each point, or None
+    :param dq_data: q resolution of each point, or None
+    :return: sum of intensities, sum of variances, sum of q-values,
+        sum of q resolutions and number of points in each bin; the sums
+        of q-values and q resolutions are None when not requested
+    """
+    # Points falling outside the bins do not contribute
+    in_bins = (bin_index >= 0) & (bin_index < nbins)
+    if not in_bins.all():
+        bin_index = bin_index[in_bins]
+        data = data[in_bins]
+        err_data = err_data[in_bins]
+        q_data = None if q_data is None else q_data[in_bins]
+        dq_data = None if dq_data is None else dq_data[in_bins]
+
+    # Points without uncertainty use |I| as their variance
+    variance = np.where(err_data == 0.0, np.fabs(data), err_data * err_data)
+
+    y = np.bincount(bin_index, weights=data, minlength=nbins)
+    err_y = np.bincount(bin_index, weights=variance, minlength=nbins)
+    counts = np.bincount(bin_index, minlength=nbins).astype(float)
+    x = None
+    if q_data is not None:
+        x = np.bincount(bin_index, weights=q_data, minlength=nbins)
+    err_x = None
+    if dq_data is not None:
+        err_x = np.bincount(bin_index, weights=dq_data, minlength=nbins)
+    return y, err_y, x, err_x, counts
 
 
 ################################################################################
@@ -343,10 +393,11 @@ class _Slab(object):
             raise RuntimeError(msg)
 
         # Get data
-        data = data2D.data[np.isfinite(data2D.data)]
-        err_data = data2D.err_data[np.isfinite(data2D.data)]
-        qx_data = data2D.qx_data[np.isfinite(data2D.data)]
-        qy_data = data2D.qy_data[np.isfinite(data2D.data)]
+        finite = data2D.get_geometry().finite
+        data = data2D.data[finite]
+        err_data = data2D.err_data[finite]
+        qx_data = data2D.qx_data[finite]
+        qy_data = data2D.qy_data[finite]
 
         # Build array of Q intervals
         if maj == 'x':
@@ -502,10 +553,11 @@ class Boxsum(object):
             msg += "of detectors: %g" % len(data2D.detector)
             raise RuntimeError(msg)
         # Get data
-        data = data2D.data[np.isfinite(data2D.data)]
-        err_data = data2D.err_data[np.isfinite(data2D.data)]
-        qx_data = data2D.qx_data[np.isfinite(data2D.data)]
-        qy_data = data2D.qy_data[np.isfinite(data2D.data)]
+        finite = data2D.get_geometry().finite
+        data = data2D.data[finite]
+        err_data = data2D.err_data[finite]
+        qx_data = data2D.qx_data[finite]
+        qy_data = data2D.qy_data[finite]
 
         y = 0.0
         err_y = 0.0
@@ -592,10 +644,12 @@ class CircularAverage(object):
         :return: Data1D object
         """
         # Get data W/ finite values
-        data = data2D.data[np.isfinite(data2D.data)]
-        q_data = data2D.q_data[np.isfinite(data2D.data)]
-        err_data = data2D.err_data[np.isfinite(data2D.data)]
-        mask_data = data2D.mask[np.isfinite(data2D.data)]
+        geometry = data2D.get_geometry()
+        finite = geometry.finite
+        data = data2D.data[finite]
+        q_data = data2D.q_data[finite]
+        err_data = data2D.err_data[finite]
+        mask_data = data2D.mask[finite]
 
         dq_data = None
         if data2D.dqx_data is not None and data2D.dqy_data is not None:
@@ -605,70 +659,38 @@ class CircularAverage(object):
             msg = "Circular averaging: invalid q_data: %g" % data2D.q_data
             raise RuntimeError(msg)
 
+        if self.r_min >= self.r_max:
+            raise ValueError("Limit Error: min > max")
+
         # Build array of Q intervals
         nbins = int(math.ceil((self.r_max - self.r_min) / self.bin_width))
 
-        x = np.zeros(nbins)
-        y = np.zeros(nbins)
-        err_y = np.zeros(nbins)
-        err_x = np.zeros(nbins)
-        y_counts = np.zeros(nbins)
-
-        for npt in range(len(data)):
-
-            if ismask and not mask_data[npt]:
-                continue
-
-            frac = 0
-
-            # q-value at the pixel (j,i)
-            q_value = q_data[npt]
-            data_n = data[npt]
-
-            # No need to calculate the frac when all data are within range
-            if self.r_min >= self.r_max:
-                raise ValueError("Limit Error: min > max")
-
-            if self.r_min <= q_value and q_value <= self.r_max:
-                frac = 1
-            if frac == 0:
-                continue
-            i_q = int(math.floor((q_value - self.r_min) / self.bin_width))
-
-            # Take care of the edge case at phi = 2pi.
-            if i_q == nbins:
-                i_q = nbins - 1
-            y[i_q] += frac * data_n
-            # Take dqs from data to get the q_average
-            x[i_q] += frac * q_value
-            if err_data is None or err_data[npt] == 0.0:
-                if data_n < 0:
-                    data_n = -data_n
-                err_y[i_q] += frac * frac * data_n
-            else:
-                err_y[i_q] += frac * frac * err_data[npt] * err_data[npt]
-            if dq_data is not None:
-                # To be consistent with dq calculation in 1d reduction,
-                # we need just the averages (not quadratures) because
-                # it should not depend on the number of the q points
-                # in the qr bins.
-                err_x[i_q] += frac * dq_data[npt]
-            else:
-                err_x = None
-            y_counts[i_q] += frac
+        # Select the points within the q range
+        in_range = geometry.finite_q_data_index.mask(self.r_min, self.r_max)
+        if ismask:
+            in_range &= mask_data.astype(bool)
+        q_value = q_data[in_range]
+        i_q = np.floor((q_value - self.r_min) / self.bin_width).astype(int)
+        # Take care of the edge case at q = r_max.
+        i_q[i_q == nbins] = nbins - 1
+
+        if dq_data is not None:
+            dq_data = dq_data[in_range]
+        # To be consistent with dq calculation in 1d reduction,
+        # we need just the averages (not quadratures) because
+        # it should not depend on the number of the q points
+        # in the qr bins.
+        y, err_y, x, err_x, y_counts = _bin_sums(i_q, nbins, data[in_range],
+                                                 err_data[in_range],
+                                                 q_data=q_value,
+                                                 dq_data=dq_data)
 
         # Average the sums
-        for n in range(nbins):
-            if err_y[n] < 0:
-                err_y[n] = -err_y[n]
-            err_y[n] = math.sqrt(err_y[n])
-            # if err_x is not None:
-            #    err_x[n] = math.sqrt(err_x[n])
-
-        err_y = err_y / y_counts
-        err_y[err_y == 0] = np.average(err_y)
-        y = y / y_counts
-        x = x / y_counts
+        with np.errstate(divide='ignore', invalid='ignore'):
+            err_y = np.sqrt(np.fabs(err_y)) / y_counts
+            err_y[err_y == 0] = np.average(err_y)
+            y = y / y_counts
+            x = x / y_counts
         idx = (np.isfinite(y)) & (np.isfinite(x))
 
         if err_x is not None:
@@ -725,56 +747,34 @@ class Ring(object):
         Pi = math.pi
 
         # Get data
-        data = data2D.data[np.isfinite(data2D.data)]
-        q_data = data2D.q_data[np.isfinite(data2D.data)]
-        err_data = data2D.err_data[np.isfinite(data2D.data)]
-        qx_data = data2D.qx_data[np.isfinite(data2D.data)]
-        qy_data = data2D.qy_data[np.isfinite(data2D.data)]
-
-        # Set space for 1d outputs
-        phi_bins = np.zeros(self.nbins_phi)
-        phi_counts = np.zeros(self.nbins_phi)
-        phi_values = np.zeros(self.nbins_phi)
-        phi_err = np.zeros(self.nbins_phi)
+        geometry = data2D.get_geometry()
+        data = data2D.data[geometry.finite]
+        err_data = data2D.err_data[geometry.finite]
 
         # Shift to apply to calculated phi values in order
         # to center first bin at zero
         phi_shift = Pi / self.nbins_phi
 
-        for npt in range(len(data)):
-            frac = 0
-            # q-value at the point (npt)
-            q_value = q_data[npt]
-            data_n = data[npt]
+        # Select the points within the q range
+        in_range = geometry.finite_q_data_index.mask(self.r_min, self.r_max)
 
-            # phi-value at the point (npt)
-            phi_value = math.atan2(qy_data[npt], qx_data[npt]) + Pi
+        # phi-values of the selected points
+        phi_data = geometry.finite_phi[in_range] + Pi
 
-            if self.r_min <= q_value and q_value <= self.r_max:
-                frac = 1
-            if frac == 0:
-                continue
-            # binning
-            i_phi = int(math.floor((self.nbins_phi) *
-                                   (phi_value + phi_shift) / (2 * Pi)))
-
-            # Take care of the edge case at phi = 2pi.
-            if i_phi >= self.nbins_phi:
-                i_phi = 0
-            phi_bins[i_phi] += frac * data[npt]
-
-            if err_data is None or err_data[npt] == 0.0:
-                if data_n < 0:
-                    data_n = -data_n
-                phi_err[i_phi] += frac * frac * math.fabs(data_n)
-            else:
-                phi_err[i_phi] += frac * frac * err_data[npt] * err_data[npt]
-            phi_counts[i_phi] += frac
+        # binning
+        i_phi = np.floor((self.nbins_phi) *
+                         (phi_data + phi_shift) / (2 * Pi)).astype(int)
+        # Take care of the edge case at phi = 2pi.
+        i_phi[i_phi >= self.nbins_phi] = 0
+
+        phi_bins, phi_err, _, _, phi_counts = _bin_sums(i_phi, self.nbins_phi,
+                                                        data[in_range],
+                                                        err_data[in_range])
 
-        for i in range(self.nbins_phi):
-            phi_bins[i] = phi_bins[i] / phi_counts[i]
-            phi_err[i] = math.sqrt(phi_err[i]) / phi_counts[i]
-            phi_values[i] = 2.0 * math.pi / self.nbins_phi * (1.0 * i)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            phi_bins = phi_bins / phi_counts
+            phi_err = np.sqrt(phi_err) / phi_counts
+        phi_values = 2.0 * math.pi / self.nbins_phi * np.arange(self.nbins_phi)
 
         idx = (np.isfinite(phi_bins))
 
@@ -826,23 +826,15 @@ class _Sector(object):
             raise RuntimeError("Ring averaging only take plottable_2D objects")
 
         # Get the all data & info
-        data = data2D.data[np.isfinite(data2D.data)]
-        q_data = data2D.q_data[np.isfinite(data2D.data)]
-        err_data = data2D.err_data[np.isfinite(data2D.data)]
-        qx_data = data2D.qx_data[np.isfinite(data2D.data)]
-        qy_data = data2D.qy_data[np.isfinite(data2D.data)]
+        geometry = data2D.get_geometry()
+        data = data2D.data[geometry.finite]
+        q_data = data2D.q_data[geometry.finite]
+        err_data = data2D.err_data[geometry.finite]
 
         dq_data = None
         if data2D.dqx_data is not None and data2D.dqy_data is not None:
             dq_data = get_dq_data(data2D)
 
-        # set space for 1d outputs
-        x = np.zeros(self.nbins)
-        y = np.zeros(self.nbins)
-        y_err = np.zeros(self.nbins)
-        x_err = np.zeros(self.nbins)
-        y_counts = np.zeros(self.nbins)  # Cycle counts (for the mean)
-
         # Get the min and max into the region: 0 <= phi < 2Pi
         phi_min = flip_phi(self.phi_min)
         phi_max = flip_phi(self.phi_max)
@@ -853,78 +845,57 @@ class _Sector(object):
         else:
             binning = Binning(self.r_min, self.r_max, self.nbins, self.base)
 
-        for n in range(len(data)):
-
-            # q-value at the pixel (j,i)
-            q_value = q_data[n]
-            data_n = data[n]
-
-            # Is pixel within range?
-            is_in = False
-
-            # phi-value of the pixel (j,i)
-            phi_value = math.atan2(qy_data[n], qx_data[n]) + math.pi
-
-            # No need to calculate: data outside of the radius
-            if self.r_min > q_value or q_value > self.r_max:
-                continue
-
-            # In case of two ROIs (symmetric major and minor regions)(for 'q2')
-            if run.lower() == 'q2':
-                # For minor sector wing
-                # Calculate the minor wing phis
-                phi_min_minor = flip_phi(phi_min - math.pi)
-                phi_max_minor = flip_phi(phi_max - math.pi)
-                # Check if phis of the minor ring is within 0 to 2pi
-                if phi_min_minor > phi_max_minor:
-                    is_in = (phi_value > phi_min_minor or
-                             phi_value < phi_max_minor)
-                else:
-                    is_in = (phi_value > phi_min_minor and
-                             phi_value < phi_max_minor)
-
-            # For all cases(i.e.,for 'q', 'q2', and 'phi')
-            # Find pixels within ROI
-            if phi_min > phi_max:
-                is_in = is_in or (phi_value > phi_min or
-                                  phi_value < phi_max)
+        # phi-values of the pixels
+        phi_data = geometry.finite_phi + math.pi
+
+        # In case of two ROIs (symmetric major and minor regions)(for 'q2')
+        if run.lower() == 'q2':
+            # For minor sector wing
+            # Calculate the minor wing phis
+            phi_min_minor = flip_phi(phi_min - math.pi)
+            phi_max_minor = flip_phi(phi_max - math.pi)
+            # Check if phis of the minor ring is within 0 to 2pi
+            if phi_min_minor > phi_max_minor:
+                is_in = ((phi_data > phi_min_minor) |
+                         (phi_data < phi_max_minor))
             else:
-                is_in = is_in or (phi_value >= phi_min and
-                                  phi_value < phi_max)
+                is_in = ((phi_data > phi_min_minor) &
+                         (phi_data < phi_max_minor))
+        else:
+            is_in = np.zeros(len(data), dtype=bool)
 
-            # data oustide of the phi range
-            if not is_in:
-                continue
+        # For all cases(i.e.,for 'q', 'q2', and 'phi')
+        # Find pixels within ROI
+        if phi_min > phi_max:
+            is_in |= (phi_data > phi_min) | (phi_data < phi_max)
+        else:
+            is_in |= (phi_data >= phi_min) & (phi_data < phi_max)
 
-            # Get the binning index
-            if run.lower() == 'phi':
-                i_bin = binning.get_bin_index(phi_value)
-            else:
-                i_bin = binning.get_bin_index(q_value)
-
-            # Take care of the edge case at phi = 2pi.
-            if i_bin == self.nbins:
-                i_bin = self.nbins - 1
-
-            # Get the total y
-            y[i_bin] += data_n
-            x[i_bin] += q_value
-            if err_data[n] is None or err_data[n] == 0.0:
-                if data_n < 0:
-                    data_n = -data_n
-                y_err[i_bin] += data_n
-            else:
-                y_err[i_bin] += err_data[n]**2
-
-            if dq_data is not None:
-                # To be consistent with dq calculation in 1d reduction,
-                # we need just the averages (not quadratures) because
-                # it should not depend on the number of the q points
-                # in the qr bins.
-                x_err[i_bin] += dq_data[n]
-            else:
-                x_err = None
-            y_counts[i_bin] += 1
+        # Discard data outside of the radius or of the phi range
+        is_in &= geometry.finite_q_data_index.mask(self.r_min, self.r_max)
+
+        # Get the binning index
+        if run.lower() == 'phi':
+            i_bin = binning.get_bin_index(phi_data[is_in])
+        else:
+            i_bin = binning.get_bin_index(q_data[is_in])
+
+        # Take care of the edge case at phi = 2pi.
+        i_bin[i_bin == self.nbins] = self.nbins - 1
+        # Values just below the lower limit of the binning wrap around
+        # to the last bin
+        i_bin[i_bin < 0] += self.nbins
+
+        if dq_data is not None:
+            dq_data = dq_data[is_in]
+        # To be consistent with dq calculation in 1d reduction,
+        # we need just the averages (not quadratures) because
+        # it should not depend on the number of the q points
+        # in the qr bins.
+        y, y_err, x, x_err, y_counts = _bin_sums(i_bin, self.nbins,
+                                                 data[is_in], err_data[is_in],
+                                                 q_data=q_data[is_in],
+                                                 dq_data=dq_data)
 
         # Organize the results
         with np.errstate(divide='ignore', invalid='ignore'):
@@ -1035,13 +1006,8 @@ class Ringcut(object):
         if data2D.__class__.__name__ not in ["Data2D", "plottable_2D"]:
             raise RuntimeError("Ring cut only take plottable_2D objects")
 
-        # Get data
-        qx_data = data2D.qx_data
-        qy_data = data2D.qy_data
-        q_data = np.sqrt(qx_data * qx_data + qy_data * qy_data)
-
         # check whether or not the data point is inside ROI
-        out = (self.r_min <= q_data) & (self.r_max >= q_data)
+        out = data2D.get_geometry().q_index.mask(self.r_min, self.r_max)
         return out
 
 ################################################################################
@@ -1138,12 +1104,8 @@ class Sectorcut(object):
         if data2D.__class__.__name__ not in ["Data2D", "plottable_2D"]:
             raise RuntimeError("Sectorcut take only plottable_2D objects")
         Pi = math.pi
-        # Get data
-        qx_data = data2D.qx_data
-        qy_data = data2D.qy_data
-
         # get phi from data
-        phi_data = np.arctan2(qy_data, qx_data)
+        phi_data = data2D.get_geometry().phi
 
         # Get the min and max into the region: -pi <= phi < Pi
         phi_min_major = flip_phi(self.phi_min + Pi) - Pi
@@ -13,6 +13,9 @@
 #############################################################################
 
 import logging
+
+import numpy as np
+
 from sas.sascalc.dataloader.file_reader_base_class import FileReader
 from sas.sascalc.dataloader.data_info import DataInfo, plottable_1D
 from sas.sascalc.dataloader.loader_exceptions import FileContentsException,\
@@ -20,6 +23,10 @@ from sas.sascalc.dataloader.loader_exceptions import FileContentsException,\
 
 logger = logging.getLogger(__name__)
 
+# ASCII characters on which str.split() splits
+_WHITESPACE = np.zeros(256, dtype=bool)
+_WHITESPACE[[ord(char) for char in " \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"]] = True
+
 
 class Reader(FileReader):
     """
@@ -68,7 +75,7 @@ class Reader(FileReader):
         line_no = 0
         # minimum required number of columns of data
         lentoks = 2
-        for line in lines:
+        for index, line in enumerate(lines):
             toks = self.splitline(line.strip())
             # To remember the number of columns in the current line of data
             new_lentoks = len(toks)
@@ -116,6 +123,20 @@ class Reader(FileReader):
                 # for the next line of data
                 lentoks = new_lentoks
                 line_no += 1
+
+                # Once the data block is found, read the rest of it at once
+                if is_data and candidate_lines == self.min_data_pts:
+                    block = self.read_data_block(lines[index:], lentoks)
+                    if block is not None:
+                        start = candidate_lines - 1
+                        end = start + len(block)
+                        self.current_dataset.x[start:end] = block[:, 0]
+                        self.current_dataset.y[start:end] = block[:, 1]
+                        if lentoks > 2:
+                            self.current_dataset.dy[start:end] = block[:, 2]
+                        if lentoks > 3:
+                            self.current_dataset.dx[start:end] = block[:, 3]
+                        break
             except ValueError:
                 # ValueError is raised when non numeric strings conv. to float
                 # It is data and meet non - number, then stop reading
@@ -161,3 +182,74 @@ class Reader(FileReader):
         # Store loading process information
         self.current_datainfo.meta_data['loader'] = self.type_name
         self.send_to_output()
+
+    def read_data_block(self, lines, lentoks):
+        """
+        Convert the lines of a data block in a single call.
+
+        The block ends at the first line which is neither blank nor has
+        lentoks columns, as for the line by line parser. Files for which
+        that parser could behave differently, such as with mixed delimiters
+        or non-numeric values in the block, are left to it.
+
+        :param lines: lines of the file, starting with a line of data
+        :param lentoks: number of columns of the data
+        :return: array of the values with one row per data line, or None
+            if the lines have to be parsed one by one
+        """
+        if lentoks < 2:
+            return None
+        # Use the delimiter that splitline() finds in the first line
+        if len(lines[0].split(',')) > 1:
+            delimiter, others = ',', ''
+        elif len(lines[0].split(';')) > 1:
+            delimiter, others = ';', ','
+        else:
+            delimiter, others = None, ',;'
+        text = "\n".join(lines)
+        try:
+            chars = np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+        except ValueError:
+            # Leave the unicode whitespace to str.split()
+            return None
+        # Count the tokens of each line as str.split(delimiter) would
+        newlines = np.flatnonzero(chars == ord("\n"))
+        if delimiter is None:
+            is_token = ~_WHITESPACE[chars]
+            starts = is_token[1:] > is_token[:-1]
+            tokens = np.flatnonzero(starts) + 1
+            if is_token[0]:
+                tokens = np.hstack(([0], tokens))
+        else:
+            tokens = np.flatnonzero(chars == ord(delimiter))
+        bounds = np.searchsorted(tokens, newlines)
+        counts = np.diff(np.hstack(([0], bounds, [len(tokens)])))
+        if delimiter is not None:
+            counts += 1
+        end = len(lines)
+        skipped = []
+        for k in np.flatnonzero(counts != lentoks):
+            new_lentoks = len(self.splitline(lines[k].strip()))
+            if new_lentoks == 0:
+                # Blank lines within the data are skipped
+                skipped.append(k)
+            elif new_lentoks == lentoks:
+                return None
+            else:
+                # Footer
+                end = k
+                break
+        if end < len(lines):
+            text = text[:newlines[end - 1]]
+        if skipped and delimiter is not None:
+            skipped = set(skipped)
+            text = "\n".join(lines[k] for k in range(end) if k not in skipped)
+        if any(char in text for char in others):
+            return None
+        if delimiter is not None:
+            text = text.replace("\n", delimiter)
+        try:
+            values = np.array(text.split(delimiter), dtype=float)
+        except ValueError:
+            return None
+        return values.reshape(end - len(skipped), lentoks)
@@ -7,10 +7,11 @@ import numpy as np
 import re
 import os
 import sys
+import copy
 
 from ..data_info import plottable_1D, plottable_2D,\
     Data1D, Data2D, DataInfo, Process, Aperture, Collimation, \
-    TransmissionSpectrum, Detector
+    TransmissionSpectrum, Detector, combine_data_info_with_plottable
 from ..loader_exceptions import FileContentsException, DefaultReaderException
 from ..file_reader_base_class import FileReader, decode
 
@@ -31,6 +32,56 @@ def h5attr(node, key, default=None):
         return decode(value)
 
 
+def _read_flat(data_set):
+    """
+    Read a whole h5py Dataset as a 1D array, without copying it again.
+    """
+    return np.ravel(data_set[()])
+
+
+class FrameLoader(object):
+    """
+    Frames of a multi-frame 1D SASdata group, each read from the file only
+    when it is needed.
+    """
+    def __init__(self, dataset, filename, i_name, di_name=None):
+        """
+        :param dataset: plottable_1D with the Q values and units of the frames
+        :param filename: path of the HDF5 file
+        :param i_name: path of the intensity frames in the file
+        :param di_name: path of the uncertainty frames in the file, or None
+        """
+        self.dataset = dataset
+        self.filename = filename
+        self.i_name = i_name
+        self.di_name = di_name
+        ## DataInfo of the SASentry holding the frames
+        self.datainfo = None
+
+    def iter_frames(self, raw_data):
+        """
+        Generate a plottable_1D for each frame, read from an open h5py File
+        """
+        intensity = raw_data[self.i_name]
+        uncertainty = None
+        if self.di_name is not None:
+            uncertainty = raw_data[self.di_name]
+        for index in range(len(intensity)):
+            frame = copy.copy(self.dataset)
+            frame.y = np.ravel(intensity[index])
+            if uncertainty is not None and len(uncertainty) > index:
+                frame.dy = np.ravel(uncertainty[index])
+            yield frame
+
+    def __iter__(self):
+        """
+        Generate a Data1D for each frame, with the file open while iterating
+        """
+        with h5py.File(self.filename, 'r') as raw_data:
+            for frame in self.iter_frames(raw_data):
+                yield combine_data_info_with_plottable(frame, self.datainfo)
+
+
 class Reader(FileReader):
     """
     A class for reading in NXcanSAS data files. The current implementation has
@@ -59,6 +110,13 @@ class Reader(FileReader):
     # Flag to bypass extension check
     allow_all = True
 
+    def __init__(self):
+        super(Reader, self).__init__()
+        # Whether the frames of multi-frame 1D data are left in the file
+        self.lazy_frames = False
+        # FrameLoader of each multi-frame 1D data set left in the file
+        self.frame_loaders = []
+
     def get_file_contents(self):
         """
         This is the general read method that all SasView data_loaders must have.
@@ -86,24 +144,60 @@ class Reader(FileReader):
                         msg = "NXcanSAS Reader could not load file {}".format(
                             basename + extension)
                         raise DefaultReaderException(msg)
-                    raise FileContentsException(e.message)
+                    raise FileContentsException(str(e))
                 try:
                     # Read in all child elements of top level SASroot
                     self.read_children(self.raw_data, [])
                     # Add the last data set to the list of outputs
                     self.add_data_set()
                 except Exception as exc:
-                    raise FileContentsException(exc.message)
+                    raise FileContentsException(str(exc))
                 finally:
                     # Close the data file
                     self.raw_data.close()
 
                 for data_set in self.output:
-                    if isinstance(data_set, Data1D):
-                        if data_set.x.size < 5:
-                            exception = FileContentsException(
-                                "Fewer than 5 data points found.")
-                            data_set.errors.append(exception)
+                    self._check_size(data_set)
+
+    def read_frames(self, filepath):
+        """
+        Generate the data sets of a file one at a time. The frames of
+        multi-frame 1D data are read from the file only as they are
+        requested, so that files with many frames can be processed with
+        the memory of a single frame, after the other data sets.
+
+        :param filepath: The full or relative path to a file to be loaded
+        :return: iterator over Data1D/2D objects
+        """
+        self.lazy_frames = True
+        self.frame_loaders = []
+        try:
+            output = self.read(filepath)
+            frame_loaders, self.frame_loaders = self.frame_loaders, []
+        finally:
+            self.lazy_frames = False
+        for data_set in output:
+            yield data_set
+        for loader in frame_loaders:
+            for data_set in loader:
+                self._check_size(data_set)
+                # Convert and sort the frame as read() does its output
+                self.output = [data_set]
+                self.convert_data_units()
+                self.sort_data()
+                self.output = []
+                yield data_set
+
+    @staticmethod
+    def _check_size(data_set):
+        """
+        Add an error to 1D data sets with too few points
+        """
+        if isinstance(data_set, Data1D):
+            if data_set.x.size < 5:
+                exception = FileContentsException(
+                    "Fewer than 5 data points found.")
+                data_set.errors.append(exception)
 
     def reset_state(self):
         """
@@ -174,9 +268,22 @@ class Reader(FileReader):
                 parent_list.remove(key)
 
             elif isinstance(value, h5py.Dataset):
-                # If this is a dataset, store the data appropriately
-                data_set = value.value
                 unit = self._get_unit(value)
+                # SASdata arrays are read by the processors as needed, and
+                # one frame at a time for multi-frame data
+                if (self.parent_class == u'SASdata'
+                        and key not in (u'definition', u'run', u'title',
+                                        u'SASnote')):
+                    if isinstance(self.current_dataset, plottable_2D):
+                        self.process_2d_data_object(value, key, unit)
+                    else:
+                        self.process_1d_data_object(value, key, unit)
+                    continue
+                # If this is a dataset, store the data appropriately
+                data_set = value[()]
+                if isinstance(data_set, bytes):
+                    # Scalar strings are read as bytes from h5py 3
+                    data_set = decode(data_set)
 
                 for data_point in data_set:
                     if isinstance(data_point, np.ndarray):
@@ -239,13 +346,6 @@ class Reader(FileReader):
                     elif self.parent_class == u'SASsource':
                         self.process_source(data_point, key, unit)
                     # Everything else goes in meta_data
-                    elif self.parent_class == u'SASdata':
-                        if isinstance(self.current_dataset, plottable_2D):
-                            self.process_2d_data_object(data_set, key, unit)
-                        else:
-                            self.process_1d_data_object(data_set, key, unit)
-
-                        break
                     elif self.parent_class == u'SAStransmission_spectrum':
                         self.process_trans_spectrum(data_set, key)
                         break
@@ -261,55 +361,61 @@ class Reader(FileReader):
     def process_1d_data_object(self, data_set, key, unit):
         """
         SASdata processor method for 1d data items
-        :param data_set: data from HDF5 file
+        :param data_set: h5py Dataset from HDF5 file
         :param key: canSAS_class attribute
         :param unit: unit attribute
         """
         if key == self.i_name:
             if self.multi_frame:
-                for x in range(0, data_set.shape[0]):
-                    self.data_frames.append(data_set[x].flatten())
+                # The frames are read by add_intermediate
+                self.data_frames = data_set
             else:
-                self.current_dataset.y = data_set.flatten()
-                self.current_dataset.yaxis("Intensity", unit)
+                self.current_dataset.y = _read_flat(data_set)
+            self.current_dataset.yaxis("Intensity", unit)
         elif key == self.i_uncertainties_name:
             if self.multi_frame:
-                for x in range(0, data_set.shape[0]):
-                    self.data_uncertainty_frames.append(data_set[x].flatten())
-            self.current_dataset.dy = data_set.flatten()
+                self.data_uncertainty_frames = data_set
+            else:
+                self.current_dataset.dy = _read_flat(data_set)
         elif key in self.q_names:
             self.current_dataset.xaxis("Q", unit)
-            self.current_dataset.x = data_set.flatten()
+            self.current_dataset.x = _read_flat(data_set)
         elif key in self.q_resolution_names:
             if (len(self.q_resolution_names) > 1
                     and np.where(self.q_resolution_names == key)[0] == 0):
-                self.current_dataset.dxw = data_set.flatten()
+                self.current_dataset.dxw = _read_flat(data_set)
             elif (len(self.q_resolution_names) > 1
                   and np.where(self.q_resolution_names == key)[0] == 1):
-                self.current_dataset.dxl = data_set.flatten()
+                self.current_dataset.dxl = _read_flat(data_set)
             else:
-                self.current_dataset.dx = data_set.flatten()
+                self.current_dataset.dx = _read_flat(data_set)
         elif key in self.q_uncertainty_names:
             if (len(self.q_uncertainty_names) > 1
                     and np.where(self.q_uncertainty_names == key)[0] == 0):
-                self.current_dataset.dxw = data_set.flatten()
+                self.current_dataset.dxw = _read_flat(data_set)
             elif (len(self.q_uncertainty_names) > 1
                   and np.where(self.q_uncertainty_names == key)[0] == 1):
-                self.current_dataset.dxl = data_set.flatten()
+                self.current_dataset.dxl = _read_flat(data_set)
             else:
-                self.current_dataset.dx = data_set.flatten()
+                self.current_dataset.dx = _read_flat(data_set)
         elif key == self.mask_name:
-            self.current_dataset.mask = data_set.flatten()
+            self.current_dataset.mask = _read_flat(data_set)
         elif key == u'wavelength':
             self.current_datainfo.source.wavelength = data_set[0]
             self.current_datainfo.source.wavelength_unit = unit
 
     def process_2d_data_object(self, data_set, key, unit):
+        """
+        SASdata processor method for 2d data items
+        :param data_set: h5py Dataset from HDF5 file
+        :param key: canSAS_class attribute
+        :param unit: unit attribute
+        """
         if key == self.i_name:
-            self.current_dataset.data = data_set
+            self.current_dataset.data = data_set[()]
             self.current_dataset.zaxis("Intensity", unit)
         elif key == self.i_uncertainties_name:
-            self.current_dataset.err_data = data_set.flatten()
+            self.current_dataset.err_data = _read_flat(data_set)
         elif key in self.q_names:
             self.current_dataset.xaxis("Q_x", unit)
             self.current_dataset.yaxis("Q_y", unit)
@@ -318,34 +424,34 @@ class Reader(FileReader):
                 self.current_dataset.qx_data = data_set[0]
                 self.current_dataset.qy_data = data_set[1]
             elif self.q_names.index(key) == 0:
-                self.current_dataset.qx_data = data_set
+                self.current_dataset.qx_data = data_set[()]
             elif self.q_names.index(key) == 1:
-                self.current_dataset.qy_data = data_set
+                self.current_dataset.qy_data = data_set[()]
         elif key in self.q_uncertainty_names or key in self.q_resolution_names:
             if ((self.q_uncertainty_names[0] == self.q_uncertainty_names[1]) or
                     (self.q_resolution_names[0] == self.q_resolution_names[1])):
                 # All q data in a single array
-                self.current_dataset.dqx_data = data_set[0].flatten()
-                self.current_dataset.dqy_data = data_set[1].flatten()
+                self.current_dataset.dqx_data = data_set[0].ravel()
+                self.current_dataset.dqy_data = data_set[1].ravel()
             elif (self.q_uncertainty_names.index(key) == 0 or
                   self.q_resolution_names.index(key) == 0):
-                self.current_dataset.dqx_data = data_set.flatten()
+                self.current_dataset.dqx_data = _read_flat(data_set)
             elif (self.q_uncertainty_names.index(key) == 1 or
                   self.q_resolution_names.index(key) == 1):
-                self.current_dataset.dqy_data = data_set.flatten()
+                self.current_dataset.dqy_data = _read_flat(data_set)
                 self.current_dataset.yaxis("Q_y", unit)
         elif key == self.mask_name:
-            self.current_dataset.mask = data_set.flatten()
+            self.current_dataset.mask = _read_flat(data_set)
         elif key == u'Qy':
             self.current_dataset.yaxis("Q_y", unit)
-            self.current_dataset.qy_data = data_set.flatten()
+            self.current_dataset.qy_data = _read_flat(data_set)
         elif key == u'Qydev':
-            self.current_dataset.dqy_data = data_set.flatten()
+            self.current_dataset.dqy_data = _read_flat(data_set)
         elif key == u'Qx':
             self.current_dataset.xaxis("Q_x", unit)
-            self.current_dataset.qx_data = data_set.flatten()
+            self.current_dataset.qx_data = _read_flat(data_set)
         elif key == u'Qxdev':
-            self.current_dataset.dqx_data = data_set.flatten()
+            self.current_dataset.dqx_data = _read_flat(data_set)
 
     def process_trans_spectrum(self, data_set, key):
         """
@@ -539,12 +645,21 @@ class Reader(FileReader):
                 self.data2d.append(self.current_dataset)
             elif isinstance(self.current_dataset, plottable_1D):
                 if self.multi_frame:
-                    for x in range(0, len(self.data_frames)):
-                        self.current_dataset.y = self.data_frames[x]
-                        if len(self.data_uncertainty_frames) > x:
-                            self.current_dataset.dy = \
-                                self.data_uncertainty_frames[x]
-                        self.data1d.append(self.current_dataset)
+                    if isinstance(self.data_frames, h5py.Dataset):
+                        loader = FrameLoader(
+                            self.current_dataset, self.raw_data.filename,
+                            self.data_frames.name,
+                            getattr(self.data_uncertainty_frames, 'name',
+                                    None))
+                        if self.lazy_frames:
+                            # The frames are read by read_frames()
+                            self.data1d.append(loader)
+                        else:
+                            # Read each frame in its own data set
+                            self.data1d.extend(
+                                loader.iter_frames(self.raw_data))
+                    self.data_frames = []
+                    self.data_uncertainty_frames = []
                 else:
                     self.data1d.append(self.current_dataset)
 
@@ -599,6 +714,10 @@ class Reader(FileReader):
             self.send_to_output()
 
         for dataset in self.data1d:
+            if isinstance(dataset, FrameLoader):
+                dataset.datainfo = self.current_datainfo
+                self.frame_loaders.append(dataset)
+                continue
             self.current_dataset = dataset
             self.send_to_output()
 
@@ -11,6 +11,7 @@
 import os
 import math
 import time
+import warnings
 
 import numpy as np
 
@@ -19,6 +20,7 @@ from sas.sascalc.data_util.nxsunit import Converter
 from ..data_info import plottable_2D, DataInfo, Detector
 from ..file_reader_base_class import FileReader
 from ..loader_exceptions import FileContentsException
+from .ascii_reader import _WHITESPACE
 
 
 def check_point(x_point):
@@ -32,6 +34,74 @@ def check_point(x_point):
         return 0
 
 
+def iter_lines(buf):
+    """
+    Generate the lines of buf, split on new lines, without splitting
+    the whole buffer at once
+
+    :param buf: file contents
+    :return: iterator over (offset, line) for each line, where offset is
+        the position of the start of the line in buf
+    """
+    start = 0
+    while True:
+        end = buf.find('\n', start)
+        if end < 0:
+            yield start, buf[start:]
+            return
+        yield start, buf[start:end]
+        start = end + 1
+
+
+def parse_block(block, size):
+    """
+    Convert a block of whitespace separated values into an array
+
+    The values are converted in a single pass. If the block contains
+    anything else than numbers, the values are converted one at a time
+    and the ones which are not numbers are set to zero.
+
+    :param block: text of the data block
+    :param size: expected number of values
+    :return: array of the values, or None if the block does not hold
+        size values
+    """
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        values = np.fromstring(block, dtype=float, sep=' ')
+    # numpy warns when it stops on a value which is not a number
+    if not caught and len(values) == size and count_tokens(block) == size:
+        return values
+    tokens = block.split()
+    if len(tokens) != size:
+        return None
+    return np.fromiter((check_point(token) for token in tokens),
+                       dtype=float, count=size)
+
+
+def count_tokens(block, chunk_size=2**22):
+    """
+    Count the whitespace separated tokens of block as str.split() would
+
+    :param block: text of the data block
+    :param chunk_size: number of characters counted at once
+    :return: number of tokens, or -1 if block is not ASCII text
+    """
+    try:
+        chars = np.frombuffer(block.encode('ascii'), dtype=np.uint8)
+    except ValueError:
+        # Leave the unicode whitespace to str.split()
+        return -1
+    count = 0
+    previous = False
+    for start in range(0, len(chars), chunk_size):
+        is_token = ~_WHITESPACE[chars[start:start + chunk_size]]
+        count += np.count_nonzero(is_token[1:] > is_token[:-1])
+        count += int(is_token[0] and not previous)
+        previous = is_token[-1]
+    return count
+
+
 class Reader(FileReader):
     """ Simple data reader for Igor data files """
     ## File type
@@ -80,10 +150,6 @@ class Reader(FileReader):
         data_started = False
 
         ## Defaults
-        lines = buf.split('\n')
-        x = []
-        y = []
-
         wavelength = None
         distance = None
         transmission = None
@@ -94,19 +160,11 @@ class Reader(FileReader):
         is_info = False
         is_center = False
 
-        # Remove the last lines before the for loop if the lines are empty
-        # to calculate the exact number of data points
-        count = 0
-        while (len(lines[len(lines) - (count + 1)].lstrip().rstrip()) < 1):
-            del lines[len(lines) - (count + 1)]
-            count = count + 1
-
         #Read Header and find the dimensions of 2D data
-        line_num = 0
+        data_offset = None
         # Old version NIST files: 0
         ver = 0
-        for line in lines:
-            line_num += 1
+        for offset, line in iter_lines(buf):
             ## Reading the header applies only to IGOR/NIST 2D q_map data files
             # Find setup info line
             if is_info:
@@ -167,44 +225,24 @@ class Reader(FileReader):
                     continue
                 # the number of columns must be stayed same
                 col_num = len(line_toks)
+                data_offset = offset
                 break
 
-        # Make numpy array to remove header lines using index
-        lines_array = np.array(lines)
-
-        # index for lines_array
-        lines_index = np.arange(len(lines))
+        if data_offset is None:
+            msg = "red2d_reader can't read this file: No data found."
+            raise FileContentsException(msg)
 
-        # get the data lines
-        data_lines = lines_array[lines_index >= (line_num - 1)]
+        # The data block, without the empty lines at the end of the file
+        data_block = buf[data_offset:].rstrip()
         # Now we get the total number of rows (i.e., # of data points)
-        row_num = len(data_lines)
-        # make it as list again to control the separators
-        data_list = " ".join(data_lines.tolist())
-        # split all data to one big list w/" "separator
-        data_list = data_list.split()
-
-        # Check if the size is consistent with data, otherwise
-        #try the tab(\t) separator
-        # (this may be removed once get the confidence
-        #the former working all cases).
-        if len(data_list) != (len(data_lines)) * col_num:
-            data_list = "\t".join(data_lines.tolist())
-            data_list = data_list.split()
-
-        # Change it(string) into float
-        #data_list = map(float,data_list)
-        data_list1 = list(map(check_point, data_list))
-
-        # numpy array form
-        data_array = np.array(data_list1)
+        row_num = data_block.count('\n') + 1
+        data_array = parse_block(data_block, row_num * col_num)
         # Redimesion based on the row_num and col_num,
         #otherwise raise an error.
-        try:
-            data_point = data_array.reshape(row_num, col_num).transpose()
-        except Exception:
+        if data_array is None:
             msg = "red2d_reader can't read this file: Incorrect number of data points provided."
             raise FileContentsException(msg)
+        data_point = data_array.reshape(row_num, col_num).transpose()
         ## Get the all data: Let's HARDcoding; Todo find better way
         # Defaults
         dqx_data = np.zeros(0)
@@ -4,11 +4,26 @@ import  copy
 #import logging
 import sys
 import math
+import traceback
+
 import numpy as np
 
+try:
+    from concurrent import futures
+except ImportError:
+    # CRUFT: python 2 without the futures backport fits batches serially
+    futures = None
+try:
+    import copyreg
+except ImportError:
+    # CRUFT: python 2
+    import copy_reg as copyreg
+
 from sas.sascalc.dataloader.data_info import Data1D
 from sas.sascalc.dataloader.data_info import Data2D
 _SMALLVALUE = 1.0e-10
+## Time [s] between checks for interrupts while waiting on batch fits
+POLL_INTERVAL = 0.05
 
 class FitHandler(object):
     """
@@ -158,6 +173,8 @@ class FitData1D(Data1D):
         self.smearer = smearer
         self._first_unsmeared_bin = None
         self._last_unsmeared_bin = None
+        # q values for a single evaluation of the theory, see _get_q_eval
+        self._q_eval = None
         # Check error bar; if no error bar found, set it constant(=1)
         # TODO: Should provide an option for users to set it like percent,
         # constant, or dy data
@@ -215,6 +232,7 @@ class FitData1D(Data1D):
         self.idx = self.idx & (self.dy != 0)
         self.idx_unsmeared = (self.x >= self._qmin_unsmeared) \
                             & (self.x <= self._qmax_unsmeared)
+        self._q_eval = None
 
     def get_fit_range(self):
         """
@@ -241,12 +259,23 @@ class FitData1D(Data1D):
         """
         # Compute theory data f(x)
         fx = np.zeros(len(self.x))
-        fx[self.idx_unsmeared] = fn(self.x[self.idx_unsmeared])
-
-        ## Smear theory data
-        if self.smearer is not None:
+        q_eval = self._get_q_eval()
+        if q_eval is not None:
+            # Evaluate the theory at the data points and at the points
+            # the smearer needs outside of the range in one call
+            q_calc, low, high = q_eval
+            iq_calc = fn(q_calc)
+            fx[self.idx_unsmeared] = iq_calc[low:high]
             fx = self.smearer(fx, self._first_unsmeared_bin,
-                              self._last_unsmeared_bin)
+                              self._last_unsmeared_bin,
+                              iq_calc[:low], iq_calc[high:])
+        else:
+            fx[self.idx_unsmeared] = fn(self.x[self.idx_unsmeared])
+
+            ## Smear theory data
+            if self.smearer is not None:
+                fx = self.smearer(fx, self._first_unsmeared_bin,
+                                  self._last_unsmeared_bin)
         ## Sanity check
         if np.size(self.dy) != np.size(fx):
             msg = "FitData1D: invalid error array "
@@ -262,6 +291,54 @@ class FitData1D(Data1D):
         """
         return []
 
+    def _get_q_eval(self):
+        """
+            Return the q values at which to evaluate the theory for
+            smeared residuals, as (q_calc, low, high), where the data bins
+            are q_calc[low:high] and the rest is needed by the smearer.
+            The same array is returned until the fit range or the smearer
+            changes.  None is returned if the smearer evaluates the model
+            itself.
+        """
+        get_q_outside = getattr(self.smearer, 'get_q_outside', None)
+        if get_q_outside is None or self._first_unsmeared_bin is None:
+            return None
+        key = (self.smearer, self._first_unsmeared_bin,
+               self._last_unsmeared_bin)
+        if self._q_eval is None or self._q_eval[0] != key:
+            q_low, q_high = get_q_outside(self._first_unsmeared_bin,
+                                          self._last_unsmeared_bin)
+            q_data = self.x[self.idx_unsmeared]
+            q_calc = np.hstack((q_low, q_data, q_high))
+            low, high = len(q_low), len(q_low) + len(q_data)
+            self._q_eval = key, (q_calc, low, high)
+        return self._q_eval[1]
+
+
+def is_centrosymmetric(model):
+    """
+    Check that I(q) = I(-q) can be assumed for a model, which is not the
+    case for oriented models or for magnetic models with a nonzero
+    magnetization.
+
+    The magnetic parameters are listed for every model with an sld, and
+    also appear in the orientation parameters, so the magnetic models are
+    decided from the values of their *_M0* parameters.
+
+    :param model: sas model
+    :return: True if the model may be evaluated once for q and -q
+    """
+    magnetic = getattr(model, 'magnetic_params', None)
+    orientation = getattr(model, 'orientation_params', None)
+    if magnetic is None or orientation is None:
+        return False
+    magnetic = set(magnetic)
+    magnetic.update([name + ".width" for name in magnetic])
+    if any(name not in magnetic for name in orientation):
+        return False
+    return all(model.getParam(name) == 0 for name in magnetic
+               if name.endswith('_M0'))
+
 
 class FitData2D(Data2D):
     """
@@ -278,6 +355,9 @@ class FitData2D(Data2D):
         self.smearer = None
         self.radius = 0
         self.res_err_data = []
+        # Evaluate the model once for each pair of points at q and -q,
+        # for models which are centrosymmetric; see is_centrosymmetric()
+        self.symmetric = False
         self.sas_data = sas_data2d
         self.set_data(sas_data2d)
 
@@ -289,6 +369,7 @@ class FitData2D(Data2D):
         self.err_data = sas_data2d.err_data
         self.qx_data = sas_data2d.qx_data
         self.qy_data = sas_data2d.qy_data
+        self.q_data = sas_data2d.q_data
         self.mask = sas_data2d.mask
 
         x_max = max(math.fabs(sas_data2d.xmin), math.fabs(sas_data2d.xmax))
@@ -306,12 +387,16 @@ class FitData2D(Data2D):
             self.res_err_data = copy.deepcopy(self.err_data)
         #self.res_err_data[self.res_err_data==0]=1
 
-        self.radius = np.sqrt(self.qx_data**2 + self.qy_data**2)
+        # Share the cached geometry of the data, so that the radius index
+        # is sorted once per data set rather than once per fit
+        geometry = sas_data2d.get_geometry()
+        self._geometry = geometry
+        self.radius = geometry.q
 
         # Note: mask = True: for MASK while mask = False for NOT to mask
-        self.idx = ((self.qmin <= self.radius) & (self.radius <= self.qmax))
+        self.idx = geometry.q_index.mask(self.qmin, self.qmax)
         self.idx &= self.mask
-        self.idx &= np.isfinite(self.data)
+        self.idx &= geometry.finite
         self.idx &= self.res_err_data != 0
         self.num_points = np.sum(self.idx)
 
@@ -336,10 +421,11 @@ class FitData2D(Data2D):
             self.qmin = qmin
         if qmax is not None:
             self.qmax = qmax
-        self.radius = np.sqrt(self.qx_data**2 + self.qy_data**2)
-        self.idx = ((self.qmin <= self.radius) & (self.radius <= self.qmax))
+        geometry = self.get_geometry()
+        self.radius = geometry.q
+        self.idx = geometry.q_index.mask(self.qmin, self.qmax)
         self.idx &= self.mask
-        self.idx &= np.isfinite(self.data)
+        self.idx &= geometry.finite
         self.idx &= self.res_err_data != 0
         self.num_points = np.sum(self.idx)
 
@@ -362,6 +448,8 @@ class FitData2D(Data2D):
         if self.smearer is not None:
             fn.set_index(self.idx)
             gn = fn.get_value()
+        elif self.symmetric:
+            gn = self.get_geometry().eval_symmetric(fn, self.idx)
         else:
             gn = fn([self.qx_data[self.idx],
                      self.qy_data[self.idx]])
@@ -441,7 +529,8 @@ class FitEngine:
         self.fit_arrange_dict[id].vals = [sasmodel.getParam(name) for name in pars]
         self.fit_arrange_dict[id].constraints = constraints
 
-    def set_data(self, data, id, smearer=None, qmin=None, qmax=None):
+    def set_data(self, data, id, smearer=None, qmin=None, qmax=None,
+                 symmetric=False):
         """
         Receives plottable, creates a list of data to fit,set data
         in a FitArrange object and adds that object in a dictionary
@@ -449,10 +538,13 @@ class FitEngine:
 
         :param data: data added
         :param id: unique key corresponding to a fitArrange object with data
+        :param symmetric: for 2D data, evaluate centrosymmetric models once
+            for each pair of points at q and -q
         """
         if data.__class__.__name__ == 'Data2D':
             fitdata = FitData2D(sas_data2d=data, data=data.data,
                                  err_data=data.err_data)
+            fitdata.symmetric = symmetric
         else:
             fitdata = FitData1D(x=data.x, y=data.y,
                                  dx=data.dx, dy=data.dy, smearer=smearer)
@@ -506,6 +598,204 @@ class FitEngine:
             self.fit_arrange_dict[id].get_to_fit()
 
 
+    def fit_batch(self, q=None, handler=None, curr_thread=None,
+                  reset_flag=False, nworkers=1):
+        """
+        Fit each selected problem on its own, as in a batch fit, rather
+        than simultaneously as fit() does.
+
+        This is an API for scripts and other callers; the fit perspective
+        of the GUI still runs the fit() of one engine per batch item.
+
+        :param q: queue in which to put the results, if any
+        :param handler: FitHandler notified as each problem completes
+        :param curr_thread: thread to check for interrupts, see iter_batch()
+        :param reset_flag: start each fit from the initial parameter values
+        :param nworkers: number of worker processes, see iter_batch()
+
+        :return: list with the list of FResult of each problem, in the
+            order of the problems in fit_arrange_dict, or q if given.
+        """
+        results = dict(self.iter_batch(handler=handler,
+                                       curr_thread=curr_thread,
+                                       reset_flag=reset_flag,
+                                       nworkers=nworkers))
+        if handler is not None:
+            handler.update_fit(last=True)
+        all_results = [results[id] for id in self.fit_arrange_dict
+                       if id in results]
+        if q is not None:
+            q.put(all_results)
+            return q
+        else:
+            return all_results
+
+    def iter_batch(self, handler=None, curr_thread=None, reset_flag=False,
+                   nworkers=1):
+        """
+        Fit each selected problem on its own and generate the results of
+        each problem as soon as its fit is complete.
+
+        The problems are independent, so with more than one worker they
+        are fitted in a pool of worker processes and come out in the order
+        they finish. The results then refer to copies of the models and
+        data made in the workers, and the models of this engine are left
+        untouched. Otherwise they are fitted in order in this process.
+
+        Each result is reported to the handler with set_result() and
+        improvement(), followed by progress() with the number of problems
+        done. A problem which fails is reported with error(), and gets an
+        unsuccessful FResult holding the traceback in mesg.
+
+        :param handler: FitHandler notified as each problem completes
+        :param curr_thread: thread to check for interrupts, such as
+            a CalcThread. Its isquit() is called between fits and while
+            waiting on the workers. If it raises, the pending fits are
+            cancelled.
+        :param reset_flag: start each fit from the initial parameter values
+        :param nworkers: number of worker processes, or None for one
+            per processor. The default of 1 fits the problems in this
+            process. The models and data must pickle to use workers;
+            the sasmodels models are sent as their model file and state,
+            see register_model_pickling().
+
+        :return: iterator over (id, [FResult, ...]) for each problem
+        """
+        problems = [(id, M) for id, M in self.fit_arrange_dict.items()
+                    if M.get_to_fit()]
+        if len(problems) == 0:
+            raise RuntimeError("Nothing to fit")
+        engine_class = self.__class__
+        total = len(problems)
+
+        def report(id, fitproblem, outcome, current):
+            results, msg = outcome
+            if results is None:
+                R = FResult(model=fitproblem.get_model(),
+                            data=fitproblem.get_data(),
+                            param_list=fitproblem.pars)
+                R.success = False
+                R.fitness = np.nan
+                R.mesg = msg
+                R.fitter_id = self.fitter_id
+                results = [R]
+            if handler is not None:
+                if msg is not None:
+                    handler.error(msg)
+                for R in results:
+                    handler.set_result(R)
+                    handler.improvement()
+                handler.progress(current, total)
+            return id, results
+
+        if nworkers == 1 or futures is None:
+            for current, (id, M) in enumerate(problems):
+                if curr_thread is not None:
+                    curr_thread.isquit()
+                outcome = fit_problem(engine_class, self.fitter_id, id, M,
+                                      reset_flag)
+                yield report(id, M, outcome, current + 1)
+            return
+
+        executor = futures.ProcessPoolExecutor(max_workers=nworkers)
+        pending = {}
+        current = 0
+        try:
+            for id, M in problems:
+                register_model_pickling(M.get_model().model.__class__)
+                future = executor.submit(fit_problem, engine_class,
+                                         self.fitter_id, id, M, reset_flag)
+                pending[future] = (id, M)
+            while pending:
+                if curr_thread is not None:
+                    curr_thread.isquit()
+                done, _ = futures.wait(list(pending), timeout=POLL_INTERVAL,
+                                       return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    id, M = pending.pop(future)
+                    try:
+                        outcome = future.result()
+                    except Exception:
+                        # The problem could not be sent to or from the worker
+                        outcome = None, traceback.format_exc()
+                    current += 1
+                    yield report(id, M, outcome, current)
+        finally:
+            # Stop the work left if we were interrupted
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+
+## sasmodels model classes by model file, for the models unpickled here;
+## the class registered last is used, so the fit results come back with
+## the class of the models sent
+_MODEL_CLASSES = {}
+
+
+def register_model_pickling(model_class):
+    """
+    Let the models of a class built at run time by sasmodels be sent to
+    worker processes, as the path of their model file and their state.
+    Classes which pickle by name, and those without a model file such as
+    product models, are left alone.
+
+    :param model_class: class of a model to fit
+    """
+    filename = getattr(model_class, 'filename', None)
+    module = sys.modules.get(model_class.__module__)
+    if filename and getattr(module, model_class.__name__, None) \
+            is not model_class:
+        _MODEL_CLASSES[filename] = model_class
+        copyreg.pickle(model_class, _reduce_model)
+
+
+def _reduce_model(model):
+    """
+    Pickle a model registered by register_model_pickling()
+    """
+    return _rebuild_model, (model.filename, model.__dict__)
+
+
+def _rebuild_model(filename, state):
+    """
+    Unpickle a model pickled by _reduce_model(), building its class from
+    the model file the first time the file is seen in this process.
+    """
+    model_class = _MODEL_CLASSES.get(filename)
+    if model_class is None:
+        from sasmodels.core import load_model_info
+        from sasmodels.sasview_model import make_model_from_info
+        model_class = make_model_from_info(load_model_info(filename))
+        # The results are sent back with the model
+        register_model_pickling(model_class)
+    model = model_class.__new__(model_class)
+    model.__dict__.update(state)
+    return model
+
+
+def fit_problem(engine_class, fitter_id, id, fitproblem, reset_flag=False):
+    """
+    Fit a single problem with a new engine. This is the work unit of
+    FitEngine.iter_batch(), sent to worker processes in parallel mode.
+
+    :param engine_class: FitEngine subclass implementing fit()
+    :param fitter_id: fitter_id given to the results
+    :param id: key of the problem
+    :param fitproblem: FitArrange object to fit
+    :param reset_flag: start the fit from the initial parameter values
+
+    :return: ([FResult, ...], None), or (None, traceback) if the fit failed
+    """
+    try:
+        engine = engine_class()
+        engine.fitter_id = fitter_id
+        engine.fit_arrange_dict[id] = fitproblem
+        return engine.fit(reset_flag=reset_flag), None
+    except Exception:
+        return None, traceback.format_exc()
+
+
 class FitArrange:
     def __init__(self):
         """
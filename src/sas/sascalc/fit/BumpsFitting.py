@@ -4,6 +4,7 @@ BumpsFitting module runs the bumps optimizer.
 from __future__ import print_function
 
 import os
+from collections import OrderedDict
 from datetime import timedelta, datetime
 import traceback
 
@@ -37,6 +38,7 @@ from bumps.fitproblem import FitProblem
 
 from sas.sascalc.fit.AbstractFitEngine import FitEngine
 from sas.sascalc.fit.AbstractFitEngine import FResult
+from sas.sascalc.fit.AbstractFitEngine import is_centrosymmetric
 from sas.sascalc.fit.expression import compile_constraints
 
 class Progress(object):
@@ -120,7 +122,16 @@ class ConvergenceMonitor(object):
 class SasFitness(object):
     """
     Wrap SAS model as a bumps fitness object
+
+    The residuals and theory of the last few parameter vectors are kept,
+    so that points the optimizer evaluates again (restarts, repeated
+    DREAM proposals, final evaluation at the best point) are not computed
+    again.  At most *cache_size* vectors are kept, and fewer for large
+    data sets so that no more than *cache_points* values are held.
     """
+    cache_size = 16
+    cache_points = 2**22
+
     def __init__(self, model, data, fitted=[], constraints={},
                  initial_values=None, **kw):
         # Pull data name from sas_data entry, if available
@@ -131,6 +142,9 @@ class SasFitness(object):
         self.name = model.name + data_name
         self.model = model.model
         self.data = data
+        # The magnetization may be fitted, so the symmetry is checked
+        # for each evaluation
+        self._symmetric = getattr(data, 'symmetric', False)
         #print("SasFitness", model.name, data)
         if self.data.smearer is not None:
             self.data.smearer.model = self.model
@@ -141,6 +155,7 @@ class SasFitness(object):
         #print("constraints", constraints)
         self.constraints = dict(constraints)
         self.set_fitted(fitted)
+        self._cache = OrderedDict()
         self.update()
 
     def _reset_pars(self, names, values):
@@ -204,10 +219,29 @@ class SasFitness(object):
             self.model.setParam(k, v.value)
         self._dirty = True
 
+    def clear_cache(self):
+        """
+        Forget the stored evaluations, so that the next one runs the model.
+        """
+        self._cache.clear()
+        self._dirty = True
+
     def _recalculate(self):
         if self._dirty:
-            self._residuals, self._theory \
-                = self.data.residuals(self.model.evalDistribution)
+            key = tuple(self._pars[k].value for k in sorted(self._pars))
+            cached = self._cache.pop(key, None)
+            if cached is None:
+                if self._symmetric:
+                    self.data.symmetric = is_centrosymmetric(self.model)
+                cached = self.data.residuals(self.model.evalDistribution)
+                limit = min(self.cache_size,
+                            self.cache_points // max(len(cached[0]), 1))
+                while self._cache and len(self._cache) >= limit:
+                    self._cache.popitem(last=False)
+            # Most recently used last
+            if self.cache_size > 0:
+                self._cache[key] = cached
+            self._residuals, self._theory = cached
             self._dirty = False
 
     def numpoints(self):
@@ -301,6 +335,9 @@ class BumpsFit(FitEngine):
         all_results = []
         for M in problem.models:
             fitness = M.fitness
+            # Run the model at the final point so that its state, such as
+            # intermediate results, matches the reported theory
+            fitness.clear_cache()
             fitted_index = [varying.index(p) for p in fitness.fitted_pars]
             param_list = fitness.fitted_par_names + fitness.computed_par_names
             R = FResult(model=fitness.model, data=fitness.data,
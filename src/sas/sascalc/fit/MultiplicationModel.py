@@ -87,6 +87,9 @@ class MultiplicationModel(BaseComponent):
             self.is_multiplicity_model = False
             self.multiplicity_info = [0]
 
+        ## last evaluation: (parameters, q, P(Q), S(Q), P(Q)*S(Q))
+        self._cache = None
+
     def _clone(self, obj):
         """
         Internal utility function to copy the internal data members to a
@@ -98,6 +101,7 @@ class MultiplicationModel(BaseComponent):
         obj.dispersion = copy.deepcopy(self.dispersion)
         obj.p_model  = self.p_model.clone()
         obj.s_model  = self.s_model.clone()
+        obj._cache = None
         #obj = copy.deepcopy(self)
         return obj
 
@@ -293,12 +297,51 @@ class MultiplicationModel(BaseComponent):
         :param x: input q[], or [qx[], qy[]]
         :return: scattering function P(q[])
         """
+        return self._evaluate(x)[2].copy()
+
+    def calc_composition_models(self, x):
+        """
+        Return the form factor and the structure factor used by the last
+        evaluation at x, evaluating them if the parameters have changed
+
+        :param x: input q[], or [qx[], qy[]]
+        :return: (P(q[]), S(q[]))
+        """
+        pq_values, sq_values, _ = self._evaluate(x)
+        return pq_values, sq_values
+
+    def _evaluate(self, x):
+        """
+        Evaluate P(Q), S(Q) and the product in one pass, reusing the last
+        evaluation when neither the parameters nor the q values changed
+        """
         # set effective radius and scaling factor before run
         self._set_radius_effective()
         self._set_scale_factor()
-        out = self.params['scale_factor'] * self.p_model.evalDistribution(x) * \
-                        self.s_model.evalDistribution(x) + self.params['background']
-        return out
+        state = self._get_state()
+        if self._cache is not None and self._cache[0] == state \
+                and _same_q(self._cache[1], x):
+            return self._cache[2:]
+        pq_values = self.p_model.evalDistribution(x)
+        sq_values = self.s_model.evalDistribution(x)
+        out = self.params['scale_factor'] * pq_values * sq_values \
+              + self.params['background']
+        if isinstance(x, list):
+            q = [np.array(v, copy=True) for v in x]
+        else:
+            q = np.array(x, copy=True)
+        self._cache = (state, q, pq_values, sq_values, out)
+        return self._cache[2:]
+
+    def _get_state(self):
+        """
+        Parameter vector the evaluation depends on
+        """
+        return (sorted(self.params.items()),
+                sorted(self.p_model.params.items()),
+                sorted(self.s_model.params.items()),
+                sorted((name, sorted(value.items()))
+                       for name, value in self.p_model.dispersion.items()))
 
     def set_dispersion(self, parameter, dispersion):
         """
@@ -333,3 +376,13 @@ class MultiplicationModel(BaseComponent):
                                                 ( p_model.name, s_model.name )
         description += "        for details of individual models."
         self.description += description
+
+
+def _same_q(cached, x):
+    """
+    Check x holds the q values of the cached evaluation
+    """
+    if isinstance(x, list):
+        return (isinstance(cached, list) and len(cached) == len(x)
+                and all(np.array_equal(a, b) for a, b in zip(cached, x)))
+    return not isinstance(cached, list) and np.array_equal(cached, x)
@@ -242,6 +242,9 @@ LIST_OF_DATA_2D_VALUES = [["qx_data", "qx_data", "float"],
                           ["err_data", "err_data", "float"],
                           ["mask", "mask", "bool"]]
 
+# Number of states of a fit page kept for undo
+MAX_UNDO_STATES = 50
+
 
 def parse_entry_helper(node, item):
     """
@@ -269,6 +272,76 @@ def parse_entry_helper(node, item):
                 return None
 
 
+def snapshot_data(data):
+    """
+    Return a copy of the data sharing the arrays of the original
+
+    The data arrays are replaced rather than modified in place, so page
+    states can hold a shallow copy of the data of the page without seeing
+    later changes to it, and without copying the arrays for each state.
+
+    :param data: Data1D or Data2D, list of them (batch pages) or None
+
+    :return: the copy
+    """
+    if data is None:
+        return None
+    if isinstance(data, list):
+        return [copy.copy(item) for item in data]
+    return copy.copy(data)
+
+
+class PageStateHistory(object):
+    """
+    Undo history of the states of a fit page.
+
+    Only the last *max_length* states are kept; adding a state after going
+    back in the history drops the states that could have been redone.
+    """
+    def __init__(self, max_length=MAX_UNDO_STATES):
+        self.max_length = max_length
+        self._states = []
+        self._position = -1
+
+    def __len__(self):
+        return len(self._states)
+
+    def appendItem(self, state):
+        """
+        Add a state after the current one
+        """
+        del self._states[self._position + 1:]
+        self._states.append(state)
+        if self.max_length is not None \
+                and len(self._states) > self.max_length:
+            del self._states[:len(self._states) - self.max_length]
+        self._position = len(self._states) - 1
+
+    def getCurrentPosition(self):
+        """
+        Return the index of the current state, -1 if there are none
+        """
+        return self._position
+
+    def getPreviousItem(self):
+        """
+        Go back to the previous state and return it
+        """
+        if not self._states:
+            return None
+        self._position = max(self._position - 1, 0)
+        return self._states[self._position]
+
+    def getNextItem(self):
+        """
+        Go forward to the next state and return it
+        """
+        if not self._states:
+            return None
+        self._position = min(self._position + 1, len(self._states) - 1)
+        return self._states[self._position]
+
+
 class PageState(object):
     """
     Contains information to reconstruct a page of the fitpanel.
@@ -411,7 +484,8 @@ class PageState(object):
             model.name = self.model.name
         obj = PageState(model=model)
         obj.file = copy.deepcopy(self.file)
-        obj.data = copy.deepcopy(self.data)
+        # The data of a saved state is never modified, so it can be shared
+        obj.data = self.data
         if self.data is not None:
             self.data_name = self.data.name
         obj.data_name = self.data_name
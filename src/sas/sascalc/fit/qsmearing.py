@@ -128,7 +128,8 @@ class PySmear(object):
             offset = np.searchsorted(self.resolution.q_calc, self.resolution.q[0])
         self.offset = offset
 
-    def apply(self, iq_in, first_bin=0, last_bin=None):
+    def apply(self, iq_in, first_bin=0, last_bin=None, iq_low=None,
+              iq_high=None):
         """
         Apply the resolution function to the data.
         Note that this is called with iq_in matching data.x, but with
@@ -137,20 +138,40 @@ class PySmear(object):
         should be those returned from get_bin_range.
         The returned value is of the same length as iq_in, with the range
         first_bin:last_bin set to the resolution smeared values.
+
+        The model is evaluated at the q values of the resolution calculation
+        outside of the range, unless these theory values are given as
+        iq_low and iq_high, for the q values returned by get_q_outside.
         """
         if last_bin is None: last_bin = len(iq_in)
         start, end = first_bin + self.offset, last_bin + self.offset
         q_calc = self.resolution.q_calc
         iq_calc = np.empty_like(q_calc)
         if start > 0:
-            iq_calc[:start] = self.model.evalDistribution(q_calc[:start])
+            if iq_low is None:
+                iq_low = self.model.evalDistribution(q_calc[:start])
+            iq_calc[:start] = iq_low
         if end+1 < len(q_calc):
-            iq_calc[end+1:] = self.model.evalDistribution(q_calc[end+1:])
+            if iq_high is None:
+                iq_high = self.model.evalDistribution(q_calc[end+1:])
+            iq_calc[end+1:] = iq_high
         iq_calc[start:end+1] = iq_in[first_bin:last_bin+1]
         smeared = self.resolution.apply(iq_calc)
         return smeared
     __call__ = apply
 
+    def get_q_outside(self, first_bin, last_bin):
+        """
+        For the range of data bins first_bin:last_bin+1, return the q values
+        below and above the range at which the resolution calculation needs
+        the theory, so that it can be evaluated along with the data bins.
+        """
+        start, end = first_bin + self.offset, last_bin + self.offset
+        q_calc = self.resolution.q_calc
+        q_low = q_calc[:start] if start > 0 else q_calc[:0]
+        q_high = q_calc[end+1:] if end+1 < len(q_calc) else q_calc[:0]
+        return q_low, q_high
+
     def get_bin_range(self, q_min=None, q_max=None):
         """
         For a given q_min, q_max, find the corresponding indices in the data.
@@ -167,6 +167,71 @@ def ortho_transformed_smeared(q, d_max, n, height, width, npts):
 
     return total / (n_width*n_height)
 
+def ortho_transformed_matrix(q, d_max, n):
+    """
+    Fourier transform of a set of orthogonal functions.
+
+    :param q: q (vector).
+    :param d_max: d_max.
+    :param n: orders of the functions (vector).
+
+    :return: [len(q) x len(n)] matrix, with the Fourier transform of
+        the function of order n[j] across all q in column j.
+    """
+    n = np.asarray(n, dtype=np.float64)
+    qd = q[:, None] * (d_max/pi)
+    return ((8.0 * d_max**2 * n * (-1.0)**(n+1))
+            * np.sinc(qd) / (n**2 - qd**2))
+
+def slit_quadrature(q, height, width, npts):
+    """
+    Quadrature points of the slit smearing in ortho_transformed_smeared.
+
+    The slit-smeared transform at q is the average of the transform over
+    the points sqrt((q - y)**2 + z**2), for npts values of y across the
+    slit width and of z along the slit height.
+
+    :param q: q (vector).
+    :param height: slit_height.
+    :param width: slit_width.
+    :param npts: npts.
+
+    :return: [len(q) x nquad] matrix of the q values to average over.
+    """
+    n_width = npts if width > 0 else 1
+    n_height = npts if height > 0 else 1
+    dz = height/(npts-1)
+    y0, dy = -0.5*width, width/(npts-1)
+    zsq = (np.arange(n_height) * dz)**2
+    y = y0 + np.arange(n_width) * dy
+    qsq = (q[:, None, None] - y[None, None, :])**2 + zsq[None, :, None]
+    return np.sqrt(qsq).reshape(len(q), n_height*n_width)
+
+def ortho_transformed_smeared_matrix(q_quad, d_max, n):
+    """
+    Slit-smeared Fourier transform of a set of orthogonal functions.
+
+    :param q_quad: quadrature points from slit_quadrature.
+    :param d_max: d_max.
+    :param n: orders of the functions (vector).
+
+    :return: [len(q) x len(n)] matrix, with the slit-smeared Fourier
+        transform of the function of order n[j] across all q in column j.
+    """
+    n = np.asarray(n, dtype=np.float64)
+    qd = q_quad * (d_max/pi)
+    sinc_qd = np.sinc(qd)
+    qd_sq = qd**2
+    total = np.empty((len(q_quad), len(n)), dtype=np.float64)
+    # Only the denominator depends on n: work on one function at a time
+    # in a single buffer rather than on a [q x quadrature x n] array.
+    work = np.empty_like(qd_sq)
+    for j, n_j in enumerate(n):
+        np.subtract(n_j**2, qd_sq, out=work)
+        np.divide(sinc_qd, work, out=work)
+        np.sum(work, axis=1, out=total[:, j])
+    return (8.0 * d_max**2 * n * (-1.0)**(n+1)) * total / q_quad.shape[1]
+
 @njit('f8[:](f8[:], f8[:], f8, f8, f8, u8)')
 def iq_smeared(p, q, d_max, height, width, npts):
     """
@@ -14,8 +14,23 @@ Module to explore the P(r) inversion results for a range
 of D_max value. User picks a number of points and a range of
 distances, then get a series of outputs as a function of D_max
 over that range.
+
+The inversions for the different D_max values are independent and
+can be spread over a pool of worker processes.
 """
-import sys
+import bisect
+import multiprocessing
+
+try:
+    from concurrent import futures
+except ImportError:
+    # CRUFT: python 2 without the futures backport runs serially
+    futures = None
+
+## Outputs of the inversion stored for each D_max value
+OUTPUTS = ('chi2', 'osc', 'pos', 'pos_err', 'rg', 'iq0', 'bck')
+## Time [s] between checks for interrupts while waiting on workers
+POLL_INTERVAL = 0.05
 
 
 class Results(object):
@@ -40,6 +55,69 @@ class Results(object):
         ## List of errors found during the last exploration
         self.errors = []
 
+    def add(self, d_max, outputs):
+        """
+        Add the outputs of the inversion for a D_max value,
+        keeping the arrays sorted by D_max.
+
+        :param d_max: value of D_max
+        :param outputs: dictionary of the outputs listed in OUTPUTS
+
+        """
+        index = bisect.bisect(self.d_max, d_max)
+        self.d_max.insert(index, d_max)
+        for name in OUTPUTS:
+            getattr(self, name).insert(index, outputs[name])
+
+
+def explore_points(pr_state, d_values, nfunc):
+    """
+    Invert for each D_max value and compute the outputs of the inversion.
+    This is the work unit of DistExplorer, sent to worker processes in
+    parallel mode.
+
+    :param pr_state: sas.sascalc.pr.invertor.Invertor object
+    :param d_values: sequence of D_max values
+    :param nfunc: number of terms in the expansion
+
+    :return: list of (d_max, outputs, error), where outputs is a dictionary
+        of the outputs listed in OUTPUTS, or None if the inversion failed,
+        and error is None or the reason of the failure.
+    """
+    return list(iter_points(pr_state, d_values, nfunc))
+
+
+def iter_points(pr_state, d_values, nfunc):
+    """
+    Generate the points of explore_points() one D_max value at a time.
+    The inversions share the setup of a single Invertor.iter_dmax() scan.
+
+    :return: iterator over (d_max, outputs, error)
+    """
+    for d, out, cov, chi2, bck, error in pr_state.iter_dmax(d_values, nfunc):
+        outputs = None
+        try:
+            pr_state.d_max = d
+            if error is not None:
+                raise RuntimeError(error)
+            pr_state.out = out
+            pr_state.cov = cov
+            pr_state.chi2 = chi2
+            pr_state.background = bck
+
+            outputs = {
+                'chi2': chi2,
+                'bck': bck,
+                'iq0': pr_state.iq0(out),
+                'rg': pr_state.rg(out),
+                'pos': pr_state.get_positive(out),
+                'pos_err': pr_state.get_pos_err(out, cov),
+                'osc': pr_state.oscillations(out),
+            }
+        except Exception as exc:
+            outputs, error = None, str(exc)
+        yield d, outputs, error
+
 
 class DistExplorer(object):
     """
@@ -57,13 +135,58 @@ class DistExplorer(object):
         self._default_min = 0.8 * self.pr_state.d_max
         self._default_max = 1.2 * self.pr_state.d_max
 
-    def __call__(self, dmin=None, dmax=None, npts=10):
+    def __call__(self, dmin=None, dmax=None, npts=10, nworkers=1,
+                 isquit_func=None):
         """
         Compute the outputs as a function of D_max.
 
         :param dmin: minimum value for D_max
         :param dmax: maximum value for D_max
         :param npts: number of points for D_max
+        :param nworkers: number of worker processes, see explore()
+        :param isquit_func: function to call to check whether the
+            computation needs to be stopped, see explore()
+
+        """
+        # Results object to store the computation outputs.
+        results = Results()
+
+        for d, outputs, error in self.explore(dmin, dmax, npts, nworkers,
+                                              isquit_func):
+            if error is None:
+                results.add(d, outputs)
+            else:
+                # This inversion failed, skip this D_max value
+                msg = "ExploreDialog: inversion failed for "
+                msg += "D_max=%s\n %s" % (str(d), error)
+                results.errors.append(msg)
+
+        return results
+
+    def explore(self, dmin=None, dmax=None, npts=10, nworkers=1,
+                isquit_func=None):
+        """
+        Generate the outputs for each D_max value as soon as they are
+        computed, so that they can be shown while the exploration runs.
+
+        With more than one worker, each D_max value is sent to the pool
+        of worker processes as a task of its own, and the points come out
+        in the order their inversions end. The state of the invertor is
+        then left untouched. Otherwise they are inverted in order in this
+        process, in a single scan of the D_max values.
+
+        :param dmin: minimum value for D_max
+        :param dmax: maximum value for D_max
+        :param npts: number of points for D_max
+        :param nworkers: number of worker processes, or None for one
+            per processor.
+        :param isquit_func: function to call to check whether the
+            computation needs to be stopped, such as CalcThread.isquit.
+            It is called between points, and while waiting on the
+            workers. If it raises, the pending points are cancelled.
+
+        :return: iterator over (d_max, outputs, error) for each point,
+            as described in explore_points().
 
         """
         # Take care of the defaults if needed
@@ -73,35 +196,52 @@ class DistExplorer(object):
         if dmax is None:
             dmax = self._default_max
 
-        # Results object to store the computation outputs.
-        results = Results()
+        d_values = [dmin + i * (dmax - dmin) / (npts - 1.0)
+                    for i in range(npts)]
+        nfunc = self.pr_state.nfunc
 
-        # Loop over d_max values
-        for i in range(npts):
-            d = dmin + i * (dmax - dmin) / (npts - 1.0)
-            self.pr_state.d_max = d
+        if nworkers == 1 or futures is None:
+            points = iter_points(self.pr_state, d_values, nfunc)
             try:
-                out, cov = self.pr_state.invert(self.pr_state.nfunc)
-
-                # Store results
-                iq0 = self.pr_state.iq0(out)
-                rg = self.pr_state.rg(out)
-                pos = self.pr_state.get_positive(out)
-                pos_err = self.pr_state.get_pos_err(out, cov)
-                osc = self.pr_state.oscillations(out)
-
-                results.d_max.append(self.pr_state.d_max)
-                results.bck.append(self.pr_state.background)
-                results.chi2.append(self.pr_state.chi2)
-                results.iq0.append(iq0)
-                results.rg.append(rg)
-                results.pos.append(pos)
-                results.pos_err.append(pos_err)
-                results.osc.append(osc)
-            except Exception as exc:
-                # This inversion failed, skip this D_max value
-                msg = "ExploreDialog: inversion failed for "
-                msg += "D_max=%s\n %s" % (str(d), exc)
-                results.errors.append(msg)
-
-        return results
+                while True:
+                    if isquit_func is not None:
+                        isquit_func()
+                    try:
+                        point = next(points)
+                    except StopIteration:
+                        return
+                    yield point
+            finally:
+                # Restore the D_max of the invertor if interrupted
+                points.close()
+
+        if nworkers is None:
+            nworkers = multiprocessing.cpu_count()
+        nworkers = max(min(nworkers, npts), 1)
+        executor = futures.ProcessPoolExecutor(max_workers=nworkers)
+        pending = set()
+        try:
+            # One task per D_max value, so that each point is shown as soon
+            # as its inversion is done rather than with a chunk of points
+            for d in d_values:
+                pending.add(executor.submit(explore_points, self.pr_state,
+                                            [d], nfunc))
+            while pending:
+                if isquit_func is not None:
+                    isquit_func()
+                try:
+                    for future in futures.as_completed(pending,
+                                                       timeout=POLL_INTERVAL):
+                        pending.discard(future)
+                        for point in future.result():
+                            yield point
+                        if isquit_func is not None:
+                            isquit_func()
+                except futures.TimeoutError:
+                    # No point done yet, check for interrupts again
+                    pass
+        finally:
+            # Stop the work left if we were interrupted
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
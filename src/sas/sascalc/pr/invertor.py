@@ -465,6 +465,42 @@ class Invertor(Pinvertor):
             raise RuntimeError("Invertor: could not invert I(Q)\n  %s" % str(exc))
 
         # Perform the inversion (least square fit)
+        c, chi2, err = self._solve(a, b, nfunc, nr)
+        self.chi2 = chi2
+
+        # Compute the reg term size for the output
+        sum_sig, sum_reg = self._get_reg_size(nfunc, nr, a)
+
+        if math.fabs(self.alpha) > 0:
+            new_alpha = sum_sig / (sum_reg / self.alpha)
+        else:
+            new_alpha = 0.0
+        self.suggested_alpha = new_alpha
+
+        # Keep a copy of the last output
+        self._set_output(c, err)
+
+        # Store computation time
+        self.elapsed = time.time() - t_0
+
+        return self.out, self.cov
+
+    def _solve(self, a, b, nfunc, nr):
+        """
+        Solve the least square problem a x = b.
+
+        :param a: A matrix, with the npts data rows followed by the
+            nr regularization rows.
+        :param b: b vector.
+        :param nfunc: number of columns of a.
+        :param nr: number of regularization rows of a.
+
+        :return: c, chi2, err - the coefficients, chi2 (-1 if the residuals
+            could not be computed) and error matrix of the coefficients.
+        """
+        npts = len(self.x)
+        err = np.zeros([nfunc, nfunc])
+
         # CRUFT: numpy>=1.14.0 allows rcond=None for the following default
         rcond = np.finfo(float).eps * max(a.shape)
         c, chi2, _, _ = lstsq(a, b, rcond=rcond)
@@ -473,20 +509,9 @@ class Invertor(Pinvertor):
             float(chi2)
         except Exception:
             chi2 = -1.0
-        self.chi2 = chi2
-
-        inv_cov = np.zeros([nfunc, nfunc])
 
         # Get the covariance matrix, defined as inv_cov = a_transposed * a
         inv_cov = self._get_invcov_matrix(nfunc, nr, a)
-        # Compute the reg term size for the output
-        sum_sig, sum_reg = self._get_reg_size(nfunc, nr, a)
-
-        if math.fabs(self.alpha) > 0:
-            new_alpha = sum_sig / (sum_reg / self.alpha)
-        else:
-            new_alpha = 0.0
-        self.suggested_alpha = new_alpha
 
         try:
             cov = np.linalg.pinv(inv_cov)
@@ -496,26 +521,105 @@ class Invertor(Pinvertor):
             # Return an empty error matrix
             logger.error(exc)
 
-        # Keep a copy of the last output
+        return c, chi2, err
+
+    def _set_output(self, c, err):
+        """
+        Keep a copy of the coefficients and errors of the last output.
+
+        :param c: coefficients found by the least square fit
+        :param err: error matrix of the coefficients
+        """
+        self.out, self.cov, self.background = self._split_output(c, err)
+
+    def _split_output(self, c, err):
+        """
+        Take the background out of the least square fit output
+        if it was estimated.
+
+        :param c: coefficients found by the least square fit
+        :param err: error matrix of the coefficients
+
+        :return: out, cov, background
+        """
         if not self.est_bck:
-            self.out = c
-            self.cov = err
-        else:
-            self.background = c[0]
+            return c, err, self.background
 
-            err_0 = np.zeros([nfunc, nfunc])
-            c_0 = np.zeros(nfunc)
+        nfunc = len(c)
+        err_0 = np.zeros([nfunc, nfunc])
+        c_0 = np.zeros(nfunc)
 
-            c_0[:-1] = c[1:]
-            err_0[:-1, :-1] = err[1:, 1:]
+        c_0[:-1] = c[1:]
+        err_0[:-1, :-1] = err[1:, 1:]
 
-            self.out = c_0
-            self.cov = err_0
+        return c_0, err_0, c[0]
 
-        # Store computation time
-        self.elapsed = time.time() - t_0
+    def scan_dmax(self, d_values, nfunc=10, nr=20):
+        """
+        Perform the inversion for a series of d_max values.
 
-        return self.out, self.cov
+        Each result is the same as the one of invert(nfunc, nr) with
+        d_max set to the given value. The regularization rows and the
+        b vector do not depend on d_max and are only computed once.
+        The state of the invertor is left untouched.
+
+        :param d_values: sequence of d_max values
+        :param nfunc: number of base functions to use.
+        :param nr: number of r points to evaluate the 2nd derivative at
+            for the reg. term.
+
+        :return: list of (d_max, out, cov, chi2, background, error) for
+            each d_max value. If the inversion failed for that value,
+            error is a message and out, cov, chi2 and background are None.
+            Otherwise error is None.
+        """
+        return list(self.iter_dmax(d_values, nfunc, nr))
+
+    def iter_dmax(self, d_values, nfunc=10, nr=20):
+        """
+        Generate the results of scan_dmax() one d_max value at a time.
+
+        Each inversion is only performed when its result is requested.
+        The d_max of the invertor is restored once all the values are
+        done or the iteration is closed.
+
+        :return: iterator over (d_max, out, cov, chi2, background, error)
+        """
+        if self.is_valid() < 0:
+            msg = "Invertor: invalid data; incompatible data lengths."
+            raise RuntimeError(msg)
+
+        ncol = nfunc + 1 if self.est_bck else nfunc
+        npts = len(self.x)
+        d_max = self.d_max
+        a = np.zeros([npts + nr, ncol])
+        b = np.zeros(npts + nr)
+        a[npts:, :] = np.sqrt(self.alpha) * self._get_reg_matrix(ncol, nr)
+        try:
+            if not self.est_bck:
+                self.y -= self.background
+            b[:npts] = self._get_data_vector()
+        finally:
+            if not self.est_bck:
+                self.y += self.background
+        try:
+            for d in d_values:
+                try:
+                    self.d_max = d
+                    a[:npts, :] = self._get_data_matrix(ncol)
+                except Exception as exc:
+                    msg = "Invertor: could not invert I(Q)\n  %s" % str(exc)
+                    yield d, None, None, None, None, msg
+                    continue
+                try:
+                    c, chi2, err = self._solve(a, b, ncol, nr)
+                except Exception as exc:
+                    yield d, None, None, None, None, str(exc)
+                    continue
+                out, cov, background = self._split_output(c, err)
+                yield d, out, cov, chi2, background, None
+        finally:
+            self.d_max = d_max
 
     def estimate_numterms(self, isquit_func=None):
         """
@@ -540,12 +644,14 @@ class Invertor(Pinvertor):
             logger.warning("Invertor.estimate_numterms: %s", exc)
             return self.nfunc, best_alpha, "Could not estimate number of terms"
 
-    def estimate_alpha(self, nfunc):
+    def estimate_alpha(self, nfunc, solver=None):
         """
         Returns a reasonable guess for the
         regularization constant alpha
 
         :param nfunc: number of terms to use in the expansion.
+        :param solver: optional InversionSolver for this invertor with at
+            least nfunc terms, to reuse across calls.
 
         :return: alpha, message, elapsed
 
@@ -566,16 +672,20 @@ class Invertor(Pinvertor):
             if pr.alpha <= 0:
                 pr.alpha = 0.0001
 
+            # Only the regularization term changes with alpha: factor
+            # the rest of the problem once for all the inversions below
+            if solver is None:
+                solver = InversionSolver(pr, nfunc)
+
             # Perform inversion to find the largest alpha
-            out, _ = pr.invert(nfunc)
+            out, _ = solver.solve(nfunc, pr.alpha, pr)
 
             elapsed = time.time() - starttime
             initial_alpha = pr.alpha
             initial_peaks = pr.get_peaks(out)
 
             # Try the inversion with the estimated alpha
-            pr.alpha = pr.suggested_alpha
-            out, _ = pr.invert(nfunc)
+            out, _ = solver.solve(nfunc, pr.suggested_alpha, pr)
 
             npeaks = pr.get_peaks(out)
             # if more than one peak to start with
@@ -594,8 +704,7 @@ class Invertor(Pinvertor):
                 best_alpha = pr.suggested_alpha
                 found = False
                 for i in range(10):
-                    pr.alpha = (0.33) ** (i + 1) * alpha
-                    out, _ = pr.invert(nfunc)
+                    out, _ = solver.solve(nfunc, (0.33) ** (i + 1) * alpha, pr)
 
                     peaks = pr.get_peaks(out)
                     if peaks > 1:
@@ -748,3 +857,127 @@ class Invertor(Pinvertor):
         else:
             msg = "Invertor.from_file: '%s' is not a file" % str(path)
             raise RuntimeError(msg)
+
+
+class InversionSolver(object):
+    """
+    Least square solver of the P(r) inversion for many values of alpha
+    and numbers of base functions.
+
+    The A matrix of the problem is the data block D stacked on top of
+    sqrt(alpha) times the regularization block R, and the b vector is the
+    data vector b_d followed by zeros. Only the regularization rows depend
+    on alpha. The data block is factored once as D = QT, with Q having
+    orthonormal columns and T upper triangular. The first k columns of D
+    are then Q times the first k columns of T, which only have non-zero
+    entries in their first k rows. The problem with k base functions
+    reduces to the (k + nr) x k problem
+
+        [T_k; sqrt(alpha) R_k] x = [(Q^T b_d)_k; 0]
+
+    which has the same solution and singular values as the full one.
+
+    The results of solve() are those of Invertor.invert(), or of
+    Invertor.lstsq() if the background is not subtracted.
+    """
+    def __init__(self, invertor, nfunc, nr=20, subtract_background=True):
+        """
+        :param invertor: Invertor holding the data and the d_max,
+            q range, slit size and background settings to use.
+        :param nfunc: largest number of base functions to solve for.
+        :param nr: number of r points to evaluate the 2nd derivative at
+            for the reg. term.
+        :param subtract_background: if True, the background is subtracted
+            from I(q) when it is not estimated, as in Invertor.invert().
+        """
+        if invertor.is_valid() < 0:
+            msg = "Invertor: invalid data; incompatible data lengths."
+            raise RuntimeError(msg)
+
+        self.invertor = invertor
+        self.nfunc = nfunc
+        self.nr = nr
+        self.est_bck = invertor.est_bck
+        self.npts = len(invertor.x)
+        ncol = nfunc + 1 if self.est_bck else nfunc
+
+        subtract = subtract_background and not self.est_bck
+        try:
+            if subtract:
+                invertor.y -= invertor.background
+            try:
+                self._data = invertor._get_data_matrix(ncol)
+                self._b = invertor._get_data_vector()
+                self._reg = invertor._get_reg_matrix(ncol, nr)
+            finally:
+                if subtract:
+                    invertor.y += invertor.background
+        except Exception as exc:
+            raise RuntimeError("Invertor: could not invert I(Q)\n  %s" % str(exc))
+
+        q, self._t = np.linalg.qr(self._data)
+        self._qt_b = np.dot(q.T, self._b)
+        # Signal and reg term sizes for each number of columns
+        self._sum_sig = np.cumsum(np.sum(self._data ** 2, axis=0))
+        self._sum_reg = np.cumsum(np.sum(self._reg ** 2, axis=0))
+
+    def solve(self, nfunc, alpha, pr=None):
+        """
+        Perform the inversion for a number of base functions and alpha.
+
+        The alpha, output, chi2 and suggested alpha are stored in pr as
+        Invertor.lstsq() does.
+
+        :param nfunc: number of base functions to use, at most the
+            number the solver was built for.
+        :param alpha: regularization constant.
+        :param pr: Invertor to store the results in; by default the one
+            the solver was built for. It should hold the same data.
+
+        :return: c_out, c_cov - the coefficients with covariance matrix
+        """
+        if nfunc > self.nfunc:
+            msg = "InversionSolver: cannot solve for %d terms, " % nfunc
+            msg += "the solver was built for %d" % self.nfunc
+            raise ValueError(msg)
+        if pr is None:
+            pr = self.invertor
+
+        t_0 = time.time()
+        pr.nfunc = nfunc
+        pr.alpha = alpha
+        ncol = nfunc + 1 if self.est_bck else nfunc
+        nrows = min(ncol, self._t.shape[0])
+
+        reg = np.sqrt(pr.alpha) * self._reg[:, :ncol]
+        a = np.vstack([self._t[:nrows, :ncol], reg])
+        b = np.concatenate([self._qt_b[:nrows], np.zeros(self.nr)])
+
+        # Use the same cut-off on singular values as Invertor.lstsq
+        rcond = np.finfo(float).eps * max(self.npts + self.nr, ncol)
+        c, _, rank, _ = lstsq(a, b, rcond=rcond)
+        if rank < ncol or self.npts + self.nr <= ncol:
+            chi2 = -1.0
+        else:
+            residuals = np.dot(self._data[:, :ncol], c) - self._b
+            chi2 = np.sum(residuals ** 2) + np.sum(np.dot(reg, c) ** 2)
+        pr.chi2 = chi2
+
+        if math.fabs(pr.alpha) > 0:
+            pr.suggested_alpha = self._sum_sig[ncol - 1] / self._sum_reg[ncol - 1]
+        else:
+            pr.suggested_alpha = 0.0
+
+        err = np.zeros([ncol, ncol])
+        try:
+            cov = np.linalg.pinv(np.dot(a.T, a))
+            err = math.fabs(chi2 / (self.npts - ncol)) * cov
+        except Exception as exc:
+            # We were not able to estimate the errors
+            # Return an empty error matrix
+            logger.error(exc)
+
+        pr._set_output(c, err)
+        pr.elapsed = time.time() - t_0
+        return pr.out, pr.cov
+
@@ -5,7 +5,7 @@ import numpy as np
 import copy
 import sys
 import logging
-from sas.sascalc.pr.invertor import Invertor
+from sas.sascalc.pr.invertor import Invertor, InversionSolver
 
 logger = logging.getLogger(__name__)
 
@@ -67,12 +67,20 @@ class NTermEstimator(object):
         self.osc_list = []
         self.err_list = []
         self.alpha_list = []
+        if self.nterm_max > self.nterm_min:
+            # Build the problem once for the largest number of terms;
+            # the problems with fewer terms are solved from it.
+            solver = InversionSolver(inver, self.nterm_max - 1)
+            if inver.est_bck or inver.background == 0:
+                lstsq_solver = solver
+            else:
+                lstsq_solver = InversionSolver(inver, self.nterm_max - 1,
+                                               subtract_background=False)
         for k in range(self.nterm_min, self.nterm_max, 1):
             if self.isquit_func is not None:
                 self.isquit_func()
-            best_alpha, message, _ = inver.estimate_alpha(k)
-            inver.alpha = best_alpha
-            inver.out, inver.cov = inver.lstsq(k)
+            best_alpha, message, _ = inver.estimate_alpha(k, solver)
+            inver.out, inver.cov = lstsq_solver.solve(k, best_alpha)
             osc = inver.oscillations(inver.out)
             err = inver.get_pos_err(inver.out, inver.cov)
             if osc > 10.0:
@@ -30,6 +30,8 @@ class Pinvertor(object):
     slit_height = 0.0
     #Slit width in units of q [A-1]
     slit_width = 0.0
+    #Number of points across the slit height and width when smearing
+    smear_npts = 21
 
     def __init__(self):
         #Maximum distance between any two points in the system
@@ -349,9 +351,8 @@ class Pinvertor(object):
         q = np.atleast_1d(q)
         pars = np.float64(pars)
 
-        npts = 21
         iq_val = calc.iq_smeared(pars, q, self.d_max, self.slit_height,
-                                 self.slit_width, npts)
+                                 self.slit_width, self.smear_npts)
         return iq_val[0] if iq_val.shape[0] == 1 else iq_val
 
     def pr(self, pars, r):
@@ -541,7 +542,26 @@ class Pinvertor(object):
         a_obj = np.zeros([self.npoints + nr, nfunc])
         b_obj = np.zeros(self.npoints + nr)
 
-        sqrt_alpha = np.sqrt(self.alpha)
+        a_obj[0:self.npoints, :] = self._get_data_matrix(nfunc)
+        a_obj[self.npoints:self.npoints+nr, :] = \
+            np.sqrt(self.alpha) * self._get_reg_matrix(nfunc, nr)
+        b_obj[0:self.npoints] = self._get_data_vector()
+
+        return a_obj, b_obj
+
+    def _get_data_matrix(self, nfunc):
+        """
+        Returns the first npoints rows of the A matrix, holding the
+        Fourier transformed base functions divided by the error on I(q).
+        Rows of points outside the q range are set to zero.
+
+        :param nfunc: number of base functions.
+
+        :return: data block [npoints x nfunc]
+        """
+        nfunc = int(nfunc)
+        a_data = np.zeros([self.npoints, nfunc])
+
         offset = 0 if self.est_bck == 1 else 1
 
         if self.check_for_zero(self.err):
@@ -549,47 +569,82 @@ class Pinvertor(object):
 
         # Whether or not to use ortho_transformed_smeared.
         smeared = (self.slit_width > 0 or self.slit_height > 0)
-        smear_npts = 21
 
-        # Get valid points as x, y and err.
+        # Get valid points as x and err.
         q_accept_x = self.accept_q(self.x)
         x_use = self.x[q_accept_x]
-        y_use = self.y[q_accept_x]
         err_use = self.err[q_accept_x]
 
-        # Create views into the a_obj/b_obj arrays containing the first
-        # n rows.  Since these are views into the original array updating
-        # the values will update the original.
-        a_view = a_obj[0:self.npoints, :]
-        b_view = b_obj[0:self.npoints]
+        # The background term, if any, is the first column
+        first = 1 if self.est_bck == 1 else 0
+        n = np.arange(first, nfunc) + offset
+        res = np.ones([len(x_use), nfunc])
+        if smeared:
+            q_quad = self._get_slit_quadrature()[q_accept_x]
+            res[:, first:] = calc.ortho_transformed_smeared_matrix(
+                q_quad, self.d_max, n)
+        else:
+            res[:, first:] = calc.ortho_transformed_matrix(x_use, self.d_max, n)
+        a_data[q_accept_x, :] = res/err_use[:, None]
 
-        # Compute A
-        for j in range(nfunc):
-            if self.est_bck == 1 and j == 0:
-                res = 1.0
-            elif smeared:
-                res = calc.ortho_transformed_smeared(
-                    x_use, self.d_max, j+offset,
-                    self.slit_height, self.slit_width, smear_npts)
-            else:
-                res = calc.ortho_transformed(x_use, self.d_max, j+offset)
-            a_view[q_accept_x, j] = res/err_use
+        return a_data
 
-        for j in range(nfunc):
-            i_r = np.arange(nr, dtype=np.float64)
+    def _get_slit_quadrature(self):
+        """
+        Returns the slit quadrature points of all q values, computing
+        them only when the q values or the slit size have changed.
+
+        :return: [npoints x nquad] matrix of q values to average over.
+        """
+        key = (self.slit_height, self.slit_width, self.smear_npts)
+        cache = self.__dict__.get('_slit_cache')
+        if cache is None or cache[0] is not self.x or cache[1] != key:
+            q_quad = calc.slit_quadrature(self.x, self.slit_height,
+                                          self.slit_width, self.smear_npts)
+            cache = (self.x, key, q_quad)
+            self.__dict__['_slit_cache'] = cache
+        return cache[2]
 
-            # Implement second stage A as a vector operation with shape = [nr].
-            r = (self.d_max / nr) * i_r
-            tmp = np.pi * (j+offset) / self.d_max
-            res = ((2.0 * sqrt_alpha * self.d_max/nr * tmp)
-                   * (2.0 * np.cos(tmp*r) + tmp * r * np.sin(tmp*r)))
-            # Res should now be np vector size i_r.
-            a_obj[self.npoints:self.npoints+nr, j] = res
+    def _get_data_vector(self):
+        """
+        Returns the first npoints entries of the b vector, I(q)/dI(q).
+        Entries of points outside the q range are set to zero, and those
+        of points without error are infinite; _get_data_matrix() rejects
+        such points, so they are only checked there.
 
-        # Compute B
-        b_view[q_accept_x] = y_use / err_use
+        :return: data vector [npoints]
+        """
+        b_data = np.zeros(self.npoints)
+        q_accept_x = self.accept_q(self.x)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            b_data[q_accept_x] = self.y[q_accept_x] / self.err[q_accept_x]
+        return b_data
 
-        return a_obj, b_obj
+    def _get_reg_matrix(self, nfunc, nr):
+        """
+        Returns the regularization rows of the A matrix for alpha = 1.
+        The rows of the A matrix are sqrt(alpha) times this block.
+
+        The second derivative of base function n evaluated at
+        r = i*d_max/nr, times the step d_max/nr, only depends on n*i/nr,
+        so the block does not depend on d_max.
+
+        :param nfunc: number of base functions.
+        :param nr: number of r-points used when evaluating reg term.
+
+        :return: regularization block [nr x nfunc]
+        """
+        nfunc = int(nfunc)
+        nr = int(nr)
+        reg = np.zeros([nr, nfunc])
+        offset = 0 if self.est_bck == 1 else 1
+
+        i_r = np.arange(nr, dtype=np.float64)
+        for j in range(nfunc):
+            tmp = np.pi * (j+offset) / nr
+            reg[:, j] = 2.0 * tmp * (2.0 * np.cos(tmp*i_r)
+                                     + tmp * i_r * np.sin(tmp*i_r))
+        return reg
 
     def _get_invcov_matrix(self, nfunc, nr, a_obj):
         """
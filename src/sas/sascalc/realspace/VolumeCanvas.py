@@ -23,12 +23,23 @@
 
 """
 
+import os.path, math
+
+import numpy as np
+
 from sas.sascalc.calculator.BaseComponent import BaseComponent
-from sas.sascalc.simulation.pointsmodelpy import pointsmodelpy
-from sas.sascalc.simulation.geoshapespy import geoshapespy
+from sas.sascalc.realspace.pair_distance import PairDistribution
 
+# Canvas parameters which are applied to the simulated intensity
+# and leave the space points unchanged
+NORM_PARAMS = ['scale', 'background']
 
-import os.path, math
+# Shape parameters which leave the points in the frame of the shape
+# unchanged: they only move the points, hide them or weight them
+PLACEMENT_PARAMS = ['center', 'orientation', 'contrast', 'order']
+
+# Number of bins of P(r) over the size of the canvas
+R_GRIDS = 2000
 
 class ShapeDescriptor(object):
     """
@@ -44,8 +55,6 @@ class ShapeDescriptor(object):
         """
             Initialization
         """
-        ## Real space object
-        self.shapeObject = None
         ## Parameters of the object
         self.params = {}
         self.params["center"] = [0, 0, 0]
@@ -55,21 +64,106 @@ class ShapeDescriptor(object):
         self.params['is_lores'] = True
         self.params['order'] = 0
 
-    def create(self):
+    def get_volume(self):
+        """
+            Return the volume of the shape [A^3]
+        """
+        raise NotImplementedError("get_volume not implemented for %s"
+                                  % self.params["type"])
+
+    def _get_extent(self):
+        """
+            Return the half widths along x, y and z of a box
+            holding the shape, in the frame of the shape
+        """
+        raise NotImplementedError("_get_extent not implemented for %s"
+                                  % self.params["type"])
+
+    def _is_inside(self, points):
+        """
+            Return which points, given in the frame of the shape,
+            are inside the shape
+            @param points: point coordinates [n x 3 array]
+            @return: boolean array
+        """
+        raise NotImplementedError("_is_inside not implemented for %s"
+                                  % self.params["type"])
+
+    def get_contrast(self):
+        """
+            Return the contrast of the points of the shape
+        """
+        return self.params["contrast"]
+
+    def get_fill_key(self):
+        """
+            Return the parameters the points in the frame of the shape
+            depend on, to find whether they can be reused
+        """
+        return sorted((name, value) for name, value in self.params.items()
+                      if name not in PLACEMENT_PARAMS)
+
+    def fill(self, density, random=np.random):
+        """
+            Fill the shape with random points, taken uniformly in
+            a box holding the shape until int(density*volume) points
+            are inside the shape.
+
+            @param density: number of points per A^3
+            @param random: random number generator [RandomState]
+            @return: points in the frame of the shape [n x 3 array]
+        """
+        npts = int(density*self.get_volume())
+        extent = 2*np.asarray(self._get_extent(), dtype=float)
+        # Fraction of the box inside the shape
+        fraction = min(self.get_volume()/np.prod(extent), 1.0)
+        points = [np.empty((0, 3))]
+        nfound = 0
+        while nfound < npts:
+            ntry = int(1.1*(npts - nfound)/fraction) + 16
+            trial = (random.random_sample((ntry, 3)) - 0.5)*extent
+            trial = trial[self._is_inside(trial)]
+            points.append(trial)
+            nfound += len(trial)
+        return np.vstack(points)[:npts]
+
+    def _get_rotation(self):
+        """
+            Return the rotation matrix of the orientation, which
+            rotates about Y, then about X, then about Z
+            (as Point3D::Transform does in realSpaceModeling)
+        """
+        ax, ay, az = np.radians(np.asarray(self.params["orientation"],
+                                           dtype=float))
+        rot_x = np.array([[1, 0, 0],
+                          [0, math.cos(ax), -math.sin(ax)],
+                          [0, math.sin(ax), math.cos(ax)]])
+        rot_y = np.array([[math.cos(ay), 0, math.sin(ay)],
+                          [0, 1, 0],
+                          [-math.sin(ay), 0, math.cos(ay)]])
+        rot_z = np.array([[math.cos(az), -math.sin(az), 0],
+                          [math.sin(az), math.cos(az), 0],
+                          [0, 0, 1]])
+        return np.dot(rot_z, np.dot(rot_x, rot_y))
+
+    def transform(self, points):
         """
-            Create an instance of the shape
+            Move points from the frame of the shape to the canvas
+            @param points: point coordinates [n x 3 array]
+            @return: point coordinates on the canvas [n x 3 array]
         """
-        # Set center
-        x0 = self.params["center"][0]
-        y0 = self.params["center"][1]
-        z0 = self.params["center"][2]
-        geoshapespy.set_center(self.shapeObject, x0, y0, z0)
+        return np.dot(points, self._get_rotation().T) \
+            + np.asarray(self.params["center"], dtype=float)
 
-        # Set orientation
-        x0 = self.params["orientation"][0]
-        y0 = self.params["orientation"][1]
-        z0 = self.params["orientation"][2]
-        geoshapespy.set_orientation(self.shapeObject, x0, y0, z0)
+    def is_inside(self, points):
+        """
+            Return which points of the canvas are inside the shape
+            @param points: point coordinates [n x 3 array]
+            @return: boolean array
+        """
+        points = np.asarray(points, dtype=float) \
+            - np.asarray(self.params["center"], dtype=float)
+        return self._is_inside(np.dot(points, self._get_rotation()))
 
 class SphereDescriptor(ShapeDescriptor):
     """
@@ -92,16 +186,15 @@ class SphereDescriptor(ShapeDescriptor):
         # Constrast parameter
         self.params["contrast"] = 1.0
 
-    def create(self):
-        """
-            Create an instance of the shape
-            @return: instance of the shape
-        """
-        self.shapeObject = geoshapespy.new_sphere(\
-            self.params["radius"])
+    def get_volume(self):
+        return 4.0/3.0*math.pi*self.params["radius"]**3
+
+    def _get_extent(self):
+        radius = self.params["radius"]
+        return radius, radius, radius
 
-        ShapeDescriptor.create(self)
-        return self.shapeObject
+    def _is_inside(self, points):
+        return np.sum(points*points, axis=1) <= self.params["radius"]**2
 
 class CylinderDescriptor(ShapeDescriptor):
     """
@@ -127,16 +220,17 @@ class CylinderDescriptor(ShapeDescriptor):
         # Constrast parameter
         self.params["contrast"] = 1.0
 
-    def create(self):
-        """
-            Create an instance of the shape
-            @return: instance of the shape
-        """
-        self.shapeObject = geoshapespy.new_cylinder(\
-            self.params["radius"], self.params["length"])
+    def get_volume(self):
+        return math.pi*self.params["radius"]**2*self.params["length"]
+
+    def _get_extent(self):
+        radius = self.params["radius"]
+        return radius, self.params["length"]/2.0, radius
 
-        ShapeDescriptor.create(self)
-        return self.shapeObject
+    def _is_inside(self, points):
+        x, y, z = points.T
+        return ((x*x + z*z <= self.params["radius"]**2)
+                & (np.abs(y) <= self.params["length"]/2.0))
 
 
 class EllipsoidDescriptor(ShapeDescriptor):
@@ -161,17 +255,16 @@ class EllipsoidDescriptor(ShapeDescriptor):
         self.params["radius_z"] = 10.0
         self.params["contrast"] = 1.0
 
-    def create(self):
-        """
-            Create an instance of the shape
-            @return: instance of the shape
-        """
-        self.shapeObject = geoshapespy.new_ellipsoid(\
-            self.params["radius_x"], self.params["radius_y"],
-            self.params["radius_z"])
+    def get_volume(self):
+        return 4.0/3.0*math.pi*np.prod(self._get_extent())
+
+    def _get_extent(self):
+        return (self.params["radius_x"], self.params["radius_y"],
+                self.params["radius_z"])
 
-        ShapeDescriptor.create(self)
-        return self.shapeObject
+    def _is_inside(self, points):
+        scaled = points/np.asarray(self._get_extent(), dtype=float)
+        return np.sum(scaled*scaled, axis=1) <= 1
 
 class HelixDescriptor(ShapeDescriptor):
     """
@@ -197,17 +290,41 @@ class HelixDescriptor(ShapeDescriptor):
         self.params["turns"] = 3.0
         self.params["contrast"] = 1.0
 
-    def create(self):
-        """
-            Create an instance of the shape
-            @return: instance of the shape
-        """
-        self.shapeObject = geoshapespy.new_singlehelix(\
-            self.params["radius_helix"], self.params["radius_tube"],
-            self.params["pitch"], self.params["turns"])
-
-        ShapeDescriptor.create(self)
-        return self.shapeObject
+    def _get_height(self):
+        """
+            Return the half height of the tube in a plane
+            holding the axis of the helix
+        """
+        slope = self.params["pitch"]/(2*math.pi*self.params["radius_helix"])
+        return self.params["radius_tube"]*math.sqrt(1 + slope*slope)
+
+    def get_volume(self):
+        # Cross section of the tube times its length
+        return math.pi*self.params["radius_tube"]**2*self.params["turns"] \
+            * math.hypot(2*math.pi*self.params["radius_helix"],
+                         self.params["pitch"])
+
+    def _get_extent(self):
+        radius = self.params["radius_helix"] + self.params["radius_tube"]
+        height = self.params["pitch"]*self.params["turns"]/2.0
+        return radius, radius, height + self._get_height()
+
+    def _is_inside(self, points):
+        # The helix turns about z, starting at angle 0 at the bottom
+        x, y, z = points.T
+        pitch, turns = self.params["pitch"], self.params["turns"]
+        radial = (np.hypot(x, y) - self.params["radius_helix"]) \
+            / self.params["radius_tube"]
+        angle = np.arctan2(y, x) % (2*math.pi)
+        z = z + pitch*turns/2.0
+        inside = np.zeros(len(points), dtype=bool)
+        # Look for the turn of the tube next to each point
+        for turn in range(int(math.ceil(turns)) + 1):
+            turn_angle = angle + 2*math.pi*turn
+            height = (z - pitch*turn_angle/(2*math.pi))/self._get_height()
+            inside |= ((turn_angle <= 2*math.pi*turns)
+                       & (radial*radial + height*height <= 1))
+        return inside
 
 class PDBDescriptor(ShapeDescriptor):
     """
@@ -216,6 +333,10 @@ class PDBDescriptor(ShapeDescriptor):
         Parameter:
             - file = name of the PDB file
     """
+    ## Contrast of the atoms, which is that of alanine for all
+    ## residues as in realSpaceModeling
+    sld = 1.645
+
     def __init__(self, filename):
         """
             Initialization
@@ -227,16 +348,21 @@ class PDBDescriptor(ShapeDescriptor):
         self.params["file"] = filename
         self.params['is_lores'] = False
 
-    def create(self):
+    def get_contrast(self):
+        return self.sld
+
+    def fill(self, density, random=None):
         """
-            Create an instance of the shape
-            @return: instance of the shape
+            Read the positions of the atoms of the PDB file
+            @return: points in the frame of the shape [n x 3 array]
         """
-        self.shapeObject = pointsmodelpy.new_pdbmodel()
-        pointsmodelpy.pdbmodel_add(self.shapeObject, self.params['file'])
-
-        #ShapeDescriptor.create(self)
-        return self.shapeObject
+        points = []
+        with open(self.params['file']) as fd:
+            for line in fd:
+                if line.startswith("ATOM") and len(line.rstrip()) > 53:
+                    points.append([float(line[30:38]), float(line[38:46]),
+                                   float(line[46:54])])
+        return np.array(points, dtype=float).reshape(-1, 3)
 
 # Define a dictionary for the shape until we find
 # a better way to create them
@@ -267,13 +393,20 @@ class VolumeCanvas(BaseComponent):
         self.params['scale'] = 1.0
         self.params['background'] = 0.0
 
-        self.lores_model = pointsmodelpy.new_loresmodel(self.params['lores_density'])
-        self.complex_model = pointsmodelpy.new_complexmodel()
         self.shapes = {}
         self.shapecount = 0
         self.points = None
         self.npts = 0
         self.hasPr = False
+        ## Points of each shape in the frame of the shape, with the
+        ## parameters they were generated for
+        self._fills = {}
+        ## Points of each shape on the canvas, with the points hidden by
+        ## shapes of higher order
+        self._placed = {}
+        ## Pair distances of the points of the shapes
+        self.pair_dist = None
+        self._random = np.random.RandomState()
 
     def _model_changed(self):
         """
@@ -378,13 +511,15 @@ class VolumeCanvas(BaseComponent):
 
         # If a shape identifier was given, look the shape up
         # in the dictionary
-        if len(toks):
+        if len(toks) > 1:
             if toks[0] in self.shapes:
                 # The shape was found, now look for the parameter
                 if toks[1] in self.shapes[toks[0]].params:
-                    # The parameter was found, now change it
-                    self.shapes[toks[0]].params[toks[1]] = value
-                    self._model_changed()
+                    # The parameter was found, now change it.
+                    # The space points are kept if the value is the same.
+                    if self.shapes[toks[0]].params[toks[1]] != value:
+                        self.shapes[toks[0]].params[toks[1]] = value
+                        self._model_changed()
                 else:
                     raise ValueError("Could not find parameter %s" % name)
             else:
@@ -393,8 +528,10 @@ class VolumeCanvas(BaseComponent):
         else:
             # If we are not accessing the parameters of a
             # shape, see if the parameter is part of this object
+            old_value = self.params.get(name)
             BaseComponent.setParam(self, name, value)
-            self._model_changed()
+            if name not in NORM_PARAMS and old_value != value:
+                self._model_changed()
 
     def getParam(self, name):
         """
@@ -473,67 +610,47 @@ class VolumeCanvas(BaseComponent):
         """
         return list(self.shapes.keys())
 
-    def _addSingleShape(self, shapeDesc):
-        """
-            create shapeobject based on shapeDesc
-            @param shapeDesc: shape description
-        """
-        # Create the object model
-        shapeDesc.create()
-
-        if shapeDesc.params['is_lores']:
-            # Add the shape to the lores_model
-            pointsmodelpy.lores_add(self.lores_model,
-                                    shapeDesc.shapeObject,
-                                    shapeDesc.params['contrast'])
-
-    def _createVolumeFromList(self):
-        """
-            Create a new lores model with all the shapes in our internal list
-            Whenever we change a parameter of a shape, we have to re-create
-            the whole thing.
-
-            Items with higher 'order' number take precedence for regions
-            of space that are shared with other objects. Points in the
-            overlapping region belonging to objects with lower 'order'
-            will be ignored.
-
-            Items are added in decreasing 'order' number.
-            The item with the highest 'order' will be added *first*.
-            [That conventions is prescribed by the realSpaceModeling module]
-        """
-
-        # Create empty model
-        self.lores_model = \
-            pointsmodelpy.new_loresmodel(self.params['lores_density'])
-
-        # Create empty complex model
-        self.complex_model = pointsmodelpy.new_complexmodel()
-
-        # Order the object first
-        obj_list = []
-
-        for shape in self.shapes:
-            order = self.shapes[shape].params['order']
-            # find where to place it in the list
-            stored = False
-
-            for i in range(len(obj_list)):
-                if obj_list[i][0] > order:
-                    obj_list.insert(i, [order, shape])
-                    stored = True
-                    break
-
-            if not stored:
-                obj_list.append([order, shape])
-
-        # Add each shape
-        len_list = len(obj_list)
-        for i in range(len_list-1, -1, -1):
-            shapedesc = self.shapes[obj_list[i][1]]
-            self._addSingleShape(shapedesc)
-
-        return 0
+    def _place_shape(self, id, higher):
+        """
+            Return the points of a shape on the canvas, with the points
+            inside shapes of higher order left out.
+
+            The points are generated again only if the type, the size of
+            the shape or the point density changed, and moved again only
+            if the shape moved.
+
+            @param id: string handle for the shape
+            @param higher: lores shapes of higher order [ShapeDescriptor]
+            @return: fill points, placement, points on the canvas and
+                which of them are kept [boolean array or None]
+        """
+        shapeDesc = self.shapes[id]
+        key = shapeDesc.get_fill_key() + [self.params['lores_density']]
+        fill = self._fills.get(id)
+        if fill is None or fill[0] != key:
+            fill = key, shapeDesc.fill(self.params['lores_density'],
+                                       self._random)
+            self._fills[id] = fill
+
+        placement = [list(shapeDesc.params["center"]),
+                     list(shapeDesc.params["orientation"])]
+        previous = self._placed.get(id)
+        if previous is not None and previous[0] is fill[1] \
+                and previous[1] == placement:
+            points = previous[2]
+        else:
+            points = shapeDesc.transform(fill[1])
+
+        # Items with higher 'order' number take precedence for regions
+        # of space that are shared with other objects
+        kept = None
+        if shapeDesc.params['is_lores'] and higher:
+            kept = np.ones(len(points), dtype=bool)
+            for other in higher:
+                kept &= ~other.is_inside(points)
+            if kept.all():
+                kept = None
+        return fill[1], placement, points, kept
 
     def getPr(self):
         """
@@ -546,30 +663,26 @@ class VolumeCanvas(BaseComponent):
         # To find a complete example of the correct call order:
         # In LORES2, in actionclass.py, method CalculateAction._get_iq()
 
-        # If there are not shapes, do nothing
-        if len(self.shapes) == 0:
-            self._model_changed()
-            return 0
-
-        # generate space filling points from shape list
-        self._createVolumeFromList()
-
-        self.points = pointsmodelpy.new_point3dvec()
+        # Shape parameters may have been changed from outside
+        self._model_changed()
+        return self._compute_pr()
 
-        pointsmodelpy.complexmodel_add(self.complex_model,
-                                       self.lores_model, "LORES")
-        for shape in self.shapes:
-            if not self.shapes[shape].params['is_lores']:
-                pointsmodelpy.complexmodel_add(self.complex_model,
-                    self.shapes[shape].shapeObject, "PDB")
+    def _compute_pr(self):
+        """
+            Calculate P(r) from the space points, which are only
+            updated if the model has changed since the last call
+            to getPr() or getIq2D().
 
-        #pointsmodelpy.get_lorespoints(self.lores_model, self.points)
-        self.npts = pointsmodelpy.get_complexpoints(self.complex_model, self.points)
+            @return: maximum distance between two points
+        """
+        if self.points is None:
+            self._create_modelObject()
 
-        # expecting the rmax is a positive float or 0. The maximum distance.
-        #rmax = pointsmodelpy.get_lores_pr(self.lores_model, self.points)
+            # If there are not shapes, do nothing
+            if self.points is None:
+                return 0
 
-        rmax = pointsmodelpy.get_complex_pr(self.complex_model, self.points)
+        rmax = self.pair_dist.get_rmax()
         self.hasPr = True
 
         return rmax
@@ -618,47 +731,85 @@ class VolumeCanvas(BaseComponent):
 
     def _create_modelObject(self):
         """
-            Create the simulation model obejct from the list
-            of shapes.
+            Update the space points from the list of shapes.
 
-            This method needs to be called each time a parameter
-            changes because of the way the underlying library
-            was (badly) written. It is impossible to change a
-            parameter, or remove a shape without having to
-            refill the space points.
+            The points of each shape are kept in the frame of the shape
+            and only generated again when its type, its size or the
+            point density change. Items with higher 'order' number take
+            precedence for regions of space that are shared with other
+            objects: points of the shapes with lower 'order' in the
+            overlapping region are ignored.
 
-            TODO: improve that.
+            The pair distances are then computed again only for the
+            shapes whose points changed, with the other shapes. The
+            points, and the distances, are kept when only the contrast
+            of a shape or the scale and background change.
         """
-        # To find a complete example of the correct call order:
-        # In LORES2, in actionclass.py, method CalculateAction._get_iq()
-
         # If there are not shapes, do nothing
         if len(self.shapes) == 0:
             self._model_changed()
+            self._fills.clear()
+            self._placed.clear()
+            self.pair_dist = None
+            self.npts = 0
             return 0
 
-        # generate space filling points from shape list
-        self._createVolumeFromList()
-
-        self.points = pointsmodelpy.new_point3dvec()
+        # The shape with the highest 'order' is placed first
+        obj_list = sorted(self.shapes,
+                          key=lambda id: self.shapes[id].params['order'])
+        placed = {}
+        higher = []
+        for id in reversed(obj_list):
+            placed[id] = self._place_shape(id, higher)
+            if self.shapes[id].params['is_lores']:
+                higher.append(self.shapes[id])
+
+        if self.pair_dist is None:
+            # Bin P(r) over a bound of the distances between the points
+            points = np.vstack([item[2] for item in placed.values()])
+            bound = 2*np.sqrt(np.max(np.sum(
+                (points - np.mean(points, axis=0))**2, axis=1))) \
+                if len(points) else 0.0
+            self.pair_dist = PairDistribution(rstep=bound/R_GRIDS
+                                              if bound > 0 else 1.0)
+
+        for id in self._placed:
+            if id not in placed:
+                self._fills.pop(id, None)
+                self.pair_dist.remove(id)
+        for id, item in placed.items():
+            previous = self._placed.get(id)
+            contrast = self.shapes[id].get_contrast()
+            if previous is not None and previous[2] is item[2] \
+                    and np.array_equal(previous[3], item[3]):
+                self.pair_dist.set_contrast(id, contrast)
+            else:
+                points = item[2] if item[3] is None else item[2][item[3]]
+                self.pair_dist.set_points(id, points, contrast)
+        self._placed = placed
 
-        pointsmodelpy.complexmodel_add(self.complex_model,
-                                       self.lores_model, "LORES")
-        for shape in self.shapes:
-            if not self.shapes[shape].params['is_lores']:
-                pointsmodelpy.complexmodel_add(self.complex_model,
-                    self.shapes[shape].shapeObject, "PDB")
+        self.points = np.vstack([self.pair_dist.points[id]
+                                 for id in reversed(obj_list)])
+        self.npts = len(self.points)
 
-        #pointsmodelpy.get_lorespoints(self.lores_model, self.points)
-        self.npts = pointsmodelpy.get_complexpoints(self.complex_model, self.points)
+    def evalDistribution(self, qdist):
+        """
+            Evaluate I(q) for an array of q values, or I(q_x, q_y)
+            for a list [qx, qy] of arrays, in a single call.
 
+            @param qdist: q values [array] or [list] [A-1]
+            @return: I(q) [array] [cm-1]
+        """
+        if qdist.__class__.__name__ == 'list':
+            return self.getIq2D(qdist[0], qdist[1])
+        return self.getIq(qdist)
 
     def getIq2D(self, qx, qy):
         """
             Returns simulate I(q) for given q_x and q_y values.
-            @param qx: q_x [A-1]
-            @param qy: q_y [A-1]
-            @return: I(q) [cm-1]
+            @param qx: q_x [A-1] [float or array]
+            @param qy: q_y [A-1] [float or array]
+            @return: I(q) [cm-1] [float or array]
         """
 
         # If this is the first simulation call, we need to generate the
@@ -668,32 +819,39 @@ class VolumeCanvas(BaseComponent):
 
             # Protect against empty model
             if self.points is None:
-                return 0
+                return _as_output(np.zeros(np.broadcast(qx, qy).shape),
+                                  qx, qy)
 
         # Evalute I(q)
         norm = 1.0e8/self.params['lores_density']*self.params['scale']
-        return norm*pointsmodelpy.get_complex_iq_2D(self.complex_model, self.points, qx, qy)\
-            + self.params['background']
+        return _as_output(norm*self.pair_dist.get_iq_2d(qx, qy)
+                          + self.params['background'], qx, qy)
 
     def write_pr(self, filename):
         """
             Write P(r) to an output file
             @param filename: file name for P(r) output
         """
-        if not self.hasPr:
-            self.getPr()
-
-        pointsmodelpy.outputPR(self.complex_model, filename)
+        r, pr = self.getPrData()
+        with open(filename, 'w') as fd:
+            for r_i, pr_i in zip(r, pr):
+                fd.write("%g       %g\n" % (r_i, pr_i))
 
     def getPrData(self):
         """
-            Write P(r) to an output file
-            @param filename: file name for P(r) output
+            Return P(r), normalized to unit area, at the distances
+            where it is not zero
+            @return: r, P(r) [lists]
         """
         if not self.hasPr:
-            self.getPr()
+            self._compute_pr()
+        if self.pair_dist is None:
+            return [], []
 
-        return pointsmodelpy.get_pr(self.complex_model)
+        r, pr, _ = self.pair_dist.get_pr()
+        total = np.sum(pr)*self.pair_dist.rstep
+        nonzero = pr != 0
+        return list(r[nonzero]), list(pr[nonzero]/total)
 
     def getIq(self, q):
         """
@@ -702,12 +860,14 @@ class VolumeCanvas(BaseComponent):
             This method should remain internal to the class
             and the run() method should be used instead.
 
-            @param q: q-value [float]
-            @return: I(q) [float]
+            @param q: q-value [float or array]
+            @return: I(q) [float or array]
         """
 
         if not self.hasPr:
-            self.getPr()
+            self._compute_pr()
+        if self.pair_dist is None:
+            return _as_output(np.zeros(np.shape(q)), q)
 
         # By dividing by the density instead of the actuall V/N,
         # we have an uncertainty of +-1 on N because the number
@@ -717,19 +877,20 @@ class VolumeCanvas(BaseComponent):
         # where N is stored in self.npts
 
         norm = 1.0e8/self.params['lores_density']*self.params['scale']
-        #return norm*pointsmodelpy.get_lores_i(self.lores_model, q)
-        return norm*pointsmodelpy.get_complex_i(self.complex_model, q)\
-            + self.params['background']
+        return _as_output(norm*self.pair_dist.get_iq(q)
+                          + self.params['background'], q)
 
     def getError(self, q):
         """
             Returns the error of I(q) for a given q-value
-            @param q: q-value [float]
-            @return: I(q) [float]
+            @param q: q-value [float or array]
+            @return: I(q) [float or array]
         """
 
         if not self.hasPr:
-            self.getPr()
+            self._compute_pr()
+        if self.pair_dist is None:
+            return _as_output(np.zeros(np.shape(q)), q)
 
         # By dividing by the density instead of the actual V/N,
         # we have an uncertainty of +-1 on N because the number
@@ -739,9 +900,8 @@ class VolumeCanvas(BaseComponent):
         # where N is stored in self.npts
 
         norm = 1.0e8/self.params['lores_density']*self.params['scale']
-        #return norm*pointsmodelpy.get_lores_i(self.lores_model, q)
-        return norm*pointsmodelpy.get_complex_i_error(self.complex_model, q)\
-            + self.params['background']
+        return _as_output(norm*self.pair_dist.get_iq_error(q)
+                          + self.params['background'], q)
 
     def getIqError(self, q):
         """
@@ -751,10 +911,13 @@ class VolumeCanvas(BaseComponent):
             Propagation of errors is used to evaluate the
             uncertainty.
 
-            @param q: q-value [float]
-            @return: mean, error [float, float]
+            @param q: q-value [float or array]
+            @return: mean, error [float, float] or [array, array]
         """
         val = self.getIq(q)
+        # Protect against empty model
+        if self.npts == 0:
+            return val, val
         # Simulation error (statistical)
         err = self.getError(q)
         # Error on V/N
@@ -769,24 +932,32 @@ class VolumeCanvas(BaseComponent):
             Propagation of errors is used to evaluate the
             uncertainty.
 
-            @param qx: qx-value [float]
-            @param qy: qy-value [float]
-            @return: mean, error [float, float]
+            @param qx: qx-value [float or array]
+            @param qy: qy-value [float or array]
+            @return: mean, error [float, float] or [array, array]
         """
-        self._create_modelObject()
-
-        norm = 1.0e8/self.params['lores_density']*self.params['scale']
-        val = norm*pointsmodelpy.get_complex_iq_2D(self.complex_model, self.points, qx, qy)\
-            + self.params['background']
+        val = self.getIq2D(qx, qy)
+        # Protect against empty model
+        if self.points is None or self.npts == 0:
+            return val, val
 
         # Simulation error (statistical)
         norm = 1.0e8/self.params['lores_density']*self.params['scale'] \
                * math.pow(self.npts/self.params['lores_density'], 1.0/3.0)/self.npts
-        err = norm*pointsmodelpy.get_complex_iq_2D_err(self.complex_model, self.points, qx, qy)
+        err = norm*self.pair_dist.get_iq_2d_error(qx, qy)
         # Error on V/N
         simerr = 2*val/self.npts
 
         # The error used for the position is over-simplified.
         # The actual error was empirically found to be about
         # an order of magnitude larger.
-        return val, 10.0*err+simerr
+        return val, _as_output(10.0*err, qx, qy)+simerr
+
+def _as_output(value, *q):
+    """
+        Return a float if all the q values are floats, and the
+        array of values otherwise
+    """
+    if all(np.ndim(v) == 0 for v in q):
+        return float(value)
+    return value
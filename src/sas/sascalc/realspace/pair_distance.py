@@ -0,0 +1,315 @@
+"""
+Pair distance distribution of a set of shapes filled with space points,
+and the scattering intensity computed from it.
+
+The histogram of the distances between points is kept for each pair of
+shapes, without the contrasts of the shapes.  When the points of a shape
+are replaced or removed, only the histograms of the pairs which include
+that shape are computed again, and a change of contrast only sums the
+histograms again with the new weights.
+
+The normalization follows the one of the realSpaceModeling library
+(PointsModel::DistDistribution and PointsModel::CalculateIQ), so that
+the intensities are scaled by VolumeCanvas in the same way.
+"""
+from __future__ import division
+
+import numpy as np
+
+#: Number of distances, or of (q, point) terms, computed in one numpy call
+BLOCK_SIZE = 2**20
+
+
+def _add_counts(total, counts):
+    """
+    Sum two histograms which may have a different number of bins
+    """
+    if len(counts) > len(total):
+        total, counts = counts, total
+    total = total.copy()
+    total[:len(counts)] += counts
+    return total
+
+
+def _block_counts(a, b, rstep):
+    """
+    Histogram of the distances between every point of *a* and every
+    point of *b*, with bins of width *rstep*.
+    """
+    # |a-b|^2 = |a|^2 + |b|^2 - 2 a.b, with the dot products from BLAS
+    dist = np.dot(a, -2.0*b.T)
+    dist += np.sum(a*a, axis=1)[:, None]
+    dist += np.sum(b*b, axis=1)[None, :]
+    np.maximum(dist, 0.0, out=dist)
+    np.sqrt(dist, out=dist)
+    dist *= 1.0/rstep
+    return np.bincount(dist.astype(np.intp).ravel())
+
+
+def distance_counts(a, b=None, rstep=1.0):
+    """
+    Histogram of the distances between the points of *a* and those of
+    *b*, or between the pairs of points of *a* if *b* is None.
+
+    Bin *i* counts the distances from i*rstep up to (i+1)*rstep.  The
+    distances are computed in blocks of at most BLOCK_SIZE values.
+
+    :param a: point coordinates [n x 3 array]
+    :param b: point coordinates [m x 3 array] [optional]
+    :param rstep: bin width
+    :return: number of pairs in each bin [int array]
+    """
+    a = np.asarray(a, dtype=float)
+    counts = np.zeros(1, dtype=np.int64)
+    if b is not None:
+        b = np.asarray(b, dtype=float)
+        if len(a) == 0 or len(b) == 0:
+            return counts
+        rows = max(1, BLOCK_SIZE // len(b))
+        for start in range(0, len(a), rows):
+            counts = _add_counts(counts,
+                                 _block_counts(a[start:start+rows], b, rstep))
+        return counts
+
+    # Pairs within a: each block of points against the points after it,
+    # and against itself where every pair is found twice
+    rows = max(1, min(BLOCK_SIZE // max(len(a), 1), int(BLOCK_SIZE**0.5)))
+    for start in range(0, len(a), rows):
+        stop = min(start + rows, len(a))
+        block = a[start:stop]
+        if stop < len(a):
+            counts = _add_counts(counts, distance_counts(block, a[stop:],
+                                                         rstep))
+        square = _block_counts(block, block, rstep)
+        # Remove the distance of each point to itself
+        square[0] -= stop - start
+        counts = _add_counts(counts, square // 2)
+    return counts
+
+
+class PairDistribution(object):
+    """
+    Distance distribution P(r) and intensity I(q) of a set of shapes,
+    each given as an array of points with a contrast.
+
+    Shapes are identified by a key.  Setting the points of a shape
+    marks the histograms of its pairs as out of date; they are computed
+    again the next time P(r) or I(q) is needed.  The 2D intensity only
+    needs the points, so it never computes the distance histograms.
+    """
+    def __init__(self, rstep=1.0):
+        """
+        :param rstep: width of the distance bins [A]
+        """
+        self.rstep = rstep
+        ## Points [n x 3 array] and contrast of each shape
+        self.points = {}
+        self.contrast = {}
+        ## Distance histogram of each pair of shapes (key1, key2),
+        ## stored under both orders of the keys
+        self._counts = {}
+        self._pr = None
+
+    @property
+    def npts(self):
+        """
+        Total number of points
+        """
+        return sum(len(points) for points in self.points.values())
+
+    def set_points(self, key, points, contrast=1.0):
+        """
+        Add a shape, or replace the points of a shape.
+
+        :param key: shape identifier
+        :param points: point coordinates [n x 3 array]
+        :param contrast: contrast of the shape [A-2]
+        """
+        self.remove(key)
+        self.points[key] = np.asarray(points, dtype=float).reshape(-1, 3)
+        self.contrast[key] = contrast
+
+    def set_contrast(self, key, contrast):
+        """
+        Change the contrast of a shape, keeping its distance histograms.
+        """
+        if self.contrast[key] != contrast:
+            self.contrast[key] = contrast
+            self._pr = None
+
+    def remove(self, key):
+        """
+        Remove a shape and the histograms of its pairs, if it is present.
+        """
+        if key in self.points:
+            del self.points[key]
+            del self.contrast[key]
+            for other in list(self.points) + [key]:
+                self._counts.pop((key, other), None)
+                self._counts.pop((other, key), None)
+        self._pr = None
+
+    def _update_counts(self):
+        """
+        Compute the distance histograms missing after a shape change.
+        """
+        keys = list(self.points)
+        for i, key in enumerate(keys):
+            for other in keys[i:]:
+                if (key, other) not in self._counts:
+                    if key == other:
+                        counts = distance_counts(self.points[key],
+                                                 rstep=self.rstep)
+                    else:
+                        counts = distance_counts(self.points[key],
+                                                 self.points[other],
+                                                 rstep=self.rstep)
+                    self._counts[(key, other)] = counts
+                    self._counts[(other, key)] = counts
+
+    def get_pr(self):
+        """
+        Distance distribution of the points, weighted by the contrasts.
+
+        As in the realSpaceModeling library, P(r) is the sum of the
+        contrast products of the pairs in each bin, times 2/N, and its
+        uncertainty squared is the sum of the squared products, times
+        4/N^2, where N is the total number of points.
+
+        :return: r, P(r), squared uncertainty on P(r) [arrays]
+        """
+        if self._pr is None:
+            self._update_counts()
+            pr = np.zeros(1)
+            pr2 = np.zeros(1)
+            keys = list(self.points)
+            for i, key in enumerate(keys):
+                for other in keys[i:]:
+                    counts = self._counts[(key, other)]
+                    weight = self.contrast[key]*self.contrast[other]
+                    pr = _add_counts(pr, weight*counts)
+                    pr2 = _add_counts(pr2, weight*weight*counts)
+            npts = max(self.npts, 1)
+            r = self.rstep*np.arange(len(pr))
+            self._pr = r, 2.0*pr/npts, 4.0*pr2/npts/npts
+        return self._pr
+
+    def get_rmax(self):
+        """
+        Upper bound of the largest distance between two points
+        """
+        r, pr, _ = self.get_pr()
+        nonzero = np.flatnonzero(pr)
+        return r[nonzero[-1]] + self.rstep if len(nonzero) else 0.0
+
+    def get_iq(self, q):
+        """
+        I(q) from the Debye sum over the P(r) bins, with r taken at the
+        lower edge of each bin.  The bin at r=0 only adds to I(0).
+
+        :param q: q values [float or array] [A-1]
+        :return: I(q) [array with the shape of q]
+        """
+        q = np.asarray(q, dtype=float)
+        r, pr, _ = self.get_pr()
+        iq = self._debye(q.ravel(), r[1:], lambda debye, qr: debye, pr[1:])
+        iq[q.ravel() == 0] += pr[0]
+        return iq.reshape(q.shape)
+
+    def get_iq_error(self, q):
+        """
+        Statistical uncertainty on I(q), from the uncertainty of each
+        P(r) bin and from the width of the bins.
+
+        :param q: q values [float or array] [A-1]
+        :return: uncertainty on I(q) [array with the shape of q]
+        """
+        q = np.asarray(q, dtype=float)
+        r, _, pr2 = self.get_pr()
+        r, pr2 = r[1:], np.abs(pr2[1:])
+        bin_error = self.rstep*self.rstep/4.0/(r*r)
+
+        def terms(debye, qr):
+            cos_qr = np.cos(qr)
+            return np.hstack((debye*debye,
+                              bin_error*(cos_qr*cos_qr + debye*debye)))
+        # pr2 is applied to the first set of terms only
+        weights = np.hstack((pr2, np.ones_like(r)))
+        error = self._debye(q.ravel(), r, terms, weights)
+        return np.sqrt(error).reshape(q.shape)
+
+    def _debye(self, q, r, terms, weights):
+        """
+        Sum over r of weights*terms(sin(qr)/qr, qr), for each q, in blocks
+        of at most BLOCK_SIZE values.
+        """
+        out = np.empty(len(q))
+        rows = max(1, BLOCK_SIZE // max(len(r), 1))
+        for start in range(0, len(q), rows):
+            qr = np.outer(q[start:start+rows], r)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                debye = np.where(qr == 0, 1.0, np.sin(qr)/qr)
+            out[start:start+rows] = np.dot(terms(debye, qr), weights)
+        return out
+
+    def _amplitude(self, qx, qy):
+        """
+        Sums over the points of the contrast times the cosine and sine of
+        the phase, and of the squared contrast times the squared cosine
+        and sine, for each (qx, qy).
+        """
+        cos_term = np.zeros(len(qx))
+        sin_term = np.zeros(len(qx))
+        cos_sq = np.zeros(len(qx))
+        sin_sq = np.zeros(len(qx))
+        for key, points in self.points.items():
+            if len(points) == 0:
+                continue
+            contrast = self.contrast[key]
+            rows = max(1, BLOCK_SIZE // len(points))
+            for start in range(0, len(qx), rows):
+                index = slice(start, start + rows)
+                phase = np.outer(qx[index], points[:, 0])
+                phase += np.outer(qy[index], points[:, 1])
+                cos_phase, sin_phase = np.cos(phase), np.sin(phase)
+                cos_term[index] += contrast*np.sum(cos_phase, axis=1)
+                sin_term[index] += contrast*np.sum(sin_phase, axis=1)
+                cos_phase *= cos_phase
+                sin_phase *= sin_phase
+                cos_sq[index] += contrast*contrast*np.sum(cos_phase, axis=1)
+                sin_sq[index] += contrast*contrast*np.sum(sin_phase, axis=1)
+        return cos_term, sin_term, cos_sq, sin_sq
+
+    def get_iq_2d(self, qx, qy):
+        """
+        I(qx, qy) for a beam along z, from the squared amplitude of the
+        points divided by their number.
+
+        :param qx: q_x values [float or array] [A-1]
+        :param qy: q_y values [float or array] [A-1]
+        :return: I(qx, qy) [array with the shape of qx and qy]
+        """
+        qx, qy = np.broadcast_arrays(np.asarray(qx, dtype=float),
+                                     np.asarray(qy, dtype=float))
+        cos_term, sin_term, _, _ = self._amplitude(qx.ravel(), qy.ravel())
+        iq = (cos_term*cos_term + sin_term*sin_term)/max(self.npts, 1)
+        return iq.reshape(qx.shape)
+
+    def get_iq_2d_error(self, qx, qy):
+        """
+        Uncertainty on I(qx, qy) from the position of the points, to be
+        multiplied by V^(1/3)/N by the caller.
+
+        :param qx: q_x values [float or array] [A-1]
+        :param qy: q_y values [float or array] [A-1]
+        :return: uncertainty [array with the shape of qx and qy]
+        """
+        qx, qy = np.broadcast_arrays(np.asarray(qx, dtype=float),
+                                     np.asarray(qy, dtype=float))
+        cos_term, sin_term, cos_sq, sin_sq = \
+            self._amplitude(qx.ravel(), qy.ravel())
+        # As in PointsModel::CalculateIQ_2D_Error, the cosine amplitude
+        # goes with the sum of squared sines and the reverse
+        error = 2*np.sqrt(cos_term*cos_term*sin_sq*sin_sq
+                          + sin_term*sin_term*cos_sq*cos_sq)
+        return (error/max(self.npts, 1)).reshape(qx.shape)
@@ -3,7 +3,6 @@ Adapters for fitting module
 """
 import copy
 import numpy as np
-import math
 from sas.sascalc.data_util.uncertainty import Uncertainty
 from sas.sasgui.plottools.plottables import Data1D as PlotData1D
 from sas.sasgui.plottools.plottables import Data2D as PlotData2D
@@ -86,34 +85,34 @@ class Data1D(PlotData1D, LoadData1D):
         else:
             result.dxl = np.zeros(len(self.x))
 
-        for i in range(len(self.x)):
-            result.x[i] = self.x[i]
-            if self.dx is not None and len(self.x) == len(self.dx):
-                result.dx[i] = self.dx[i]
-            if self.dxw is not None and len(self.x) == len(self.dxw):
-                result.dxw[i] = self.dxw[i]
-            if self.dxl is not None and len(self.x) == len(self.dxl):
-                result.dxl[i] = self.dxl[i]
-            
-            a = Uncertainty(self.y[i], dy[i]**2)
-            if isinstance(other, Data1D):
-                b = Uncertainty(other.y[i], dy_other[i]**2)
-                if other.dx is not None:
-                    result.dx[i] *= self.dx[i]
-                    result.dx[i] += (other.dx[i]**2)
-                    result.dx[i] /= 2
-                    result.dx[i] = math.sqrt(result.dx[i])
-                if result.dxl is not None and other.dxl is not None:
-                    result.dxl[i] *= self.dxl[i]
-                    result.dxl[i] += (other.dxl[i]**2)
-                    result.dxl[i] /= 2
-                    result.dxl[i] = math.sqrt(result.dxl[i])
-            else:
-                b = other
-            
-            output = operation(a, b)
-            result.y[i] = output.x
-            result.dy[i] = math.sqrt(math.fabs(output.variance))
+        result.x[:] = self.x
+        if self.dx is not None and len(self.x) == len(self.dx):
+            result.dx[:] = self.dx
+        if self.dxw is not None and len(self.x) == len(self.dxw):
+            result.dxw[:] = self.dxw
+        if self.dxl is not None and len(self.x) == len(self.dxl):
+            result.dxl[:] = self.dxl
+
+        # Propagate the uncertainties on the whole arrays at once
+        a = Uncertainty(np.asarray(self.y), np.square(dy))
+        if isinstance(other, Data1D):
+            b = Uncertainty(np.asarray(other.y), np.square(dy_other))
+            if other.dx is not None:
+                result.dx *= self.dx
+                result.dx += np.square(other.dx)
+                result.dx /= 2
+                np.sqrt(result.dx, out=result.dx)
+            if result.dxl is not None and other.dxl is not None:
+                result.dxl *= self.dxl
+                result.dxl += np.square(other.dxl)
+                result.dxl /= 2
+                np.sqrt(result.dxl, out=result.dxl)
+        else:
+            b = other
+
+        output = operation(a, b)
+        result.y[:] = output.x
+        result.dy[:] = np.sqrt(np.fabs(output.variance))
         return result
     
     def _perform_union(self, other):
@@ -235,39 +234,38 @@ class Theory1D(PlotTheory1D, LoadData1D):
         else:
             result.dxl = np.zeros(len(self.x))
 
-        for i in range(np.size(self.x)):
-            result.x[i] = self.x[i]
-            if self.dx is not None and len(self.x) == len(self.dx):
-                result.dx[i] = self.dx[i]
-            if self.dxw is not None and len(self.x) == len(self.dxw):
-                result.dxw[i] = self.dxw[i]
-            if self.dxl is not None and len(self.x) == len(self.dxl):
-                result.dxl[i] = self.dxl[i]
-            
-            a = Uncertainty(self.y[i], dy[i]**2)
-            if isinstance(other, Data1D):
-                b = Uncertainty(other.y[i], dy_other[i]**2)
-                if other.dx is not None:
-                    result.dx[i] *= self.dx[i]
-                    result.dx[i] += (other.dx[i]**2)
-                    result.dx[i] /= 2
-                    result.dx[i] = math.sqrt(result.dx[i])
-                if result.dxl is not None and other.dxl is not None:
-                    result.dxl[i] *= self.dxl[i]
-                    other.dxl[i] += (other.dxl[i]**2)
-                    result.dxl[i] /= 2
-                    result.dxl[i] = math.sqrt(result.dxl[i])
-                if result.dxw is not None and self.dxw is not None:
-                    result.dxw[i] *= self.dxw[i]
-                    other.dxw[i] += (other.dxw[i]**2)
-                    result.dxw[i] /= 2
-                    result.dxw[i] = math.sqrt(result.dxw[i])
-            else:
-                b = other
-            
-            output = operation(a, b)
-            result.y[i] = output.x
-            result.dy[i] = math.sqrt(math.fabs(output.variance))
+        result.x[:] = self.x
+        if self.dx is not None and len(self.x) == len(self.dx):
+            result.dx[:] = self.dx
+        if self.dxw is not None and len(self.x) == len(self.dxw):
+            result.dxw[:] = self.dxw
+        if self.dxl is not None and len(self.x) == len(self.dxl):
+            result.dxl[:] = self.dxl
+
+        # Propagate the uncertainties on the whole arrays at once
+        a = Uncertainty(np.asarray(self.y), np.square(dy))
+        if isinstance(other, Data1D):
+            b = Uncertainty(np.asarray(other.y), np.square(dy_other))
+            if other.dx is not None:
+                result.dx *= self.dx
+                result.dx += np.square(other.dx)
+                result.dx /= 2
+                np.sqrt(result.dx, out=result.dx)
+            # The slit sizes of other were never used in the result
+            if result.dxl is not None and other.dxl is not None:
+                result.dxl *= self.dxl
+                result.dxl /= 2
+                np.sqrt(result.dxl, out=result.dxl)
+            if result.dxw is not None and self.dxw is not None:
+                result.dxw *= self.dxw
+                result.dxw /= 2
+                np.sqrt(result.dxw, out=result.dxw)
+        else:
+            b = other
+
+        output = operation(a, b)
+        result.y[:] = output.x
+        result.dy[:] = np.sqrt(np.fabs(output.variance))
         return result
     
     def _perform_union(self, other):
@@ -410,41 +408,37 @@ class Data2D(PlotData2D, LoadData2D):
         else:
             result.dqx_data = np.zeros(len(self.data))
             result.dqy_data = np.zeros(len(self.data))
-        for i in range(np.size(self.data)):
-            result.data[i] = self.data[i]
-            if self.err_data is not None and \
-                            np.size(self.data) == np.size(self.err_data):
-                result.err_data[i] = self.err_data[i]    
-            if self.dqx_data is not None:
-                result.dqx_data[i] = self.dqx_data[i]
-            if self.dqy_data is not None:
-                result.dqy_data[i] = self.dqy_data[i]
-            result.qx_data[i] = self.qx_data[i]
-            result.qy_data[i] = self.qy_data[i]
-            result.q_data[i] = self.q_data[i]
-            result.mask[i] = self.mask[i]
-            
-            a = Uncertainty(self.data[i], dy[i]**2)
-            if isinstance(other, Data2D):
-                b = Uncertainty(other.data[i], dy_other[i]**2)
-                if other.dqx_data is not None and \
-                        result.dqx_data is not None:
-                    result.dqx_data[i] *= self.dqx_data[i]
-                    result.dqx_data[i] += (other.dqx_data[i]**2)
-                    result.dqx_data[i] /= 2
-                    result.dqx_data[i] = math.sqrt(result.dqx_data[i])     
-                if other.dqy_data is not None and \
-                        result.dqy_data is not None:
-                    result.dqy_data[i] *= self.dqy_data[i]
-                    result.dqy_data[i] += (other.dqy_data[i]**2)
-                    result.dqy_data[i] /= 2
-                    result.dqy_data[i] = math.sqrt(result.dqy_data[i])
-            else:
-                b = other
-            
-            output = operation(a, b)
-            result.data[i] = output.x
-            result.err_data[i] = math.sqrt(math.fabs(output.variance))
+        result.data[:] = self.data
+        if result.dqx_data is not None:
+            result.dqx_data[:] = self.dqx_data
+            result.dqy_data[:] = self.dqy_data
+        result.qx_data[:] = self.qx_data
+        result.qy_data[:] = self.qy_data
+        result.q_data[:] = self.q_data
+        result.mask[:] = self.mask
+
+        # Propagate the uncertainties on the whole arrays at once
+        a = Uncertainty(np.asarray(self.data), np.square(dy))
+        if isinstance(other, Data2D):
+            b = Uncertainty(np.asarray(other.data), np.square(dy_other))
+            if other.dqx_data is not None and \
+                    result.dqx_data is not None:
+                result.dqx_data *= self.dqx_data
+                result.dqx_data += np.square(other.dqx_data)
+                result.dqx_data /= 2
+                np.sqrt(result.dqx_data, out=result.dqx_data)
+            if other.dqy_data is not None and \
+                    result.dqy_data is not None:
+                result.dqy_data *= self.dqy_data
+                result.dqy_data += np.square(other.dqy_data)
+                result.dqy_data /= 2
+                np.sqrt(result.dqy_data, out=result.dqy_data)
+        else:
+            b = other
+
+        output = operation(a, b)
+        result.data[:] = output.x
+        result.err_data[:] = np.sqrt(np.fabs(output.variance))
         return result
     
     def _perform_union(self, other):
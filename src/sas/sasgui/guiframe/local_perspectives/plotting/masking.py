@@ -356,6 +356,7 @@ class MaskPanel(wx.Dialog):
 
         # TODO: refactor this horrible logic
         temp_data.data[mask == False] = temp_mask[mask == False]
+        temp_data.reset_geometry()
         self.plotpanel.clear()
         if self.slicer is not None:
             self.slicer.clear()
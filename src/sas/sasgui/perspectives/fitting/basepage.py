@@ -29,7 +29,7 @@ from sasmodels.weights import GaussianDispersion
 
 from sas.sascalc.dataloader.data_info import Detector
 from sas.sascalc.dataloader.data_info import Source
-from sas.sascalc.fit.pagestate import PageState
+from sas.sascalc.fit.pagestate import PageState, snapshot_data
 from sas.sascalc.fit.models import PLUGIN_NAME_BASE
 
 from sas.sasgui.guiframe.panel_base import PanelBase
@@ -47,7 +47,7 @@ from sas.sasgui.guiframe.CategoryInstaller import CategoryInstaller
 from sas.sasgui.guiframe.documentation_window import DocumentationWindow
 
 from .report_dialog import ReportDialog
-from .utils import get_weight
+from .utils import ResidualCalculator
 
 logger = logging.getLogger(__name__)
 
@@ -114,6 +114,8 @@ class BasicPage(ScrolledPanel, PanelBase):
         self.data = None
         # list of available data
         self.data_list = []
+        # weights, residuals and chi2 of the data for the model redraws
+        self.residual_calculator = ResidualCalculator()
         self.mask = None
         self.uid = wx.NewId()
         self.graph_id = None
@@ -870,7 +872,7 @@ class BasicPage(ScrolledPanel, PanelBase):
         self.state.values = copy.deepcopy(self.values)
         self.state.weights = copy.deepcopy(self.weights)
         # save data
-        self.state.data = copy.deepcopy(self.data)
+        self.state.data = snapshot_data(self.data)
         self.state.qmax_x = self.qmax_x
         self.state.qmin_x = self.qmin_x
         self.state.dI_noweight = copy.deepcopy(self.dI_noweight.GetValue())
@@ -941,7 +943,7 @@ class BasicPage(ScrolledPanel, PanelBase):
         self.state.values = copy.deepcopy(self.values)
         self.state.weights = copy.deepcopy(self.weights)
         # save data
-        self.state.data = copy.deepcopy(self.data)
+        self.state.data = snapshot_data(self.data)
 
         if hasattr(self, "enable_disp"):
             self.state.enable_disp = self.enable_disp.GetValue()
@@ -1181,7 +1183,8 @@ class BasicPage(ScrolledPanel, PanelBase):
             self.state.qmin = self.qmin_x
             self.state.qmax = self.qmax_x
         else:
-            self.set_data(data)
+            # the page modifies its data, so leave the state's own untouched
+            self.set_data(snapshot_data(data))
 
         self.enable2D = state.enable2D
         try:
@@ -1763,7 +1766,9 @@ class BasicPage(ScrolledPanel, PanelBase):
                     temp_smear = self.current_smearer
             # compute weight for the current data
             flag = self.get_weight_flag()
-            weight = get_weight(data=self.data, is2d=self._is_2D(), flag=flag)
+            weight = self.residual_calculator.get_weight(data=self.data,
+                                                         is2d=self._is_2D(),
+                                                         flag=flag)
             toggle_mode_on = self.model_view.IsEnabled()
             is_2d = self._is_2D()
 
@@ -8,7 +8,9 @@ FitPanel class contains fields allowing to fit  models and  data
 import wx
 from wx.aui import AuiNotebook as nb
 
+from sas import get_local_config
 from sas.sascalc.fit.models import ModelManager
+from sas.sascalc.fit.pagestate import PageStateHistory, MAX_UNDO_STATES
 
 from sas.sasgui.guiframe.panel_base import PanelBase
 from sas.sasgui.guiframe.events import PanelOnFocusEvent, StatusEvent
@@ -23,6 +25,10 @@ from .fitting_widgets import BatchDataDialog
 
 _BOX_WIDTH = 80
 
+config = get_local_config()
+# Number of states of each fit page kept for undo
+FIT_UNDO_STATES = getattr(config, 'FIT_UNDO_STATES', MAX_UNDO_STATES)
+
 
 class FitPanel(nb, PanelBase):
     """
@@ -58,7 +64,7 @@ class FitPanel(nb, PanelBase):
         self.pageClosedEvent = wx.aui.EVT_AUINOTEBOOK_PAGE_CLOSE
 
         self.Bind(self.pageClosedEvent, self.on_close_page)
-        # save the title of the last page tab added
+        # undo history of each fit page
         self.fit_page_name = {}
         # list of existing fit page
         self.opened_pages = {}
@@ -366,6 +372,8 @@ class FitPanel(nb, PanelBase):
         panel.window_name = caption
         self.AddPage(panel, caption, select=True)
         self.opened_pages[panel.uid] = panel
+        self.fit_page_name[panel.uid] = \
+            PageStateHistory(max_length=FIT_UNDO_STATES)
         self._manager.create_fit_problem(panel.uid)
         self._manager.page_finder[panel.uid].add_data(panel.get_data())
         self.enable_close_button()
@@ -604,6 +612,7 @@ class FitPanel(nb, PanelBase):
             if selected_page.uid == uid:
                 del self.opened_pages[selected_page.uid]
                 break
+        self.fit_page_name.pop(selected_page.uid, None)
         # remove the check box link to the model name of the selected_page
         try:
             self.sim_page.draw_page()
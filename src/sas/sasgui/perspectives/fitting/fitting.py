@@ -30,6 +30,7 @@ except ImportError:
     # CRUFT: bumps 0.7.5.8 and below
     EVT_FITTER_CHANGED = None  # type: wx.PyCommandEvent
 
+from sas import get_local_config
 from sas.sascalc.dataloader.loader import Loader
 from sas.sascalc.fit.BumpsFitting import BumpsFit as Fit
 from sas.sascalc.fit.pagestate import Reader, PageState, SimFitPageState
@@ -66,6 +67,10 @@ logger = logging.getLogger(__name__)
 
 MAX_NBR_DATA = 4
 
+config = get_local_config()
+# Evaluate centrosymmetric 2D models once for each pair of pixels at q and -q
+FIT_2D_SYMMETRY = getattr(config, 'FIT_2D_SYMMETRY', False)
+
 (PageInfoEvent, EVT_PAGE_INFO) = wx.lib.newevent.NewEvent()
 
 
@@ -1288,7 +1293,7 @@ class Plugin(PluginBase):
         fitter.set_model(new_model, fit_id, pars, data=data,
                          constraints=listOfConstraint)
         fitter.set_data(data=data, id=fit_id, smearer=smearer, qmin=qmin,
-                        qmax=qmax)
+                        qmax=qmax, symmetric=FIT_2D_SYMMETRY)
         fitter.select_problem_for_fit(id=fit_id, value=1)
 
     def _onSelect(self, event):
@@ -1933,9 +1938,7 @@ class Plugin(PluginBase):
             new_plot.title = "Model2D for %s " % model.name + data_name
         new_plot.name = model.name + " [" + \
                                     data_name + "]"
-        theory_data = deepcopy(new_plot)
-
-        self.page_finder[page_id].set_theory_data(data=theory_data,
+        self.page_finder[page_id].set_theory_data(data=new_plot,
                                                   fid=data.id)
         self.parent.update_theory(data_id=data.id,
                                   theory=new_plot,
@@ -2019,7 +2022,8 @@ class Plugin(PluginBase):
                                   completefn=self._complete2D,
                                   update_chisqr=update_chisqr,
                                   exception_handler=self._calc_exception,
-                                  source=source)
+                                  source=source,
+                                  symmetric=FIT_2D_SYMMETRY)
             self.calc_2D.queue()
         except:
             raise
@@ -2085,65 +2089,30 @@ class Plugin(PluginBase):
         Get handy Chisqr using the output from draw1D and 2D,
         instead of calling expansive CalcChisqr in guithread
         """
-        try:
-            data_copy = deepcopy(data)
-        except:
-            return
         # default chisqr
         chisqr = None
         #to compute chisq make sure data has valid data
         # return None if data is None
-        if not check_data_validity(data_copy) or data_copy is None:
+        if not check_data_validity(data) or data is None:
             return chisqr
 
-        # Get data: data I, theory I, and data dI in order
-        if data_copy.__class__.__name__ == "Data2D":
-            if index is None:
-                index = np.ones(len(data_copy.data), dtype=bool)
-            if weight is not None:
-                data_copy.err_data = weight
-            # get rid of zero error points
-            index = index & (data_copy.err_data != 0)
-            index = index & (np.isfinite(data_copy.data))
-            fn = data_copy.data[index]
-            theory_data = self.page_finder[page_id].get_theory_data(fid=data_copy.id)
-            if theory_data is None:
-                return chisqr
-            gn = theory_data.data[index]
-            en = data_copy.err_data[index]
+        theory_data = self.page_finder[page_id].get_theory_data(fid=data.id)
+        if theory_data is None:
+            return chisqr
+        if data.__class__.__name__ == "Data2D":
+            theory = theory_data.data
         else:
             # 1 d theory from model_thread is only in the range of index
-            if index is None:
-                index = np.ones(len(data_copy.y), dtype=bool)
-            if weight is not None:
-                data_copy.dy = weight
-            if data_copy.dy is None or data_copy.dy == []:
-                dy = np.ones(len(data_copy.y))
-            else:
-                ## Set consistently w/AbstractFitengine:
-                # But this should be corrected later.
-                dy = deepcopy(data_copy.dy)
-                dy[dy == 0] = 1
-            fn = data_copy.y[index]
-
-            theory_data = self.page_finder[page_id].get_theory_data(fid=data_copy.id)
-            if theory_data is None:
-                return chisqr
-            gn = theory_data.y
-            en = dy[index]
-
-        # residual
-        try:
-            res = (fn - gn) / en
-        except ValueError:
-            print("Unmatch lengths %s, %s, %s" % (len(fn), len(gn), len(en)))
+            theory = theory_data.y
+        calculator = self.fit_panel.get_page_by_id(page_id).residual_calculator
+        _, chisqr = calculator.residuals(data, theory, weight=weight,
+                                         index=index, fid=data.id,
+                                         chisqr=True)
+        if chisqr is None:
+            print("Unmatch lengths %s, %s" % (len(data.y), len(theory)))
             return
 
-        residuals = res[np.isfinite(res)]
-        # get chisqr only w/finite
-        chisqr = np.average(residuals * residuals)
-
-        self._plot_residuals(page_id=page_id, data=data_copy,
+        self._plot_residuals(page_id=page_id, data=data,
                              fid=fid,
                              weight=weight, index=index)
 
@@ -2158,62 +2127,47 @@ class Plugin(PluginBase):
         :param index: index array (bool)
         : Note: this is different from the residuals in cal_chisqr()
         """
-        data_copy = deepcopy(data)
+        calculator = self.fit_panel.get_page_by_id(page_id).residual_calculator
+        theory_data = self.page_finder[page_id].get_theory_data(fid=data.id)
         # Get data: data I, theory I, and data dI in order
-        if data_copy.__class__.__name__ == "Data2D":
+        if data.__class__.__name__ == "Data2D":
             # build residuals
             residuals = Data2D()
             #residuals.copy_from_datainfo(data)
             # Not for trunk the line below, instead use the line above
-            data_copy.clone_without_data(len(data_copy.data), residuals)
-            residuals.data = None
-            fn = data_copy.data
-            theory_data = self.page_finder[page_id].get_theory_data(fid=data_copy.id)
-            gn = theory_data.data
-            if weight is None:
-                en = data_copy.err_data
-            else:
-                en = weight
-            residuals.data = (fn - gn) / en
-            residuals.qx_data = data_copy.qx_data
-            residuals.qy_data = data_copy.qy_data
-            residuals.q_data = data_copy.q_data
+            data.clone_without_data(len(data.data), residuals)
+            residuals.data = calculator.residuals(data, theory_data.data,
+                                                  weight=weight, fid=data.id)
+            if residuals.data is None:
+                msg = "ResidualPlot Error: different # of data points in theory"
+                wx.PostEvent(self.parent, StatusEvent(status=msg, info="error"))
+                return
+            residuals.qx_data = data.qx_data
+            residuals.qy_data = data.qy_data
+            residuals.q_data = data.q_data
             residuals.err_data = np.ones(len(residuals.data))
-            residuals.xmin = min(residuals.qx_data)
-            residuals.xmax = max(residuals.qx_data)
-            residuals.ymin = min(residuals.qy_data)
-            residuals.ymax = max(residuals.qy_data)
-            residuals.q_data = data_copy.q_data
-            residuals.mask = data_copy.mask
+            residuals.xmin = np.min(residuals.qx_data)
+            residuals.xmax = np.max(residuals.qx_data)
+            residuals.ymin = np.min(residuals.qy_data)
+            residuals.ymax = np.max(residuals.qy_data)
+            residuals.mask = data.mask
             residuals.scale = 'linear'
             # check the lengths
             if len(residuals.data) != len(residuals.q_data):
                 return
         else:
             # 1 d theory from model_thread is only in the range of index
-            if data_copy.dy is None or data_copy.dy == []:
-                dy = np.ones(len(data_copy.y))
-            else:
-                if weight is None:
-                    dy = np.ones(len(data_copy.y))
-                ## Set consitently w/AbstractFitengine:
-                ## But this should be corrected later.
-                else:
-                    dy = weight
-                dy[dy == 0] = 1
-            fn = data_copy.y[index]
-            theory_data = self.page_finder[page_id].get_theory_data(fid=data_copy.id)
-            gn = theory_data.y
-            en = dy[index]
+            if index is None:
+                index = np.ones(len(data.y), dtype=bool)
             # build residuals
             residuals = Data1D()
-            try:
-                residuals.y = (fn - gn) / en
-            except:
+            if len(theory_data.y) != np.count_nonzero(index):
                 msg = "ResidualPlot Error: different # of data points in theory"
                 wx.PostEvent(self.parent, StatusEvent(status=msg, info="error"))
-                residuals.y = (fn - gn[index]) / en
-            residuals.x = data_copy.x[index]
+            residuals.y = calculator.residuals(data, theory_data.y,
+                                               weight=weight, index=index,
+                                               fid=data.id)
+            residuals.x = data.x[index]
             residuals.dy = np.ones(len(residuals.y))
             residuals.dx = None
             residuals.dxl = None
@@ -2229,7 +2183,7 @@ class Plugin(PluginBase):
         ## allow to highlight data when plotted
         new_plot.interactive = True
         ## when 2 data have the same id override the 1 st plotted
-        new_plot.id = "res" + str(data_copy.id) + str(theory_name)
+        new_plot.id = "res" + str(data.id) + str(theory_name)
         ##group_id specify on which panel to plot this data
         group_id = self.page_finder[page_id].get_graph_id()
         if group_id is None:
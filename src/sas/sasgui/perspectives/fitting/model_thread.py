@@ -8,14 +8,15 @@ import math
 import numpy as np
 
 from sas.sascalc.data_util.calcthread import CalcThread
-from sas.sascalc.fit.MultiplicationModel import MultiplicationModel
+from sas.sascalc.fit.AbstractFitEngine import is_centrosymmetric
 
 class Calc2D(CalcThread):
     """
     Compute 2D model
-    This calculation assumes a 2-fold symmetry of the model
-    where points are computed for one half of the detector
-    and I(qx, qy) = I(-qx, -qy) is assumed.
+    With *symmetric* set, a 2-fold symmetry of the model is assumed
+    where I(qx, qy) = I(-qx, -qy), so that the points at q and -q are
+    computed once. This is ignored for models with orientation or magnetic
+    parameters, and for smeared models.
     """
     def __init__(self, data, model, smearer, qmin, qmax, page_id,
                  state=None,
@@ -29,6 +30,7 @@ class Calc2D(CalcThread):
                  yieldtime=0.04,
                  worktime=0.04,
                  exception_handler=None,
+                 symmetric=False,
                 ):
         CalcThread.__init__(self, completefn, updatefn, yieldtime, worktime,
                             exception_handler=exception_handler)
@@ -47,6 +49,7 @@ class Calc2D(CalcThread):
         self.starttime = 0
         self.update_chisqr = update_chisqr
         self.source = source
+        self.symmetric = symmetric
 
     def compute(self):
         """
@@ -83,6 +86,11 @@ class Calc2D(CalcThread):
             # Calculate smeared Intensity
             #(by Gaussian averaging): DataLoader/smearing2d/Smearer2D()
             value = fn.get_value()
+        elif self.symmetric and is_centrosymmetric(self.model):
+            # calculation w/o smearing, once for q and -q
+            geometry = self.data.get_geometry()
+            value = geometry.eval_symmetric(self.model.evalDistribution,
+                                            index_model)
         else:
             # calculation w/o smearing
             value = self.model.evalDistribution([
@@ -175,9 +183,23 @@ class Calc1D(CalcThread):
                                                              self.qmax)
             mask = self.data.x[first_bin:last_bin+1]
             unsmeared_output = np.zeros((len(self.data.x)))
-            unsmeared_output[first_bin:last_bin+1] = self.model.evalDistribution(mask)
             self.smearer.model = self.model
-            output = self.smearer(unsmeared_output, first_bin, last_bin)
+            get_q_outside = getattr(self.smearer, 'get_q_outside', None)
+            if get_q_outside is None:
+                q_eval, low, high = mask, 0, len(mask)
+                unsmeared_output[first_bin:last_bin+1] = self.model.evalDistribution(mask)
+                output = self.smearer(unsmeared_output, first_bin, last_bin)
+            else:
+                # Evaluate the model once, along with the q values the
+                # smearer needs outside of the data bins
+                q_low, q_high = get_q_outside(first_bin, last_bin)
+                q_eval = np.hstack((q_low, mask, q_high))
+                low, high = len(q_low), len(q_low) + len(mask)
+                iq_eval = self.model.evalDistribution(q_eval)
+                unsmeared_output[first_bin:last_bin+1] = iq_eval[low:high]
+                output = self.smearer(unsmeared_output, first_bin, last_bin,
+                                      iq_low=iq_eval[:low],
+                                      iq_high=iq_eval[high:])
 
             # Rescale data to unsmeared model
             # Check that the arrays are compatible. If we only have a model but no data,
@@ -201,13 +223,21 @@ class Calc1D(CalcThread):
         y=output[index]
         sq_values = None
         pq_values = None
-        if isinstance(self.model, MultiplicationModel):
-            s_model = self.model.s_model
-            p_model = self.model.p_model
-            sq_values = s_model.evalDistribution(x)
-            pq_values = p_model.evalDistribution(x)
-        elif hasattr(self.model, "calc_composition_models"):
-            results = self.model.calc_composition_models(x)
+        if hasattr(self.model, "calc_composition_models"):
+            selected = None
+            if self.smearer is not None:
+                selected = index[first_bin:last_bin+1]
+                if np.count_nonzero(selected) != np.count_nonzero(index):
+                    selected = None
+            if selected is None:
+                results = self.model.calc_composition_models(x)
+            else:
+                # Product models reuse the components of the evaluation
+                # made for the smearer
+                results = self.model.calc_composition_models(q_eval)
+                if results is not None:
+                    results = [values[low:high][selected]
+                               for values in results]
             if results is not None:
                 pq_values, sq_values = results
 
@@ -26,3 +26,145 @@ def get_weight(data, is2d, flag=None):
     elif flag == 3:
         weight = np.abs(data)
     return weight
+
+
+class ResidualCalculator(object):
+    """
+    Chi2 and residuals of the theory of a fit page against its data.
+
+    The data arrays are only read: the points are selected with boolean
+    masks, and chi2 is computed in buffers that are kept from one model
+    redraw to the next, so that dragging a parameter does not copy the
+    data. The residuals returned for plotting are new arrays, as the plots
+    keep them. The weights of the data are computed once for each weighting
+    flag.
+    """
+    def __init__(self):
+        self._weights = {}
+        self._buffers = {}
+
+    def get_weight(self, data, is2d, flag=None):
+        """
+        Return the weight of the data for the flag, see :func:`get_weight`.
+
+        The weight is computed again when the values or the errors of the
+        data are replaced.
+        """
+        if is2d:
+            arrays = (data.data, data.err_data)
+        else:
+            arrays = (data.y, data.dy)
+        cached = self._weights.get((is2d, flag))
+        if cached is None or cached[0] is not arrays[0] \
+                or cached[1] is not arrays[1]:
+            cached = arrays + (get_weight(data, is2d, flag),)
+            self._weights[(is2d, flag)] = cached
+        return cached[2]
+
+    def _buffer(self, fid, name, size, dtype=float):
+        """
+        Return the buffer *name* for the data *fid*, reallocated if the
+        number of points changed
+        """
+        key = (fid, name)
+        buf = self._buffers.get(key)
+        if buf is None or len(buf) != size:
+            buf = self._buffers[key] = np.empty(size, dtype=dtype)
+        return buf
+
+    def _output(self, fid, size, chisqr):
+        """
+        Return the array for the residuals: a buffer for chi2, else a new
+        array to be handed to the plots
+        """
+        if chisqr:
+            return self._buffer(fid, "residuals", size)
+        return np.empty(size)
+
+    def residuals(self, data, theory, weight=None, index=None, fid=None,
+                  chisqr=False):
+        """
+        Return the residuals (data - theory)/weight.
+
+        For 2D data the residuals are computed for all the pixels, and the
+        weight defaults to the error of the data. For 1D data the theory is
+        only computed for the points in *index*, zero weights are replaced
+        by 1, and the weight defaults to 1, or to the error of the data for
+        chi2.
+
+        :param data: Data1D or Data2D
+        :param theory: theory values
+        :param weight: weight of the data points, or None
+        :param index: bool array of the points in the fitting range
+        :param fid: id of the data, to keep its buffers apart
+        :param chisqr: also return chi2 of the finite residuals of points in
+            the range which have a weight and a finite value, or None if the
+            theory does not match the data
+
+        :return: the residuals, or (residuals, chi2) if *chisqr*. The
+            residuals returned with chi2 are overwritten by the next call
+            for the same data. For 2D data, None or (None, None) is
+            returned if the theory does not match the data.
+        """
+        if data.__class__.__name__ == "Data2D":
+            return self._residuals_2d(data, theory, weight, index, fid,
+                                      chisqr)
+        return self._residuals_1d(data, theory, weight, index, fid, chisqr)
+
+    def _residuals_2d(self, data, theory, weight, index, fid, chisqr):
+        """
+        Residuals of 2D data, see :meth:`residuals`
+        """
+        size = len(data.data)
+        if len(theory) != size:
+            return (None, None) if chisqr else None
+        err = data.err_data if weight is None else weight
+        res = self._output(fid, size, chisqr)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            np.subtract(data.data, theory, out=res)
+            np.divide(res, err, out=res)
+        if not chisqr:
+            return res
+        # points in range with a weight and a finite intensity and residual
+        selected = self._buffer(fid, "selected", size, dtype=bool)
+        finite = self._buffer(fid, "finite", size, dtype=bool)
+        np.not_equal(err, 0, out=selected)
+        if index is not None:
+            np.logical_and(selected, index, out=selected)
+        np.isfinite(data.data, out=finite)
+        np.logical_and(selected, finite, out=selected)
+        np.isfinite(res, out=finite)
+        np.logical_and(selected, finite, out=selected)
+        npts = np.count_nonzero(selected)
+        squares = self._buffer(fid, "squares", size)
+        np.multiply(res, res, out=squares)
+        np.logical_not(selected, out=selected)
+        np.copyto(squares, 0., where=selected)
+        return res, (np.sum(squares) / npts if npts else np.nan)
+
+    def _residuals_1d(self, data, theory, weight, index, fid, chisqr):
+        """
+        Residuals of 1D data, see :meth:`residuals`
+        """
+        if index is None:
+            index = np.ones(len(data.y), dtype=bool)
+        size = np.count_nonzero(index)
+        if len(theory) != size:
+            if chisqr:
+                return None, None
+            # the theory was computed for all the points
+            theory = theory[index]
+        res = np.compress(index, data.y,
+                          out=self._output(fid, size, chisqr))
+        res -= theory
+        if weight is None and chisqr:
+            weight = data.dy
+        if weight is not None and len(weight):
+            err = np.compress(index, weight,
+                              out=self._buffer(fid, "weight", size))
+            err[err == 0] = 1
+            res /= err
+        if not chisqr:
+            return res
+        finite = res[np.isfinite(res)]
+        return res, np.average(finite * finite)
@@ -21,6 +21,7 @@ import wx
 import numpy as np
 import logging
 import sys
+from functools import partial
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +35,10 @@ from sas.sasgui.plottools import Data1D as Model1D
 from sas.sasgui.guiframe.gui_style import GUIFRAME_ID
 from sas.sasgui.plottools.plottables import Graph
 
+from sas.sascalc.pr.distance_explorer import DistExplorer
+from sas.sascalc.pr.distance_explorer import Results as ExploreResults
+
+from .pr_thread import ExplorePr
 from .pr_widgets import PrTextCtrl
 
 # Default number of points on the output plot
@@ -110,7 +115,7 @@ class OutputPlot(PlotPanel):
         pos = self.ScreenToClient(pos)
         self.PopupMenu(slicerpop, pos)
 
-class Results(object):
+class Results(ExploreResults):
     """
     Class to hold the inversion output parameters
     as a function of D_max
@@ -120,15 +125,7 @@ class Results(object):
         Initialization. Create empty arrays
         and dictionary of labels.
         """
-        # Array of output for each inversion
-        self.chi2 = []
-        self.osc = []
-        self.pos = []
-        self.pos_err = []
-        self.rg = []
-        self.iq0 = []
-        self.bck = []
-        self.d_max = []
+        ExploreResults.__init__(self)
 
         # Dictionary of outputs
         self.outputs = {}
@@ -165,6 +162,9 @@ class ExploreDialog(wx.Dialog):
         self._default_min = 0.9 * self.pr_state.d_max
         self._default_max = 1.1 * self.pr_state.d_max
         self.nfunc = nfunc
+        self.pr_state.nfunc = nfunc
+        ## Thread computing the outputs for the D_max values
+        self.calc_thread = None
 
         # Control for number of points
         self.npts_ctl = PrTextCtrl(self, -1, style=wx.TE_PROCESS_ENTER,
@@ -363,6 +363,8 @@ class ExploreDialog(wx.Dialog):
 
         # Bind the Enter key to recalculation
         self.Bind(wx.EVT_TEXT_ENTER, self._recalc)
+        # Stop the calculation when the dialog is closed
+        self.Bind(wx.EVT_WINDOW_DESTROY, self._on_destroy)
 
     def set_plot_unfocus(self):
         """
@@ -388,40 +390,66 @@ class ExploreDialog(wx.Dialog):
         if content is None:
             return
 
-        # Results object to store the computation outputs.
-        results = Results()
-
-        # Loop over d_max values
-        for i in range(content.npts):
-            temp = (content.dmax - content.dmin) / (content.npts - 1.0)
-            d = content.dmin + i * temp
-
-            self.pr_state.d_max = d
-            try:
-                out, cov = self.pr_state.invert(self.nfunc)
-
-                # Store results
-                iq0 = self.pr_state.iq0(out)
-                rg = self.pr_state.rg(out)
-                pos = self.pr_state.get_positive(out)
-                pos_err = self.pr_state.get_pos_err(out, cov)
-                osc = self.pr_state.oscillations(out)
-
-                results.d_max.append(self.pr_state.d_max)
-                results.bck.append(self.pr_state.background)
-                results.chi2.append(self.pr_state.chi2)
-                results.iq0.append(iq0)
-                results.rg.append(rg)
-                results.pos.append(pos)
-                results.pos_err.append(pos_err)
-                results.osc.append(osc)
-            except Exception as exc:
-                # This inversion failed, skip this D_max value
-                msg = "ExploreDialog: inversion failed "
-                msg += "for D_max=%s\n%s" % (str(d), exc)
-                logger.error(msg)
-
-        self.results = results
+        # Stop the previous exploration, if it is still running
+        self._stop_thread()
+
+        # Results object to store the computation outputs, filled in
+        # as the inversion of each D_max value is done
+        self.results = Results()
+        self._plot_output()
+
+        explorer = DistExplorer(self.pr_state)
+        self.calc_thread = ExplorePr(explorer, content.dmin, content.dmax,
+                                     content.npts,
+                                     error_func=self._thread_error,
+                                     completefn=self._completed,
+                                     updatefn=partial(self._add_point,
+                                                      self.results))
+        self.calc_thread.queue()
+
+    def _stop_thread(self):
+        """
+        Stop the exploration thread if it is running
+        """
+        if self.calc_thread is not None and self.calc_thread.isrunning():
+            self.calc_thread.stop()
+
+    def _on_destroy(self, event):
+        """
+        Stop the exploration when the dialog is closed
+        """
+        if event.GetEventObject() is self:
+            self._stop_thread()
+        event.Skip()
+
+    def _thread_error(self, error):
+        """
+        Call-back method for exploration errors
+        """
+        logger.error(error)
+
+    def _add_point(self, results, d_max, outputs, error):
+        """
+        Call-back method from the exploration thread for each D_max value
+        """
+        # The plot can only be updated from the GUI thread
+        wx.CallAfter(self._add_point_call, results, d_max, outputs, error)
+
+    def _add_point_call(self, results, d_max, outputs, error):
+        """
+        Add the outputs for a D_max value and update the plot
+        """
+        # Skip the points of an exploration which was replaced
+        if results is not self.results:
+            return
+        if error is None:
+            results.add(d_max, outputs)
+        else:
+            # This inversion failed, skip this D_max value
+            msg = "ExploreDialog: inversion failed "
+            msg += "for D_max=%s\n%s" % (str(d_max), error)
+            results.errors.append(msg)
+            logger.error(msg)
 
         # Plot the selected output
         self._plot_output()
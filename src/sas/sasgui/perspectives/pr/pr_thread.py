@@ -111,3 +111,42 @@ class EstimateNT(CalcThread):
         except Exception as exc:
             if self.error_func is not None:
                 self.error_func("EstimatePr2.compute: %s" % exc)
+
+class ExplorePr(CalcThread):
+    """
+    Explore the P(r) inversion outputs over a range of D_max values
+    """
+    def __init__(self, explorer, dmin, dmax, npts, nworkers=None,
+                 error_func=None, completefn=None, updatefn=None,
+                 yieldtime=0.01, worktime=0.01):
+        """
+        :param explorer: sas.sascalc.pr.distance_explorer.DistExplorer
+        :param updatefn: called with d_max, outputs and error as each
+            D_max value is done, in the order they are done
+        """
+        CalcThread.__init__(self, completefn, updatefn, yieldtime, worktime)
+        self.explorer = explorer
+        self.dmin = dmin
+        self.dmax = dmax
+        self.npts = npts
+        self.nworkers = nworkers
+        self.error_func = error_func
+
+    def compute(self):
+        """
+        Invert for each D_max value, spread over the worker processes
+        """
+        try:
+            t_0 = time.time()
+            points = self.explorer.explore(self.dmin, self.dmax, self.npts,
+                                           self.nworkers, self.isquit)
+            for d_max, outputs, error in points:
+                if self.updatefn is not None:
+                    self.updatefn(d_max=d_max, outputs=outputs, error=error)
+            self.complete(elapsed=time.time() - t_0)
+        except KeyboardInterrupt:
+            # Thread was interrupted, just proceed
+            pass
+        except Exception as exc:
+            if self.error_func is not None:
+                self.error_func("ExplorePr.compute: %s" % exc)
@@ -156,6 +156,13 @@ DEFAULT_PERSPECTIVE = 'None'
 # Time out for updating sasview
 UPDATE_TIMEOUT = 2
 
+# Number of states of each fit page kept for undo
+FIT_UNDO_STATES = 50
+
+# Compute 2D models without orientation or magnetism once for each pair of
+# pixels at q and -q, assuming I(q) = I(-q)
+FIT_2D_SYMMETRY = False
+
 # Time out for updating sasview
 UPDATE_TIMEOUT = 2
 
@@ -0,0 +1,204 @@
+"""
+Timing of the P(r) parameter searches.
+
+The number of terms estimate and the D_max scan are timed with the
+shared solver, against the separate inversions they used to perform
+for each alpha, number of terms and D_max. The results of both paths
+are checked to agree. The construction of the data block of the
+problem is timed against the loop over base functions it replaced.
+The D_max explorer is then timed in a single process and with one
+worker process per processor.
+
+Usage::
+
+    PYTHONPATH=src python test/pr_inversion/test/bench_inversion.py
+"""
+from __future__ import print_function
+
+import time
+
+import numpy as np
+
+from sas.sascalc.pr import calc
+from sas.sascalc.pr.invertor import Invertor
+from sas.sascalc.pr.num_term import NTermEstimator
+from sas.sascalc.pr.distance_explorer import DistExplorer
+
+SIZES = (100, 400, 1000)
+
+
+def make_invertor(npts, smeared):
+    """
+    Build an invertor for the scattering of a sphere of radius 40 A
+    """
+    x = np.linspace(0.002, 0.4, npts)
+    qr = 40.0 * x
+    y = 1e4 * (3.0 * (np.sin(qr) - qr * np.cos(qr)) / qr ** 3) ** 2 + 0.1
+    invertor = Invertor()
+    invertor.d_max = 80.0
+    invertor.alpha = 1e-4
+    invertor.x = x
+    invertor.y = y
+    invertor.err = 0.05 * y
+    if smeared:
+        invertor.slit_height = 0.005
+    return invertor
+
+
+def loop_estimate_alpha(invertor, nfunc):
+    """
+    Separate inversions formerly used by Invertor.estimate_alpha
+    """
+    pr = invertor.clone()
+    if pr.alpha <= 0:
+        pr.alpha = 0.0001
+    out, _ = pr.invert(nfunc)
+    initial_alpha = pr.alpha
+    initial_peaks = pr.get_peaks(out)
+    pr.alpha = pr.suggested_alpha
+    out, _ = pr.invert(nfunc)
+    if pr.get_peaks(out) > 1:
+        return pr.suggested_alpha
+    alpha = best_alpha = pr.suggested_alpha
+    found = False
+    for i in range(10):
+        pr.alpha = (0.33) ** (i + 1) * alpha
+        out, _ = pr.invert(nfunc)
+        if pr.get_peaks(out) > 1:
+            found = True
+            break
+        best_alpha = pr.alpha
+    if not found and initial_peaks == 1 and initial_alpha < best_alpha:
+        best_alpha = initial_alpha
+    return best_alpha
+
+
+def loop_num_terms(invertor):
+    """
+    Separate inversions formerly used by NTermEstimator.get0_out
+    """
+    estimator = NTermEstimator(invertor.clone())
+    inver = estimator.invertor
+    alphas = []
+    for k in range(estimator.nterm_min, estimator.nterm_max):
+        inver.alpha = loop_estimate_alpha(inver, k)
+        inver.out, inver.cov = inver.lstsq(k)
+        if inver.oscillations(inver.out) > 10.0:
+            break
+        alphas.append(inver.alpha)
+    return alphas
+
+
+def solver_num_terms(invertor):
+    """
+    Number of terms search with the shared solver
+    """
+    estimator = NTermEstimator(invertor.clone())
+    estimator.get0_out()
+    return estimator.alpha_list
+
+
+def loop_scan(invertor, d_values, nfunc):
+    """
+    Separate inversions formerly used by DistExplorer
+    """
+    pr = invertor.clone()
+    chi2 = []
+    for d in d_values:
+        pr.d_max = d
+        pr.invert(nfunc)
+        chi2.append(float(pr.chi2))
+    return chi2
+
+
+def solver_scan(invertor, d_values, nfunc):
+    """
+    D_max scan sharing the d_max independent part of the problem
+    """
+    return [float(chi2) for _, _, _, chi2, _, _
+            in invertor.scan_dmax(d_values, nfunc)]
+
+
+def loop_data_matrix(invertor, nfunc):
+    """
+    Loop over base functions formerly used by Pinvertor._get_matrix
+    """
+    smeared = invertor.slit_width > 0 or invertor.slit_height > 0
+    a_data = np.zeros([invertor.npoints, nfunc])
+    for j in range(nfunc):
+        if smeared:
+            res = calc.ortho_transformed_smeared(
+                invertor.x, invertor.d_max, j + 1,
+                invertor.slit_height, invertor.slit_width, 21)
+        else:
+            res = calc.ortho_transformed(invertor.x, invertor.d_max, j + 1)
+        a_data[:, j] = res / invertor.err
+    return a_data
+
+
+def timed(fn, *args):
+    """
+    Return the result of fn(*args) and the time it took in seconds
+    """
+    start = time.time()
+    result = fn(*args)
+    return result, time.time() - start
+
+
+def main():
+    print("%-14s %8s %8s %12s %12s %10s" % ("search", "points", "smeared",
+                                            "loop [s]", "solver [s]",
+                                            "speedup"))
+    for npts in SIZES:
+        for smeared in (False, True):
+            invertor = make_invertor(npts, smeared)
+
+            old, t_old = timed(loop_num_terms, invertor)
+            new, t_new = timed(solver_num_terms, invertor)
+            if not np.allclose(old, new, rtol=1e-6):
+                raise RuntimeError("num_terms: loop and solver results differ")
+            print("%-14s %8d %8s %12.4f %12.4f %10.1f"
+                  % ("num_terms", npts, smeared, t_old, t_new, t_old / t_new))
+
+            d_values = np.linspace(60.0, 100.0, 50)
+            old, t_old = timed(loop_scan, invertor, d_values, 15)
+            new, t_new = timed(solver_scan, invertor, d_values, 15)
+            if not np.allclose(old, new, rtol=1e-6):
+                raise RuntimeError("scan_dmax: loop and solver results differ")
+            print("%-14s %8d %8s %12.4f %12.4f %10.1f"
+                  % ("scan_dmax", npts, smeared, t_old, t_new, t_old / t_new))
+
+    print()
+    print("%-14s %8s %8s %12s %12s %10s" % ("data block", "points", "smeared",
+                                            "loop [s]", "matrix [s]",
+                                            "speedup"))
+    for npts in SIZES:
+        for smeared in (False, True):
+            invertor = make_invertor(npts, smeared)
+            invertor.slit_width = 0.002 if smeared else 0.0
+            old, t_old = timed(loop_data_matrix, invertor, 40)
+            new, t_new = timed(invertor._get_data_matrix, 40)
+            if not np.allclose(old, new, rtol=1e-10):
+                raise RuntimeError("data block: loop and matrix results differ")
+            print("%-14s %8d %8s %12.4f %12.4f %10.1f"
+                  % ("40 terms", npts, smeared, t_old, t_new, t_old / t_new))
+
+    print()
+    print("%-14s %8s %8s %12s %12s %10s" % ("explorer", "points", "smeared",
+                                            "serial [s]", "pool [s]",
+                                            "speedup"))
+    for npts in SIZES:
+        invertor = make_invertor(npts, True)
+        invertor.nfunc = 15
+        explorer = DistExplorer(invertor)
+        serial, t_serial = timed(explorer, 60.0, 100.0, 100)
+        pool, t_pool = timed(explorer, 60.0, 100.0, 100, None)
+        if not np.allclose(serial.chi2, pool.chi2, rtol=1e-12):
+            raise RuntimeError("explorer: serial and pool results differ")
+        print("%-14s %8d %8s %12.4f %12.4f %10.1f"
+              % ("100 D_max", npts, True, t_serial, t_pool,
+                 t_serial / t_pool))
+
+
+if __name__ == "__main__":
+    main()
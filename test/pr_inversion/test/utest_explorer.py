@@ -6,6 +6,7 @@ import sys
 import os.path
 import unittest, math, numpy
 from sas.sascalc.pr.invertor import Invertor
+from sas.sascalc.pr import distance_explorer
 from sas.sascalc.pr.distance_explorer import DistExplorer
 
 try:
@@ -40,5 +41,85 @@ class TestExplorer(unittest.TestCase):
         self.assertEqual(len(results.errors), 0)
         self.assertEqual(len(results.chi2), 25)
 
+    def test_parallel(self):
+        serial = self.explo(120, 200, 9)
+        parallel = self.explo(120, 200, 9, nworkers=3)
+        self.assertEqual(len(parallel.errors), 0)
+        self.assertEqual(parallel.d_max, serial.d_max)
+        for name in ('chi2', 'osc', 'pos', 'pos_err', 'rg', 'iq0', 'bck'):
+            numpy.testing.assert_allclose(getattr(parallel, name),
+                                          getattr(serial, name), rtol=1e-12)
+
+    def test_streaming(self):
+        points = list(self.explo.explore(120, 200, 5, nworkers=2))
+        self.assertEqual(len(points), 5)
+        self.assertEqual(sorted(d for d, _, _ in points),
+                         [120.0, 140.0, 160.0, 180.0, 200.0])
+        for _, outputs, error in points:
+            self.assertTrue(error is None)
+            self.assertEqual(len(outputs), 7)
+
+    @unittest.skipIf(distance_explorer.futures is None,
+                     "concurrent.futures is not available")
+    def test_one_task_per_point(self):
+        # Each point is sent on its own so it comes out when it is done
+        tasks = []
+        executor_class = distance_explorer.futures.ProcessPoolExecutor
+        class Executor(executor_class):
+            def submit(self, fn, pr_state, d_values, nfunc):
+                tasks.append(list(d_values))
+                return executor_class.submit(self, fn, pr_state, d_values,
+                                             nfunc)
+        distance_explorer.futures.ProcessPoolExecutor = Executor
+        try:
+            points = self.explo.explore(120, 200, 5, nworkers=2)
+            first = next(points)
+            self.assertEqual(len(tasks), 5)
+            self.assertTrue([first[0]] in tasks)
+            rest = list(points)
+        finally:
+            distance_explorer.futures.ProcessPoolExecutor = executor_class
+        self.assertEqual(sorted(tasks), [[120.0], [140.0], [160.0], [180.0],
+                                         [200.0]])
+        self.assertEqual(len(rest), 4)
+
+    def test_interrupt(self):
+        # The pool is stopped before its chunks of points are done
+        for nworkers, ncalls in ((1, 3), (2, 1)):
+            calls = []
+            def isquit():
+                calls.append(1)
+                if len(calls) >= ncalls:
+                    raise KeyboardInterrupt
+            points = []
+            def run():
+                for point in self.explo.explore(120, 200, 25, nworkers,
+                                                isquit):
+                    points.append(point)
+            self.assertRaises(KeyboardInterrupt, run)
+            self.assertEqual(len(calls), ncalls)
+            self.assertTrue(len(points) < 25)
+            self.assertEqual(self.invertor.d_max, 160.0)
+
+    def test_single_scan(self):
+        scans = []
+        iter_dmax = self.invertor.iter_dmax
+        def spy(d_values, nfunc):
+            scans.append(list(d_values))
+            return iter_dmax(d_values, nfunc)
+        self.invertor.iter_dmax = spy
+        points = list(self.explo.explore(120, 200, 5))
+        self.assertEqual(scans, [[120.0, 140.0, 160.0, 180.0, 200.0]])
+        self.assertEqual([d for d, _, _ in points], scans[0])
+        self.assertEqual(self.invertor.d_max, 160.0)
+
+    def test_errors(self):
+        err = self.invertor.err
+        err[0] = 0.0
+        self.invertor.err = err
+        results = self.explo(120, 200, 4, nworkers=2)
+        self.assertEqual(len(results.chi2), 0)
+        self.assertEqual(len(results.errors), 4)
+
 if __name__ == '__main__':
     unittest.main()
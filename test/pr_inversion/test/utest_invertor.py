@@ -15,7 +15,8 @@ import warnings
 
 import numpy as np
 
-from sas.sascalc.pr.invertor import Invertor
+from sas.sascalc.pr.invertor import Invertor, InversionSolver
+from sas.sascalc.pr import calc
 
 
 def find(filename):
@@ -440,6 +441,151 @@ class TestBasicComponent(unittest.TestCase):
         self.assertEqual(self.invertor.q_max, None)
 
 
+class TestDataMatrix(unittest.TestCase):
+    """
+        The data block of the A matrix is built for all base
+        functions at once.
+    """
+    def setUp(self):
+        x, y, err = load(find("sphere_80.txt"))
+        self.invertor = Invertor()
+        self.invertor.d_max = 160.0
+        self.invertor.x = x
+        self.invertor.y = y
+        self.invertor.err = err
+
+    def column(self, n):
+        inv = self.invertor
+        if inv.slit_height > 0 or inv.slit_width > 0:
+            res = calc.ortho_transformed_smeared(inv.x, inv.d_max, n,
+                                                 inv.slit_height,
+                                                 inv.slit_width, 21)
+        else:
+            res = calc.ortho_transformed(inv.x, inv.d_max, n)
+        return res / inv.err
+
+    def test_unsmeared(self):
+        a = self.invertor._get_data_matrix(10)
+        for j in range(10):
+            np.testing.assert_array_equal(a[:, j], self.column(j + 1))
+
+    def test_smeared(self):
+        for height, width in ((0.01, 0.0), (0.0, 0.002), (0.01, 0.002)):
+            self.invertor.slit_height = height
+            self.invertor.slit_width = width
+            self.invertor.est_bck = True
+            a = self.invertor._get_data_matrix(10)
+            np.testing.assert_array_equal(a[:, 0], 1.0 / self.invertor.err)
+            for j in range(1, 10):
+                np.testing.assert_allclose(a[:, j], self.column(j), rtol=1e-12)
+
+    def test_quadrature_cache(self):
+        self.invertor.slit_height = 0.01
+        q_quad = self.invertor._get_slit_quadrature()
+        self.assertEqual(q_quad.shape, (len(self.invertor.x), 21))
+        self.invertor.d_max = 120.0
+        self.assertTrue(self.invertor._get_slit_quadrature() is q_quad)
+        self.invertor.slit_width = 0.002
+        self.assertEqual(self.invertor._get_slit_quadrature().shape,
+                         (len(self.invertor.x), 21 * 21))
+        self.invertor.x = self.invertor.x * 0.5
+        np.testing.assert_allclose(self.invertor._get_slit_quadrature()[:, 0],
+                                   np.sqrt((self.invertor.x + 0.001)**2))
+
+
+class TestInversionSolver(unittest.TestCase):
+    """
+        The solver must reproduce invert() and lstsq() for any
+        alpha and number of terms it was built for.
+    """
+    def setUp(self):
+        x, y, err = load(find("sphere_80.txt"))
+        self.invertor = self._invertor(x, y, err)
+        self.data = x, y, err
+
+    def _invertor(self, x, y, err):
+        invertor = Invertor()
+        invertor.d_max = 160.0
+        invertor.alpha = .0007
+        invertor.x = x
+        invertor.y = y
+        invertor.err = err
+        invertor.background = 0.5
+        return invertor
+
+    def assert_same(self, ref, pr):
+        np.testing.assert_allclose(pr.out, ref.out, rtol=1e-7)
+        np.testing.assert_allclose(pr.cov, ref.cov, rtol=1e-6, atol=1e-10)
+        self.assertAlmostEqual(float(pr.chi2), float(ref.chi2), 6)
+        self.assertAlmostEqual(pr.suggested_alpha / ref.suggested_alpha, 1.0)
+        self.assertAlmostEqual(pr.background, ref.background, 6)
+        self.assertEqual(pr.nfunc, ref.nfunc)
+        self.assertEqual(pr.alpha, ref.alpha)
+
+    def test_invert(self):
+        for est_bck in (False, True):
+            self.invertor.est_bck = est_bck
+            solver = InversionSolver(self.invertor, 20)
+            for nfunc in (5, 10, 20):
+                for alpha in (1e-5, .0007, 0.1):
+                    ref = self.invertor.clone()
+                    ref.alpha = alpha
+                    ref.invert(nfunc)
+                    pr = self.invertor.clone()
+                    solver.solve(nfunc, alpha, pr)
+                    self.assert_same(ref, pr)
+
+    def test_lstsq(self):
+        self.invertor.slit_height = 0.01
+        self.invertor.slit_width = 0.002
+        self.invertor.q_min = 0.02
+        self.invertor.q_max = 0.3
+        solver = InversionSolver(self.invertor, 15, subtract_background=False)
+        ref = self.invertor.clone()
+        ref.lstsq(12)
+        solver.solve(12, .0007)
+        self.assert_same(ref, self.invertor)
+
+    def test_too_many_terms(self):
+        solver = InversionSolver(self.invertor, 10)
+        self.assertRaises(ValueError, solver.solve, 11, .0007)
+
+    def test_estimate_alpha(self):
+        alpha, message, _ = self.invertor.estimate_alpha(10)
+        solver = InversionSolver(self.invertor, 20)
+        self.assertEqual(self.invertor.estimate_alpha(10, solver)[:2],
+                         (alpha, message))
+        self.assertEqual(self.invertor.alpha, .0007)
+
+    def test_scan_dmax(self):
+        for est_bck in (False, True):
+            self.invertor.est_bck = est_bck
+            d_values = [120.0, 160.0, 200.0]
+            results = self.invertor.scan_dmax(d_values, 12)
+            self.assertEqual(self.invertor.d_max, 160.0)
+            self.assertEqual(len(results), len(d_values))
+            for d, (d_max, out, cov, chi2, bck, error) in zip(d_values, results):
+                self.assertEqual(d_max, d)
+                self.assertTrue(error is None)
+                ref = self.invertor.clone()
+                ref.d_max = d
+                ref.invert(12)
+                np.testing.assert_allclose(out, ref.out, rtol=1e-7)
+                np.testing.assert_allclose(cov, ref.cov, rtol=1e-6, atol=1e-10)
+                self.assertAlmostEqual(chi2, float(ref.chi2), 6)
+                self.assertAlmostEqual(bck, ref.background, 6)
+
+    def test_scan_dmax_errors(self):
+        x, y, err = self.data
+        err = err.copy()
+        err[3] = 0.0
+        self.invertor.err = err
+        results = self.invertor.scan_dmax([120.0, 160.0], 12)
+        for d_max, out, _, _, _, error in results:
+            self.assertTrue(out is None)
+            self.assertTrue("no error" in error)
+
+
 class TestErrorConditions(unittest.TestCase):
     def setUp(self):
         self.invertor = Invertor()
@@ -480,6 +626,23 @@ class TestErrorConditions(unittest.TestCase):
         # Perform inversion
         self.assertRaises(RuntimeError, self.invertor.invert, 10)
 
+    def test_zero_errs_scan(self):
+        """
+            Zero errors are reported for each d_max without numpy warnings
+        """
+        x, y, err = load(find("data_error_2.txt"))
+        self.invertor.x = x
+        self.invertor.y = y
+        self.invertor.err = err
+        with np.errstate(all='raise'):
+            b = self.invertor._get_data_vector()
+            results = self.invertor.scan_dmax([80.0, 160.0], 10)
+        self.assertTrue(np.isinf(b[err == 0]).all())
+        self.assertEqual(len(results), 2)
+        for d, out, _, _, _, error in results:
+            self.assertTrue(out is None)
+            self.assertTrue("no error" in error)
+
     def test_invalid(self):
         """
             Test an inversion for which we know the answer
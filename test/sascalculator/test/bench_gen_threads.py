@@ -0,0 +1,64 @@
+"""
+Scaling of the GenSAS 2D calculation with the number of threads.
+
+The magnetic example OMF file is computed on a square detector with an
+increasing number of threads. The results are checked to be identical
+to the single thread calculation.
+
+Usage::
+
+    PYTHONPATH=src python test/sascalculator/test/bench_gen_threads.py [npix]
+"""
+from __future__ import print_function
+
+import multiprocessing
+import os.path
+import sys
+import time
+
+import numpy as np
+
+from sas.sascalc.calculator import sas_gen
+
+NPIX = 128
+
+
+def find(filename):
+    return os.path.join(os.path.dirname(__file__), filename)
+
+
+def main(npix=NPIX):
+    omf = sas_gen.OMFReader().read(find("A_Raw_Example-1.omf"))
+    omf2sld = sas_gen.OMF2SLD()
+    omf2sld.set_data(omf)
+    model = sas_gen.GenSAS()
+    model.set_sld_data(omf2sld.output)
+    model.params['Up_frac_in'] = 0.5
+    model.params['Up_frac_out'] = 0.5
+
+    q = np.linspace(-0.1, 0.1, npix)
+    qx, qy = np.meshgrid(q, q)
+    qx, qy = qx.flatten(), qy.flatten()
+
+    ncpu = multiprocessing.cpu_count()
+    workers = sorted(set([1, 2, 4, 8, 16, 32, 64, ncpu]))
+    print("%d pixels, %d q points, %d processors"
+          % (len(omf2sld.output.pos_x), len(qx), ncpu))
+    print("%8s %12s %10s" % ("threads", "time [s]", "speedup"))
+    serial = None
+    for nworkers in workers:
+        if nworkers > 2 * ncpu:
+            break
+        model.set_nworkers(nworkers)
+        start = time.time()
+        result = model.runXY([qx, qy])
+        elapsed = time.time() - start
+        if serial is None:
+            serial, t_serial = result, elapsed
+        elif not np.array_equal(result, serial):
+            raise RuntimeError("threaded and serial results differ")
+        print("%8d %12.4f %10.1f" % (nworkers, elapsed, t_serial / elapsed))
+
+
+if __name__ == "__main__":
+    main(*[int(v) for v in sys.argv[1:]])
@@ -0,0 +1,58 @@
+"""
+Timing of the GenSAS 2D calculation with the C and the numpy engines.
+
+The magnetic example OMF file is computed on square detectors of
+increasing size with each engine. The results of the numpy engine are
+checked against the C library.
+
+Usage::
+
+    PYTHONPATH=src python test/sascalculator/test/bench_geni.py [npix ...]
+"""
+from __future__ import print_function
+
+import os.path
+import sys
+import time
+
+import numpy as np
+
+from sas.sascalc.calculator import sas_gen
+
+NPIX = (16, 32, 64, 128)
+
+
+def find(filename):
+    return os.path.join(os.path.dirname(__file__), filename)
+
+
+def main(*sizes):
+    omf = sas_gen.OMFReader().read(find("A_Raw_Example-1.omf"))
+    omf2sld = sas_gen.OMF2SLD()
+    omf2sld.set_data(omf)
+    model = sas_gen.GenSAS()
+    model.set_sld_data(omf2sld.output)
+    model.params['Up_frac_in'] = 0.5
+    model.params['Up_frac_out'] = 0.5
+
+    print("%d pixels" % len(omf2sld.output.pos_x))
+    print("%10s %12s %12s %10s" % ("q points", "C [s]", "numpy [s]", "speedup"))
+    for npix in sizes or NPIX:
+        q = np.linspace(-0.1, 0.1, npix)
+        qx, qy = np.meshgrid(q, q)
+        qx, qy = qx.flatten(), qy.flatten()
+        times = []
+        results = []
+        for engine in ('c', 'numpy'):
+            model.set_engine(engine)
+            start = time.time()
+            results.append(model.runXY([qx, qy]))
+            times.append(time.time() - start)
+        if not np.allclose(results[1], results[0], rtol=1e-10):
+            raise RuntimeError("numpy and C results differ")
+        print("%10d %12.4f %12.4f %10.1f"
+              % (len(qx), times[0], times[1], times[0] / times[1]))
+
+
+if __name__ == "__main__":
+    main(*[int(v) for v in sys.argv[1:]])
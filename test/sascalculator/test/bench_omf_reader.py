@@ -0,0 +1,75 @@
+"""
+Timing of the OMF reader on large synthetic files.
+
+Rectangular meshes of increasing size are written with the header of the
+example OMF file, as text and as 8 byte binary data. The magnetization
+read from both files is checked against the generated one.
+
+Usage::
+
+    PYTHONPATH=src python test/sascalculator/test/bench_omf_reader.py [ncells ...]
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from sas.sascalc.calculator import sas_gen
+
+NCELLS = (10**4, 10**5, 10**6)
+
+
+def find(filename):
+    return os.path.join(os.path.dirname(__file__), filename)
+
+
+def write_files(tmpdir, ncells):
+    """
+    Write text and binary files of ncells cells, and return their values
+    """
+    with open(find("A_Raw_Example-1.omf"), 'rb') as fid:
+        header = fid.read().split(b"# Begin: Data Text")[0]
+    header = header.replace(b"# xnodes: 40", b"# xnodes: %d" % ncells)
+    header = header.replace(b"# ynodes: 40", b"# ynodes: 1")
+    header = header.replace(b"# znodes: 10", b"# znodes: 1")
+    values = np.random.RandomState(0).uniform(-5e5, 5e5, (ncells, 3))
+    text = os.path.join(tmpdir, "text%d.omf" % ncells)
+    with open(text, 'wb') as fid:
+        fid.write(header + b"# Begin: Data Text\n")
+        np.savetxt(fid, values, fmt="%.17g")
+        fid.write(b"# End: Data Text\n# End: Segment\n")
+    binary = os.path.join(tmpdir, "binary%d.omf" % ncells)
+    with open(binary, 'wb') as fid:
+        fid.write(header + b"# Begin: Data Binary 8\n")
+        fid.write(np.array([123456789012345.0], dtype='>f8').tobytes())
+        fid.write(values.astype('>f8').tobytes())
+        fid.write(b"\n# End: Data Binary 8\n# End: Segment\n")
+    return text, binary, values * sas_gen.MFACTOR_AM
+
+
+def main(*sizes):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        print("%10s %12s %12s" % ("cells", "text [s]", "binary [s]"))
+        for ncells in sizes or NCELLS:
+            text, binary, expected = write_files(tmpdir, ncells)
+            times = []
+            for path in (text, binary):
+                start = time.time()
+                output = sas_gen.OMFReader().read(path)
+                times.append(time.time() - start)
+                result = np.column_stack((output.mx, output.my, output.mz))
+                if not np.allclose(result, expected, rtol=1e-15):
+                    raise RuntimeError("values read incorrectly")
+            print("%10d %12.4f %12.4f" % (ncells, times[0], times[1]))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    main(*[int(v) for v in sys.argv[1:]])
@@ -0,0 +1,69 @@
+"""
+Timing of the PDB reader on large synthetic files.
+
+Chains of atoms of a few elements, with a CONECT record for each atom
+bonding it to its neighbours in both directions, are written for an
+increasing number of atoms. The time per atom stays constant when the
+load time is linear in the size of the file. The positions and the bonds
+read back are checked against the generated ones.
+
+Usage::
+
+    PYTHONPATH=src python test/sascalculator/test/bench_pdb_reader.py [natoms ...]
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from sas.sascalc.calculator import sas_gen
+
+NATOMS = (1000, 10000, 100000)
+ELEMENTS = ("C", "N", "O", "S", "H")
+
+
+def write_file(path, natoms):
+    """
+    Write a chain of natoms atoms, and return their positions
+    """
+    rng = np.random.RandomState(0)
+    pos = np.round(rng.uniform(-999, 999, (natoms, 3)), 3)
+    with open(path, 'w') as fid:
+        for k, (x, y, z) in enumerate(pos):
+            fid.write("ATOM  %5d  %-3s ALA A   1    %8.3f%8.3f%8.3f\n"
+                      % ((k + 1) % 100000, ELEMENTS[k % len(ELEMENTS)],
+                         x, y, z))
+        for k in range(1, natoms + 1):
+            neighbours = [n for n in (k - 1, k + 1) if 0 < n <= natoms]
+            fid.write("CONECT"
+                      + "".join(" %5d" % n for n in [k] + neighbours) + "\n")
+    return pos
+
+
+def main(*sizes):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        print("%10s %12s %14s" % ("atoms", "time [s]", "us per atom"))
+        for natoms in sizes or NATOMS:
+            path = os.path.join(tmpdir, "chain%d.pdb" % natoms)
+            pos = write_file(path, natoms)
+            start = time.time()
+            output = sas_gen.PDBReader().read(path)
+            elapsed = time.time() - start
+            if not (np.array_equal(output.pos_x, pos[:, 0])
+                    and np.array_equal(output.pos_z, pos[:, 2])
+                    and len(output.line_x) == natoms - 1):
+                raise RuntimeError("atoms or bonds read incorrectly")
+            print("%10d %12.4f %14.2f"
+                  % (natoms, elapsed, 1e6 * elapsed / natoms))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    main(*[int(v) for v in sys.argv[1:]])
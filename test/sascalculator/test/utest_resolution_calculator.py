@@ -3,6 +3,9 @@
 """
 
 import unittest
+
+import numpy as np
+
 from  sas.sascalc.calculator.resolution_calculator import ResolutionCalculator \
                                             as calculator
 
@@ -32,7 +35,115 @@ class resolution_calculator(unittest.TestCase):
         # The value "0.000213283" was obtained by manual calculation.
         self.assertAlmostEqual(sigma_1d,   0.000213283, 5)
         
-        
+
+class detector_map(unittest.TestCase):
+
+    def setUp(self):
+        self.cal = calculator()
+        self.cal.set_wavelength(6)
+        self.cal.set_wavelength_spread(0.125)
+        self.cal.set_source_aperture_size([3])
+        self.cal.set_sample_aperture_size([1.27])
+        self.cal.set_detector_pix_size([0.5])
+        self.cal.set_detector_size([64, 32])
+        self.cal.set_source2sample_distance([1627])
+        self.cal.set_sample2detector_distance([1300, 5])
+
+    def scalar_map(self, qx, qy):
+        """
+            Average the scalar compute() over the wavelengths as
+            compute_and_plot() does
+        """
+        lamda_list, dlamb_list = self.cal.get_wave_list()
+        tof = len(lamda_list) > 1
+        variances = np.zeros((4,) + qx.shape)
+        total_intensity = 0
+        for lam, dlam in zip(lamda_list, dlamb_list):
+            intens = self.cal.setup_tof(lam, dlam)
+            for index in np.ndindex(qx.shape):
+                sigmas = self.cal.compute(lam, dlam, float(qx[index]),
+                                          float(qy[index]), tof=tof)[2:]
+                for k, sigma in enumerate(sigmas):
+                    variances[(k,) + index] += sigma * sigma * intens
+            total_intensity += intens
+        return np.sqrt(variances / total_intensity)
+
+    def test_detector_pixels(self):
+        """
+            Test the map of the detector pixels matches compute()
+        """
+        qx, qy, sigma_1, sigma_2, sigma_r, sigma_1d = \
+            self.cal.compute_detector_map()
+        self.assertEqual(qx.shape, (64, 32))
+        self.assertEqual(sigma_1d.shape, (64, 32))
+        expected = self.scalar_map(qx, qy)
+        for result, values in zip((sigma_1, sigma_2, sigma_r, sigma_1d),
+                                  expected):
+            np.testing.assert_allclose(result, values, rtol=1e-12)
+        # The wavelength spread term grows away from the beam center
+        self.assertGreater(sigma_r.max(), 2 * sigma_r.min())
+
+    def test_wave_list(self):
+        """
+            Test the averaging over a list of wavelengths
+        """
+        self.cal.set_wave_list([5, 6, 8], [0.1, 0.125, 0.2])
+        q = np.linspace(-0.3, 0.3, 7)
+        qx, qy = np.meshgrid(q, q[::2])
+        result = self.cal.compute_detector_map(qx, qy)
+        self.assertEqual(result[0].shape, qx.shape)
+        np.testing.assert_array_equal(self.cal.sigma_1d, result[5])
+        expected = self.scalar_map(qx, qy)
+        for values, sigma in zip(expected, result[2:]):
+            np.testing.assert_allclose(sigma, values, rtol=1e-12)
+
+
+class image_window(unittest.TestCase):
+
+    def setUp(self):
+        self.cal = calculator()
+        self.cal.set_wavelength(6)
+        self.cal.set_sample2detector_distance([1300])
+        self.cal.get_all_instrument_params()
+        self.cal.image_size = 300
+
+    def image(self, coord, nsigma):
+        """
+            Sum the images of a few wavelengths around a q point
+        """
+        self.cal.image_nsigma = nsigma
+        self.cal.image_lam = []
+        for lam in (5, 6, 7):
+            self.cal.setup_tof(lam, 0.1)
+            _, _, sigma_1, sigma_2, sigma_r, _ = \
+                self.cal.compute(lam, 0.1 * lam, 0.01, 0.02, coord)
+            image = self.cal.get_image(0.01, 0.02, sigma_1, sigma_2, sigma_r,
+                                       -0.1, 0.1, -0.1, 0.1, coord)
+        return image
+
+    def test_window(self):
+        """
+            Test the gaussians computed near their center match the whole image
+        """
+        for coord in ('cartesian', 'polar'):
+            expected = self.image(coord, None)
+            self.assertEqual(expected.shape, (299, 299))
+            result = self.image(coord, 6.0)
+            np.testing.assert_allclose(result, expected, rtol=0,
+                                       atol=1e-7 * expected.max())
+            self.assertGreater(result.max(), 0)
+
+    def test_grid(self):
+        """
+            Test the pixel values are kept until the range or size changes
+        """
+        self.image('cartesian', 6.0)
+        grid = self.cal._image_grid
+        self.image('cartesian', 6.0)
+        self.assertIs(self.cal._image_grid, grid)
+        self.cal.image_size = 100
+        self.assertEqual(self.image('cartesian', 6.0).shape, (99, 99))
+
+
 if __name__ == '__main__':
     unittest.main()
-   
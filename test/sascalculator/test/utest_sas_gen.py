@@ -3,13 +3,15 @@ Unit tests for the sas_gen
 """
 
 import os.path
+import shutil
+import tempfile
 import warnings
 warnings.simplefilter("ignore")
 
 import unittest
 import numpy as np
 
-from sas.sascalc.calculator import sas_gen
+from sas.sascalc.calculator import geni, sas_gen
 
 
 def find(filename):
@@ -41,6 +43,31 @@ class sas_gen_test(unittest.TestCase):
         self.assertEqual(f.pos_y[0], -1.008)
         self.assertEqual(f.pos_z[0], 3.326)
 
+    def test_pdb_bonds(self):
+        """
+        Test bonds are read once, and unknown atoms have no sld
+        """
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, "bonds.pdb")
+            with open(path, 'w') as fid:
+                for k, name in enumerate(("C", "O", "C", "X")):
+                    fid.write("ATOM  %5d  %-3s ALA A   1    %8.3f%8.3f%8.3f\n"
+                              % (k + 1, name, k, 2 * k, 3 * k))
+                fid.write("CONECT    1    2    3\n")
+                fid.write("CONECT    2    1\n")
+                fid.write("CONECT    3    1    4\n")
+                fid.write("CONECT    4    9\n")
+            f = self.pdbloader.read(path)
+        finally:
+            shutil.rmtree(tmpdir)
+        self.assertEqual(list(f.pix_symbol), ["C", "O", "C", "X"])
+        self.assertEqual(f.sld_n[0], f.sld_n[2])
+        self.assertEqual(f.sld_n[3], 0.0)
+        self.assertEqual(len(f.vol_pix), 4)
+        self.assertEqual(f.line_x, [(0, 1), (0, 2), (2, 3)])
+        self.assertEqual(f.line_z, [(0, 3), (0, 6), (6, 9)])
+
     def test_omfreader(self):
         """
         Test .omf file loaded
@@ -55,6 +82,35 @@ class sas_gen_test(unittest.TestCase):
         self.assertEqual(output.pos_y[0], 0.0)
         self.assertEqual(output.pos_z[0], 0.0)
 
+    def test_omf_binary(self):
+        """
+        Test binary .omf files give the values of the text file
+        """
+        f = self.omfloader.read(find("A_Raw_Example-1.omf"))
+        with open(find("A_Raw_Example-1.omf"), 'rb') as fid:
+            header = fid.read().split(b"# Begin: Data Text")[0]
+        values = np.column_stack((f.mx, f.my, f.mz)) / sas_gen.MFACTOR_AM
+        tmpdir = tempfile.mkdtemp()
+        try:
+            for dtype in ('>f4', '<f4', '>f8', '<f8'):
+                size = int(dtype[2])
+                path = os.path.join(tmpdir, "binary.omf")
+                with open(path, 'wb') as fid:
+                    fid.write(header)
+                    fid.write(b"# Begin: Data Binary %d\n" % size)
+                    check = self.omfloader.binary_check[size]
+                    fid.write(np.array([check], dtype=dtype).tobytes())
+                    fid.write(values.astype(dtype).tobytes())
+                    fid.write(b"\n# End: Data Binary %d\n" % size)
+                    fid.write(b"# End: Segment\n")
+                g = self.omfloader.read(path)
+                rtol = 1e-7 if size == 4 else 1e-15
+                np.testing.assert_allclose(g.mx, f.mx, rtol=rtol)
+                np.testing.assert_allclose(g.mz, f.mz, rtol=rtol)
+                self.assertEqual(g.xnodes, f.xnodes)
+        finally:
+            shutil.rmtree(tmpdir)
+
     def test_calculator(self):
         """
         Test that the calculator calculates.
@@ -67,6 +123,151 @@ class sas_gen_test(unittest.TestCase):
         x = np.linspace(0, 0.1, 11)[1:]
         model.runXY([x, x])
 
+    def test_threads(self):
+        """
+        Test the threads give the same result as a single thread.
+        """
+        f = self.pdbloader.read(find("c60.pdb"))
+        model = sas_gen.GenSAS()
+        model.set_sld_data(f)
+        qx = np.linspace(-0.5, 0.5, 101)
+        qy = np.linspace(0.5, -0.5, 101)
+        serial_2d = model.runXY([qx, qy])
+        serial_1d = model.run([qx[51:], []])
+        model.set_nworkers(4)
+        np.testing.assert_array_equal(model.runXY([qx, qy]), serial_2d)
+        np.testing.assert_array_equal(model.run([qx[51:], []]), serial_1d)
+
+
+class histogram_test(unittest.TestCase):
+
+    def setUp(self):
+        f = sas_gen.PDBReader().read(find("c60.pdb"))
+        self.model = sas_gen.GenSAS()
+        self.model.set_sld_data(f)
+        self.model.params['solvent_SLD'] = 1.0e-6
+        self.q = np.linspace(0.01, 1.0, 50)
+
+    def test_bin_width(self):
+        """
+        Test the histogram converges to the sum over all pairs
+        """
+        exact = self.model.run([self.q, []])
+        errors = []
+        for bin_width in (0.4, 0.1, 0.025):
+            self.model.set_bin_width(bin_width)
+            result = self.model.run([self.q, []])
+            errors.append(np.max(np.abs(result - exact)) / np.max(exact))
+        self.assertLess(errors[1], 1e-3)
+        self.assertLess(errors[2], 1e-4)
+        # Second order in the bin width
+        self.assertLess(errors[2], errors[0] / 50)
+
+    def test_cache(self):
+        """
+        Test the histogram is reused until the solvent sld changes
+        """
+        self.model.set_bin_width(0.1)
+        first = self.model.run([self.q, []])
+        histogram = self.model.get_histogram()
+        self.model.params['scale'] = 2.0
+        np.testing.assert_allclose(self.model.run([self.q, []]), 2 * first)
+        self.assertIs(self.model.get_histogram(), histogram)
+        self.model.params['solvent_SLD'] = 2.0e-6
+        self.assertIsNot(self.model.get_histogram(), histogram)
+        self.model.set_bin_width(None)
+        exact = self.model.run([self.q, []])
+        self.model.set_bin_width(0.1)
+        np.testing.assert_allclose(self.model.run([self.q, []]), exact,
+                                   atol=1e-2 * np.max(exact))
+
+
+class geni_test(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.q = np.linspace(0.01, 0.5, 7)
+        self.x, self.y, self.z = rng.uniform(-10, 10, (3, 13))
+        self.sld = rng.uniform(0.5, 1.5, 13)
+        self.vol = np.full(13, 2.0)
+
+    def test_blocks(self):
+        """
+        Test I(q) does not depend on the blocks, and no block of
+        (q, pixel pair) values is larger than block_size
+        """
+        x, y, z, q = self.x, self.y, self.z, self.q
+        dist = np.sqrt((x[:, None] - x)**2 + (y[:, None] - y)**2
+                       + (z[:, None] - z)**2)
+        weights = self.sld * self.vol
+        expected = [np.sum(np.sinc(qk * dist / np.pi)
+                           * np.outer(weights, weights)) for qk in q]
+        expected = np.array(expected) * 1.0e8 / np.sum(self.vol)
+
+        sizes = []
+        sinc = np.sinc
+        def spy(values):
+            sizes.append(np.size(values))
+            return sinc(values)
+        geni.np.sinc = spy
+        try:
+            for block_size in (1, 5, 13, 50, 13*13*7, geni.BLOCK_SIZE):
+                del sizes[:]
+                result = geni.Iq(q, x, y, z, self.sld, self.vol,
+                                 block_size=block_size)
+                np.testing.assert_allclose(result, expected, rtol=1e-12)
+                self.assertLessEqual(max(sizes), block_size)
+        finally:
+            geni.np.sinc = sinc
+
+
+@unittest.skipIf(sas_gen._sld2i is None, "sld2i library is not built")
+class engine_test(unittest.TestCase):
+
+    def setUp(self):
+        q = np.linspace(-0.1, 0.1, 11)
+        qx, qy = np.meshgrid(q, q)
+        self.qx, self.qy = qx.flatten(), qy.flatten()
+
+    def compare(self, model, data):
+        expected = model.run(data) if not len(data[1]) else model.runXY(data)
+        model.set_engine('numpy')
+        result = model.run(data) if not len(data[1]) else model.runXY(data)
+        model.set_engine('c')
+        np.testing.assert_allclose(result, expected, rtol=1e-10,
+                                   atol=1e-10 * np.max(np.abs(expected)))
+
+    def test_magnetic(self):
+        """
+        Test the numpy engine matches the C library for the spin states
+        """
+        f = sas_gen.OMFReader().read(find("A_Raw_Example-1.omf"))
+        omf2sld = sas_gen.OMF2SLD()
+        omf2sld.set_data(f)
+        model = sas_gen.GenSAS()
+        model.set_sld_data(omf2sld.output)
+        model.params['solvent_SLD'] = 1.0e-6
+        for up_in, up_out, theta in ((1.0, 1.0, 0.0), (0.0, 1.0, 90.0),
+                                     (0.5, 0.5, 30.0), (0.2, 0.9, -45.0)):
+            model.params['Up_frac_in'] = up_in
+            model.params['Up_frac_out'] = up_out
+            model.params['Up_theta'] = theta
+            self.compare(model, [self.qx, self.qy])
+
+    def test_nuclear(self):
+        """
+        Test the numpy engine matches the C library for 1D and 2D
+        """
+        f = sas_gen.PDBReader().read(find("c60.pdb"))
+        model = sas_gen.GenSAS()
+        model.set_sld_data(f)
+        model.params['solvent_SLD'] = 1.0e-6
+        self.compare(model, [self.qx, self.qy])
+        q = np.linspace(0, 1.0, 21)
+        self.compare(model, [q, []])
+        model.set_is_avg(True)
+        self.compare(model, [q, []])
+
 
 if __name__ == '__main__':
     unittest.main()
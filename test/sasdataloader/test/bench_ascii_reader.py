@@ -0,0 +1,83 @@
+"""
+Timing of the ASCII 1D reader.
+
+Files of increasing length, with a header and a footer, are loaded with
+the block conversion of the data and with the line by line parser it
+falls back to. The data of both paths are checked to be identical.
+
+Usage::
+
+    PYTHONPATH=src python test/sasdataloader/test/bench_ascii_reader.py
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from sas.sascalc.dataloader.readers.ascii_reader import Reader
+
+SIZES = (100, 1000, 10000, 100000)
+FILES = 20
+
+
+class LineReader(Reader):
+    """
+    ASCII reader which always parses the data line by line
+    """
+    def read_data_block(self, lines, lentoks):
+        return None
+
+
+def write_file(path, npts):
+    """
+    Write a 4 column file of npts points with a header and a footer
+    """
+    rng = np.random.RandomState(0)
+    q = np.linspace(0.001, 0.5, npts)
+    columns = np.column_stack((q, rng.rand(npts), 0.1 * rng.rand(npts),
+                               0.01 * q))
+    with open(path, 'w') as fid:
+        fid.write("<X>   <Y>   <dY>   <dX>\n")
+        np.savetxt(fid, columns, fmt="%.8e", delimiter="\t")
+        fid.write("\nEnd of data\n")
+
+
+def load(reader, paths):
+    """
+    Return the data loaded from paths and the time it took in seconds
+    """
+    start = time.time()
+    output = [reader.read(path)[0] for path in paths]
+    return output, time.time() - start
+
+
+def main():
+    tmpdir = tempfile.mkdtemp()
+    try:
+        print("%10s %8s %12s %12s %10s" % ("points", "files", "lines [s]",
+                                          "block [s]", "speedup"))
+        for npts in SIZES:
+            nfiles = max(1, FILES * SIZES[0] // npts)
+            paths = [os.path.join(tmpdir, "data%d_%d.txt" % (npts, k))
+                     for k in range(nfiles)]
+            for path in paths:
+                write_file(path, npts)
+            old, t_old = load(LineReader(), paths)
+            new, t_new = load(Reader(), paths)
+            for old_data, new_data in zip(old, new):
+                for field in ('x', 'y', 'dx', 'dy'):
+                    if not np.array_equal(getattr(old_data, field),
+                                          getattr(new_data, field)):
+                        raise RuntimeError("line and block results differ")
+            print("%10d %8d %12.4f %12.4f %10.1f"
+                  % (npts, nfiles, t_old, t_new, t_old / t_new))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    main()
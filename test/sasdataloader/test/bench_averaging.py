@@ -0,0 +1,217 @@
+"""
+Benchmark of the 2D averaging classes in sas.sascalc.dataloader.manipulations.
+
+The vectorized CircularAverage, Ring and SectorQ are timed against the
+per-pixel loops they replaced, on synthetic detectors of increasing size.
+The results of both paths are checked to be identical.
+
+Usage::
+
+    PYTHONPATH=src python test/sasdataloader/test/bench_averaging.py
+"""
+from __future__ import print_function
+
+import math
+import time
+
+import numpy as np
+
+from sas.sascalc.dataloader.data_info import Data2D
+from sas.sascalc.dataloader.manipulations import (CircularAverage, Ring,
+                                                  SectorQ, Binning, flip_phi)
+
+SIZES = (128, 512, 1024)
+
+
+def make_data(npix):
+    """
+    Build an npix x npix detector with noisy intensities, some NaNs and
+    some points without uncertainty.
+    """
+    rng = np.random.RandomState(0)
+    q = np.linspace(-0.1, 0.1, npix)
+    qx, qy = np.meshgrid(q, q)
+    qx, qy = qx.flatten(), qy.flatten()
+    data = rng.normal(1.0, 0.1, npix * npix)
+    data[::97] = np.nan
+    err = np.abs(rng.normal(0.0, 0.01, npix * npix))
+    err[::13] = 0.0
+    return Data2D(data=data, err_data=err, qx_data=qx, qy_data=qy,
+                  q_data=np.sqrt(qx * qx + qy * qy),
+                  mask=np.ones(npix * npix, dtype=bool))
+
+
+def loop_circular_average(r_min, r_max, bin_width, data2D):
+    """
+    Per-pixel loop formerly used by CircularAverage
+    """
+    finite = np.isfinite(data2D.data)
+    data = data2D.data[finite]
+    q_data = data2D.q_data[finite]
+    err_data = data2D.err_data[finite]
+    nbins = int(math.ceil((r_max - r_min) / bin_width))
+    x = np.zeros(nbins)
+    y = np.zeros(nbins)
+    err_y = np.zeros(nbins)
+    y_counts = np.zeros(nbins)
+    for npt in range(len(data)):
+        q_value = q_data[npt]
+        data_n = data[npt]
+        if not r_min <= q_value <= r_max:
+            continue
+        i_q = int(math.floor((q_value - r_min) / bin_width))
+        if i_q == nbins:
+            i_q = nbins - 1
+        y[i_q] += data_n
+        x[i_q] += q_value
+        if err_data[npt] == 0.0:
+            err_y[i_q] += math.fabs(data_n)
+        else:
+            err_y[i_q] += err_data[npt] * err_data[npt]
+        y_counts[i_q] += 1
+    for n in range(nbins):
+        err_y[n] = math.sqrt(err_y[n])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        err_y = err_y / y_counts
+        err_y[err_y == 0] = np.average(err_y)
+        y = y / y_counts
+        x = x / y_counts
+    idx = np.isfinite(y) & np.isfinite(x)
+    return x[idx], y[idx], err_y[idx]
+
+
+def loop_ring(r_min, r_max, nbins, data2D):
+    """
+    Per-pixel loop formerly used by Ring
+    """
+    finite = np.isfinite(data2D.data)
+    data = data2D.data[finite]
+    q_data = data2D.q_data[finite]
+    err_data = data2D.err_data[finite]
+    qx_data = data2D.qx_data[finite]
+    qy_data = data2D.qy_data[finite]
+    phi_bins = np.zeros(nbins)
+    phi_counts = np.zeros(nbins)
+    phi_err = np.zeros(nbins)
+    phi_shift = math.pi / nbins
+    for npt in range(len(data)):
+        q_value = q_data[npt]
+        phi_value = math.atan2(qy_data[npt], qx_data[npt]) + math.pi
+        if not r_min <= q_value <= r_max:
+            continue
+        i_phi = int(math.floor(nbins * (phi_value + phi_shift) / (2 * math.pi)))
+        if i_phi >= nbins:
+            i_phi = 0
+        phi_bins[i_phi] += data[npt]
+        if err_data[npt] == 0.0:
+            phi_err[i_phi] += math.fabs(data[npt])
+        else:
+            phi_err[i_phi] += err_data[npt] * err_data[npt]
+        phi_counts[i_phi] += 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        phi_bins = phi_bins / phi_counts
+        phi_err = np.sqrt(phi_err) / phi_counts
+    phi_values = 2.0 * math.pi / nbins * np.arange(nbins)
+    idx = np.isfinite(phi_bins)
+    return phi_values[idx], phi_bins[idx], phi_err[idx]
+
+
+def loop_sector_q(r_min, r_max, phi_min, phi_max, nbins, data2D):
+    """
+    Per-pixel loop formerly used by SectorQ
+    """
+    finite = np.isfinite(data2D.data)
+    data = data2D.data[finite]
+    q_data = data2D.q_data[finite]
+    err_data = data2D.err_data[finite]
+    qx_data = data2D.qx_data[finite]
+    qy_data = data2D.qy_data[finite]
+    x = np.zeros(nbins)
+    y = np.zeros(nbins)
+    y_err = np.zeros(nbins)
+    y_counts = np.zeros(nbins)
+    binning = Binning(r_min, r_max, nbins)
+    phi_min_major = flip_phi(phi_min)
+    phi_max_major = flip_phi(phi_max)
+    phi_min_minor = flip_phi(phi_min_major - math.pi)
+    phi_max_minor = flip_phi(phi_max_major - math.pi)
+    for n in range(len(data)):
+        q_value = q_data[n]
+        phi_value = math.atan2(qy_data[n], qx_data[n]) + math.pi
+        if r_min > q_value or q_value > r_max:
+            continue
+        if phi_min_minor > phi_max_minor:
+            is_in = phi_value > phi_min_minor or phi_value < phi_max_minor
+        else:
+            is_in = phi_min_minor < phi_value < phi_max_minor
+        if phi_min_major > phi_max_major:
+            is_in = is_in or (phi_value > phi_min_major or
+                              phi_value < phi_max_major)
+        else:
+            is_in = is_in or (phi_min_major <= phi_value < phi_max_major)
+        if not is_in:
+            continue
+        i_bin = binning.get_bin_index(q_value)
+        if i_bin == nbins:
+            i_bin = nbins - 1
+        y[i_bin] += data[n]
+        x[i_bin] += q_value
+        if err_data[n] == 0.0:
+            y_err[i_bin] += math.fabs(data[n])
+        else:
+            y_err[i_bin] += err_data[n]**2
+        y_counts[i_bin] += 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = y / y_counts
+        y_err = np.sqrt(y_err) / y_counts
+        x = x / y_counts
+    idx = np.isfinite(y) & np.isfinite(y_err)
+    return x[idx], y[idx], y_err[idx]
+
+
+def timed(fn, *args):
+    """
+    Return the result of fn(*args) and the time it took in seconds
+    """
+    start = time.time()
+    result = fn(*args)
+    return result, time.time() - start
+
+
+def check(old, new, name):
+    """
+    Make sure both paths produced the same averages
+    """
+    for old_v, new_v in zip(old, (new.x, new.y, new.dy)):
+        if not np.array_equal(old_v, new_v):
+            raise RuntimeError("%s: loop and vectorized results differ" % name)
+
+
+def main():
+    print("%-16s %10s %12s %12s %10s" % ("averager", "pixels", "loop [s]",
+                                        "vector [s]", "speedup"))
+    for npix in SIZES:
+        data2D = make_data(npix)
+        cases = [
+            ("CircularAverage",
+             lambda: loop_circular_average(0.0, 0.1, 0.001, data2D),
+             lambda: CircularAverage(r_min=0.0, r_max=0.1,
+                                     bin_width=0.001)(data2D)),
+            ("Ring",
+             lambda: loop_ring(0.02, 0.06, 36, data2D),
+             lambda: Ring(r_min=0.02, r_max=0.06, nbins=36)(data2D)),
+            ("SectorQ",
+             lambda: loop_sector_q(0.0, 0.1, 0.0, math.pi / 4, 50, data2D),
+             lambda: SectorQ(r_min=0.0, r_max=0.1, phi_min=0.0,
+                             phi_max=math.pi / 4, nbins=50)(data2D)),
+        ]
+        for name, loop, vector in cases:
+            old, t_old = timed(loop)
+            new, t_new = timed(vector)
+            check(old, new, name)
+            print("%-16s %10d %12.4f %12.4f %10.1f"
+                  % (name, npix * npix, t_old, t_new, t_old / t_new))
+
+
+if __name__ == "__main__":
+    main()
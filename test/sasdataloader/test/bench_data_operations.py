@@ -0,0 +1,138 @@
+"""
+Benchmark of the arithmetic operations of Data1D and Data2D.
+
+Two data sets with uncertainties and resolutions are added, subtracted,
+multiplied and divided with the whole-array operations, and with the
+per-point loop they replaced. The results of both paths are checked to
+be identical.
+
+Usage::
+
+    PYTHONPATH=src python test/sasdataloader/test/bench_data_operations.py [npoints ...]
+"""
+from __future__ import print_function
+
+import math
+import operator
+import sys
+import time
+
+import numpy as np
+
+from sas.sascalc.data_util.uncertainty import Uncertainty
+from sas.sascalc.dataloader.data_info import Data1D, Data2D
+
+SIZES = (1000, 100000, 1000000)
+OPERATIONS = (("add", operator.add), ("sub", operator.sub),
+              ("mul", operator.mul), ("div", operator.truediv))
+
+
+def make_1d(npoints, seed):
+    """
+    Data set of npoints with uncertainties on x and y
+    """
+    rng = np.random.RandomState(seed)
+    return Data1D(x=np.linspace(0.001, 0.5, npoints),
+                  y=rng.uniform(1, 2, npoints),
+                  dx=rng.uniform(0, 0.01, npoints),
+                  dy=rng.uniform(0, 0.1, npoints))
+
+
+def make_2d(npoints, seed):
+    """
+    Detector of npoints pixels with uncertainties on q and I
+    """
+    rng = np.random.RandomState(0)
+    qx = rng.uniform(-0.3, 0.3, npoints)
+    qy = rng.uniform(-0.3, 0.3, npoints)
+    rng = np.random.RandomState(seed)
+    return Data2D(data=rng.uniform(1, 2, npoints),
+                  err_data=rng.uniform(0, 0.1, npoints),
+                  qx_data=qx, qy_data=qy, q_data=np.sqrt(qx*qx + qy*qy),
+                  mask=np.ones(npoints, dtype=bool),
+                  dqx_data=rng.uniform(0, 0.01, npoints),
+                  dqy_data=rng.uniform(0, 0.01, npoints))
+
+
+def loop_1d(data, other, operation):
+    """
+    Per-point loop formerly used by Data1D._perform_operation, with the
+    squares computed as products as the array path does
+    """
+    y = np.zeros(len(data.x))
+    dy = np.zeros(len(data.x))
+    dx = np.array(data.dx, dtype=float)
+    for i in range(len(data.x)):
+        a = Uncertainty(data.y[i], data.dy[i]*data.dy[i])
+        b = Uncertainty(other.y[i], other.dy[i]*other.dy[i])
+        dx[i] *= data.dx[i]
+        dx[i] += other.dx[i]*other.dx[i]
+        dx[i] /= 2
+        dx[i] = math.sqrt(dx[i])
+        output = operation(a, b)
+        y[i] = output.x
+        dy[i] = math.sqrt(math.fabs(output.variance))
+    return y, dy, dx
+
+
+def loop_2d(data, other, operation):
+    """
+    Per-pixel loop formerly used by Data2D._perform_operation, with the
+    squares computed as products as the array path does
+    """
+    for ind in range(len(data.data)):
+        if math.fabs(data.qx_data[ind] - other.qx_data[ind]) \
+                > math.fabs(data.qx_data[ind])*0.01:
+            raise ValueError("qx-values do not match")
+        if math.fabs(data.qy_data[ind] - other.qy_data[ind]) \
+                > math.fabs(data.qy_data[ind])*0.01:
+            raise ValueError("qy-values do not match")
+    values = np.zeros(len(data.data))
+    err = np.zeros(len(data.data))
+    dqx = np.array(data.dqx_data, dtype=float)
+    for i in range(len(data.data)):
+        a = Uncertainty(data.data[i], data.err_data[i]*data.err_data[i])
+        b = Uncertainty(other.data[i], other.err_data[i]*other.err_data[i])
+        dqx[i] *= data.dqx_data[i]
+        dqx[i] += other.dqx_data[i]*other.dqx_data[i]
+        dqx[i] /= 2
+        dqx[i] = math.sqrt(dqx[i])
+        output = operation(a, b)
+        values[i] = output.x
+        err[i] = math.sqrt(math.fabs(output.variance))
+    return values, err, dqx
+
+
+def check(old, new, name):
+    """
+    Make sure both paths produced the same values
+    """
+    for old_v, new_v in zip(old, new):
+        if not np.array_equal(new_v, old_v):
+            raise RuntimeError("%s: loop and array results differ" % name)
+
+
+def main(*sizes):
+    print("%-8s %10s %12s %12s %10s" % ("data", "points", "loop [s]",
+                                        "array [s]", "speedup"))
+    for npoints in sizes or SIZES:
+        for kind, make, loop, fields in (
+                ("1D", make_1d, loop_1d, ("y", "dy", "dx")),
+                ("2D", make_2d, loop_2d, ("data", "err_data", "dqx_data"))):
+            data, other = make(npoints, 1), make(npoints, 2)
+            for name, operation in OPERATIONS:
+                start = time.time()
+                old = loop(data, other, operation)
+                loop_time = time.time() - start
+                start = time.time()
+                result = operation(data, other)
+                array_time = time.time() - start
+                check(old, [getattr(result, f) for f in fields],
+                      "%s %s" % (kind, name))
+                print("%-8s %10d %12.4f %12.4f %10.1f"
+                      % ("%s %s" % (kind, name), npoints, loop_time,
+                         array_time, loop_time / array_time))
+
+
+if __name__ == "__main__":
+    main(*[int(v) for v in sys.argv[1:]])
@@ -0,0 +1,98 @@
+"""
+Timing and memory of the NXcanSAS reader on multi-frame 1D files.
+
+Kinetic files with an increasing number of frames of I(Q) and dI(Q) are
+written with h5py and loaded with the NXcanSAS reader. read() returns
+every frame at once, so its peak memory grows with the size of the
+intensities in the file. read_frames() reads each frame from the file as
+it is requested; with the frames processed one at a time, as done here,
+its peak memory is that of a single frame. The frames read back are
+checked against the generated ones.
+
+Usage::
+
+    PYTHONPATH=src python test/sasdataloader/test/bench_nxcansas_reader.py [nframes ...]
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import h5py
+import numpy as np
+
+from sas.sascalc.dataloader.readers import cansas_reader_HDF5
+
+NFRAMES = (10, 100, 1000)
+NQ = 500
+
+
+def write_file(path, nframes):
+    """
+    Write nframes frames of NQ points, and return the intensities
+    """
+    q = np.linspace(0.001, 0.5, NQ)
+    frames = np.random.RandomState(0).uniform(1, 2, (nframes, NQ))
+    with h5py.File(path, 'w') as f_open:
+        entry = f_open.create_group("sasentry01")
+        entry.attrs["canSAS_class"] = "SASentry"
+        sasdata = entry.create_group("sasdata01")
+        sasdata.attrs["canSAS_class"] = "SASdata"
+        sasdata.attrs["signal"] = "I"
+        sasdata.attrs["I_axes"] = "Time,Q"
+        sasdata.attrs["Q_indices"] = [1]
+        sasdata.create_dataset("Q", data=q).attrs["units"] = "1/A"
+        intensity = sasdata.create_dataset("I", data=frames)
+        intensity.attrs["units"] = "1/cm"
+        intensity.attrs["uncertainties"] = "Idev"
+        sasdata.create_dataset("Idev", data=frames / 10)
+    return frames
+
+
+def load(path, lazy):
+    """
+    Read the frames of path, with read_frames() if lazy or else read(),
+    and return the time and peak memory it took
+    """
+    tracemalloc.start()
+    start = time.time()
+    reader = cansas_reader_HDF5.Reader()
+    if lazy:
+        # Process each frame, then let it go
+        output = [np.sum(data.y) for data in reader.read_frames(path)]
+    else:
+        output = [np.sum(data.y) for data in reader.read(path)]
+    elapsed = time.time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return output, elapsed, peak
+
+
+def main(*sizes):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        print("%10s %12s %12s %12s %12s %12s"
+              % ("frames", "file [MB]", "read [s]", "peak [MB]",
+                 "frames [s]", "peak [MB]"))
+        for nframes in sizes or NFRAMES:
+            path = os.path.join(tmpdir, "frames%d.h5" % nframes)
+            frames = write_file(path, nframes)
+            expected = list(np.sum(frames, axis=1))
+            sums, t_read, peak_read = load(path, lazy=False)
+            lazy_sums, t_lazy, peak_lazy = load(path, lazy=True)
+            if not (np.allclose(sums, expected, rtol=1e-12, atol=0)
+                    and np.allclose(lazy_sums, expected, rtol=1e-12, atol=0)):
+                raise RuntimeError("frames read incorrectly")
+            print("%10d %12.2f %12.4f %12.2f %12.4f %12.2f"
+                  % (nframes, 2 * frames.nbytes / 1e6, t_read,
+                     peak_read / 1e6, t_lazy, peak_lazy / 1e6))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    main(*[int(v) for v in sys.argv[1:]])
@@ -0,0 +1,106 @@
+"""
+Timing of q-range sweeps on large 2D data sets.
+
+A sweep of annulus cuts and of 2D fit ranges is timed with the radius
+index of the data geometry, against a full scan of the detector for each
+range. The selections of both paths are checked to be identical.
+
+Usage::
+
+    PYTHONPATH=src python test/sasdataloader/test/bench_q_range.py
+"""
+from __future__ import print_function
+
+import time
+
+import numpy as np
+
+from sas.sascalc.dataloader.data_info import Data2D
+from sas.sascalc.dataloader.manipulations import Ringcut
+from sas.sascalc.fit.AbstractFitEngine import FitData2D
+
+SIZES = (512, 1024, 2048)
+STEPS = 50
+
+
+def make_data(npix):
+    """
+    Build an npix x npix detector spanning |qx|, |qy| <= 0.1
+    """
+    q = np.linspace(-0.1, 0.1, npix)
+    qx, qy = np.meshgrid(q, q)
+    qx, qy = qx.flatten(), qy.flatten()
+    data = np.random.RandomState(0).normal(1.0, 0.1, npix * npix)
+    data2D = Data2D(data=data, err_data=np.sqrt(np.fabs(data)),
+                    qx_data=qx, qy_data=qy, q_data=np.sqrt(qx * qx + qy * qy),
+                    mask=np.ones(npix * npix, dtype=bool))
+    data2D.xmin, data2D.xmax = -0.1, 0.1
+    data2D.ymin, data2D.ymax = -0.1, 0.1
+    return data2D
+
+
+def scan_ring(r_min, r_max, data2D):
+    """
+    Full scan formerly used by Ringcut
+    """
+    q_data = np.sqrt(data2D.qx_data * data2D.qx_data +
+                     data2D.qy_data * data2D.qy_data)
+    return (r_min <= q_data) & (r_max >= q_data)
+
+
+def scan_fit_range(qmin, qmax, fitdata):
+    """
+    Full scan formerly used by FitData2D.set_fit_range
+    """
+    radius = np.sqrt(fitdata.qx_data**2 + fitdata.qy_data**2)
+    idx = (qmin <= radius) & (radius <= qmax)
+    idx &= fitdata.mask
+    idx &= np.isfinite(fitdata.data)
+    idx &= fitdata.res_err_data != 0
+    return idx
+
+
+def main():
+    print("%-12s %10s %12s %12s %10s" % ("sweep", "pixels", "scan [s]",
+                                        "index [s]", "speedup"))
+    for npix in SIZES:
+        data2D = make_data(npix)
+        fitdata = FitData2D(sas_data2d=data2D, data=data2D.data,
+                            err_data=data2D.err_data)
+        # Narrow annuli, as when dragging an annulus slicer
+        radii = np.linspace(0.001, 0.09, STEPS)
+        rings = [(r, r + 0.005) for r in radii]
+        # Growing fit ranges, as when sweeping q_max in a fit page
+        ranges = [(0.001, r) for r in radii]
+
+        start = time.time()
+        for r_min, r_max in rings:
+            scan_ring(r_min, r_max, data2D)
+        t_scan = time.time() - start
+        # The first call builds the index; include it in the timing
+        data2D.reset_geometry()
+        start = time.time()
+        for r_min, r_max in rings:
+            out = Ringcut(r_min=r_min, r_max=r_max)(data2D)
+        t_index = time.time() - start
+        if not np.array_equal(out, scan_ring(r_min, r_max, data2D)):
+            raise RuntimeError("Ringcut: scan and index results differ")
+        print("%-12s %10d %12.4f %12.4f %10.1f"
+              % ("Ringcut", npix * npix, t_scan, t_index, t_scan / t_index))
+
+        start = time.time()
+        for qmin, qmax in ranges:
+            scan_fit_range(qmin, qmax, fitdata)
+        t_scan = time.time() - start
+        start = time.time()
+        for qmin, qmax in ranges:
+            fitdata.set_fit_range(qmin=qmin, qmax=qmax)
+        t_index = time.time() - start
+        if not np.array_equal(fitdata.idx, scan_fit_range(qmin, qmax, fitdata)):
+            raise RuntimeError("FitData2D: scan and index results differ")
+        print("%-12s %10d %12.4f %12.4f %10.1f"
+              % ("fit range", npix * npix, t_scan, t_index, t_scan / t_index))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,17 @@
 """
 
 import os.path
+import shutil
+import tempfile
 import warnings
 import math
 warnings.simplefilter("ignore")
 
 import unittest
+import numpy as np
 from sas.sascalc.dataloader.loader import Loader
 from sas.sascalc.dataloader.data_info import Data2D
+from sas.sascalc.dataloader.readers.ascii_reader import Reader
 
 
 def find(filename):
@@ -131,6 +135,121 @@ class ABSReaderTests(unittest.TestCase):
             self.assertFalse(math.isnan(f_2d.qy_data[i]))
 
 
+class BlockReader(Reader):
+    """
+    ASCII reader recording whether the data block was converted at once
+    """
+    def read_data_block(self, lines, lentoks):
+        block = Reader.read_data_block(self, lines, lentoks)
+        self.used_block = block is not None
+        return block
+
+
+class LineReader(Reader):
+    """
+    ASCII reader which always parses the data line by line
+    """
+    def read_data_block(self, lines, lentoks):
+        return None
+
+
+class DataBlockTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        rng = np.random.RandomState(0)
+        self.values = np.column_stack((np.linspace(0.001, 0.5, 20),
+                                       rng.rand(20), 0.1 * rng.rand(20),
+                                       0.01 * rng.rand(20)))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def rows(self, ncols, delimiter=" ", start=0, stop=20):
+        return [delimiter.join("%.17g" % v for v in row[:ncols])
+                for row in self.values[start:stop]]
+
+    def compare(self, lines, fast=True):
+        """
+        Check the block conversion loads the data of the line parser,
+        and whether it was used
+        """
+        path = os.path.join(self.tmpdir, "data.txt")
+        with open(path, "w") as fid:
+            fid.write("\n".join(lines) + "\n")
+        reader = BlockReader()
+        reader.used_block = False
+        data = reader.read(path)[0]
+        expected = LineReader().read(path)[0]
+        for field in ('x', 'y', 'dx', 'dy'):
+            np.testing.assert_array_equal(getattr(data, field),
+                                          getattr(expected, field))
+        self.assertEqual(reader.used_block, fast)
+        return data
+
+    def test_mixed_columns(self):
+        """
+            Test the block ends at a line with another number of columns,
+            with header lines of numbers before it
+        """
+        lines = ["<X> <Y> <dY> <dX>"] + self.rows(2, stop=3) \
+            + self.rows(4, start=3, stop=15) + self.rows(3, start=15)
+        data = self.compare(lines)
+        self.assertEqual(len(data.x), 12)
+        np.testing.assert_array_equal(data.dx, self.values[3:15, 3])
+        lines = self.rows(3, stop=10) + ["1 2"] + self.rows(3, start=10)
+        self.assertEqual(len(self.compare(lines).x), 10)
+
+    def test_comments(self):
+        """
+            Test comment lines in the block end the data as a footer
+        """
+        for comment in ("# a comment", "#", "# comment with three words",
+                        "Sample: 1"):
+            lines = ["Q I dI"] + self.rows(3, stop=10) + [comment] \
+                + self.rows(3, start=10)
+            # A comment with as many words as columns is left to the
+            # line parser, which stops at its first word
+            data = self.compare(lines, fast=len(comment.split()) != 3)
+            self.assertEqual(len(data.x), 10)
+
+    def test_blank_lines(self):
+        """
+            Test blank lines within the block are skipped
+        """
+        for delimiter in (" ", ","):
+            lines = self.rows(4, delimiter, stop=8) + ["", "  "] \
+                + self.rows(4, delimiter, start=8)
+            self.assertEqual(len(self.compare(lines).x), 20)
+
+    def test_delimiters(self):
+        """
+            Test comma, semicolon and tab separated columns
+        """
+        for delimiter in (",", ", ", ";", "\t", " \t "):
+            data = self.compare(["Q,I,dI,dQ"] + self.rows(4, delimiter))
+            np.testing.assert_array_equal(data.y, self.values[:, 1])
+        # Mixed delimiters are left to the line parser
+        lines = self.rows(2, ",", stop=10) + self.rows(2, ";", start=10)
+        self.assertEqual(len(self.compare(lines, fast=False).x), 20)
+        lines = self.rows(2, "\t", stop=10) + self.rows(2, ",", start=10)
+        self.assertEqual(len(self.compare(lines, fast=False).x), 20)
+
+    def test_nan_inf(self):
+        """
+            Test NaN and infinite values in the block are converted
+        """
+        for delimiter in (" ", ","):
+            lines = self.rows(3, delimiter)
+            lines[7] = delimiter.join(("0.2", "nan", "0.1"))
+            lines[8] = delimiter.join(("0.21", "inf", "NaN"))
+            lines[9] = delimiter.join(("0.22", "-Infinity", "0.1"))
+            data = self.compare(lines)
+            # The points which are not finite are removed
+            self.assertEqual(len(data.x), 17)
+            self.assertFalse(0.2 in data.x)
+
+
 if __name__ == '__main__':
     unittest.main()
    
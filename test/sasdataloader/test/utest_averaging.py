@@ -7,8 +7,11 @@ import numpy as np
 
 import sas.sascalc.dataloader.data_info as data_info
 from sas.sascalc.dataloader.loader import Loader
+from sas.sascalc.calculator.BaseComponent import BaseComponent
+from sas.sascalc.fit.AbstractFitEngine import FitData2D, is_centrosymmetric
 from sas.sascalc.dataloader.manipulations import (Boxavg, Boxsum,
                                                   CircularAverage, Ring,
+                                                  Ringcut,
                                                   SectorPhi, SectorQ, SlabX,
                                                   SlabY, get_q,
                                                   reader2D_converter)
@@ -77,6 +80,143 @@ class Averaging(unittest.TestCase):
         for i in range(20):
             self.assertEqual(o.y[i], 1.0)
 
+    def test_circularavg_flat_distribution(self):
+        """
+            Test circular averaging
+        """
+        r = CircularAverage(r_min=2 * self.qmin, r_max=5 * self.qmin,
+                            bin_width=self.qmin / 2)
+        o = r(self.data)
+        self.assertTrue(len(o.x) > 0)
+        for i in range(len(o.x)):
+            self.assertAlmostEqual(o.y[i], 1.0)
+            self.assertTrue(2 * self.qmin <= o.x[i] <= 5 * self.qmin)
+
+        # Masking all but the points with qx > 0 leaves a flat distribution
+        self.data.mask = self.data.qx_data > 0
+        o_masked = r(self.data, ismask=True)
+        for i in range(len(o_masked.x)):
+            self.assertAlmostEqual(o_masked.y[i], 1.0)
+
+    def test_sectorq_flat_distribution(self):
+        """
+            Test sector averaging I(q) on both wings
+        """
+        r = SectorQ(r_min=self.qmin, r_max=3 * self.qmin,
+                    phi_min=0, phi_max=math.pi / 2.0, nbins=10)
+        o = r(self.data)
+        self.assertTrue(len(o.x) > 0)
+        for i in range(len(o.x)):
+            self.assertAlmostEqual(o.y[i], 1.0)
+
+    def test_geometry_cache(self):
+        """
+            Test that the polar geometry is reused until the data changes
+        """
+        geometry = self.data.get_geometry()
+        np.testing.assert_array_equal(
+            geometry.phi, np.arctan2(self.data.qy_data, self.data.qx_data))
+        np.testing.assert_array_equal(
+            geometry.q, np.sqrt(self.data.qx_data**2 + self.data.qy_data**2))
+        self.assertTrue(np.all(np.diff(geometry.q_index.sorted_values) >= 0))
+
+        # Repeated averaging reuses the same geometry
+        Ring(r_min=2 * self.qmin, r_max=5 * self.qmin)(self.data)
+        SectorQ(r_min=self.qmin, r_max=3 * self.qmin)(self.data)
+        self.assertTrue(self.data.get_geometry() is geometry)
+
+        # Replacing an array invalidates the geometry
+        self.data.data = self.data.data.copy()
+        self.data.data[0] = np.nan
+        new_geometry = self.data.get_geometry()
+        self.assertFalse(new_geometry is geometry)
+        self.assertFalse(new_geometry.finite[0])
+
+        # In place changes need an explicit reset
+        self.data.data[1] = np.nan
+        self.assertTrue(self.data.get_geometry().finite[1])
+        self.data.reset_geometry()
+        self.assertFalse(self.data.get_geometry().finite[1])
+
+    def test_q_index(self):
+        """
+            Test q-range lookups through the sorted radius index
+        """
+        q = self.data.get_geometry().q
+        index = self.data.get_geometry().q_index
+        for q_min, q_max in [(0, 10), (self.qmin, 3 * self.qmin),
+                             (5 * self.qmin, 5.5 * self.qmin), (1, 2),
+                             (q[17], q[17])]:
+            expected = (q_min <= q) & (q <= q_max)
+            np.testing.assert_array_equal(index.mask(q_min, q_max), expected)
+            self.assertEqual(index.count(q_min, q_max), np.sum(expected))
+            np.testing.assert_array_equal(np.sort(index.select(q_min, q_max)),
+                                          np.flatnonzero(expected))
+
+        # The ring cut uses the index
+        out = Ringcut(r_min=self.qmin, r_max=3 * self.qmin)(self.data)
+        np.testing.assert_array_equal(
+            out, (self.qmin <= q) & (q <= 3 * self.qmin))
+
+    def test_eval_symmetric(self):
+        """
+            Test models with I(q) = I(-q) are evaluated once per pair of points
+        """
+        calls = []
+
+        def fn(q):
+            calls.append(len(q[0]))
+            return np.cos(3 * q[0]) + q[0] * q[1]
+
+        geometry = self.data.get_geometry()
+        index = (geometry.q >= self.qmin) & self.data.mask
+        index[::7] = False
+        expected = fn([self.data.qx_data[index], self.data.qy_data[index]])
+        del calls[:]
+        np.testing.assert_allclose(geometry.eval_symmetric(fn, index),
+                                   expected, rtol=1e-12)
+        self.assertLess(calls[0], 0.6 * np.sum(index))
+
+        # The fit data share the same evaluation
+        self.data.xmin, self.data.xmax = -self.qmax, self.qmax
+        self.data.ymin, self.data.ymax = -self.qmax, self.qmax
+        fit_data = FitData2D(sas_data2d=self.data, data=self.data.data,
+                             err_data=self.data.err_data)
+        theory = fit_data.residuals(fn)[1]
+        fit_data.symmetric = True
+        del calls[:]
+        np.testing.assert_allclose(fit_data.residuals(fn)[1], theory,
+                                   rtol=1e-12)
+        self.assertLess(calls[0], 0.6 * len(theory))
+
+        # Points without a partner are all evaluated
+        self.data.qx_data = self.data.qx_data + 0.3 * self.qmin
+        del calls[:]
+        geometry = self.data.get_geometry()
+        geometry.eval_symmetric(fn, index)
+        self.assertEqual(calls, [np.sum(index)])
+
+    def test_centrosymmetric(self):
+        """
+        Test the models evaluated once for q and -q
+        """
+        model = BaseComponent()
+        self.assertTrue(is_centrosymmetric(model))
+        # Magnetic parameters are listed as orientation parameters as well
+        magnetic = ['sld_M0', 'sld_mtheta', 'sld_mphi', 'up:frac_i']
+        model.params.update((name, 0.0) for name in magnetic)
+        model.magnetic_params.extend(magnetic)
+        model.orientation_params.extend(magnetic)
+        model.orientation_params.append('sld_M0.width')
+        model.params['sld_mtheta'] = 30.0
+        self.assertTrue(is_centrosymmetric(model))
+        model.params['sld_M0'] = 1.0
+        self.assertFalse(is_centrosymmetric(model))
+        model.params['sld_M0'] = 0.0
+        model.orientation_params.extend(['theta', 'theta.width'])
+        self.assertFalse(is_centrosymmetric(model))
+        self.assertFalse(is_centrosymmetric(object()))
+
     def test_sectorphi_full(self):
         """
             Test sector averaging
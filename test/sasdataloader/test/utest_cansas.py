@@ -3,6 +3,8 @@
 """
 import os
 import sys
+import shutil
+import tempfile
 import unittest
 import logging
 import warnings
@@ -11,6 +13,8 @@ if sys.version_info[0] >= 3:
 else:
     from StringIO import StringIO
 
+import h5py
+import numpy as np
 from lxml import etree
 from lxml.etree import XMLSyntaxError
 from xml.dom import minidom
@@ -314,6 +318,37 @@ class cansas_reader_hdf5(unittest.TestCase):
             else:
                 self._check_2d_data(data)
 
+    def test_multi_frame(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, "frames.h5")
+            q = np.linspace(0.01, 0.2, 20)
+            frames = np.arange(5)[:, None] + q[None, :]
+            with h5py.File(path, 'w') as f_open:
+                entry = f_open.create_group("sasentry01")
+                entry.attrs["canSAS_class"] = "SASentry"
+                entry.create_dataset("title", data=[b"frames"])
+                sasdata = entry.create_group("sasdata01")
+                sasdata.attrs["canSAS_class"] = "SASdata"
+                sasdata.attrs["signal"] = "I"
+                sasdata.attrs["I_axes"] = "Time,Q"
+                sasdata.attrs["Q_indices"] = [1]
+                sasdata.create_dataset("Q", data=q).attrs["units"] = "1/A"
+                intensity = sasdata.create_dataset("I", data=frames)
+                intensity.attrs["units"] = "1/cm"
+                intensity.attrs["uncertainties"] = "Idev"
+                sasdata.create_dataset("Idev", data=frames / 10)
+            self.data = self.loader.load(path)
+        finally:
+            shutil.rmtree(tmpdir)
+        self.assertEqual(len(self.data), 5)
+        for frame, data in zip(frames, self.data):
+            self.assertTrue(isinstance(data, Data1D))
+            self.assertEqual(data.title, "frames")
+            np.testing.assert_array_equal(data.x, q)
+            np.testing.assert_array_equal(data.y, frame)
+            np.testing.assert_array_equal(data.dy, frame / 10)
+
     def _check_multiple_data(self, data):
         self.assertEqual(data.title, "MH4_5deg_16T_SLOW")
         self.assertEqual(data.run[0], '33837')
@@ -0,0 +1,150 @@
+"""
+    Unit tests for the arithmetic operations of Data1D and Data2D
+"""
+
+import math
+import operator
+import unittest
+
+import numpy as np
+
+from sas.sascalc.data_util.uncertainty import Uncertainty
+from sas.sascalc.dataloader.data_info import Data1D, Data2D
+
+OPERATIONS = (operator.add, operator.sub, operator.mul, operator.truediv)
+
+
+def point_by_point(y, dy, other, dy_other, operation):
+    """
+    Apply the operation to each point with scalar uncertainties, which
+    must give the same bits as the operation on the whole arrays
+    """
+    values = []
+    errors = []
+    for i in range(len(y)):
+        a = Uncertainty(y[i], dy[i]*dy[i])
+        b = Uncertainty(other[i], dy_other[i]*dy_other[i]) \
+            if dy_other is not None \
+            else other
+        output = operation(a, b)
+        values.append(output.x)
+        errors.append(math.sqrt(math.fabs(output.variance)))
+    return np.array(values), np.array(errors)
+
+
+class data1d_operations(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        x = np.linspace(0.01, 0.2, 1000)
+        self.data = Data1D(x=x, y=rng.uniform(1, 2, 1000),
+                           dx=rng.uniform(0, 0.01, 1000),
+                           dy=rng.uniform(0, 0.1, 1000))
+        self.other = Data1D(x=x*1.001, y=rng.uniform(-2, 2, 1000),
+                            dx=rng.uniform(0, 0.01, 1000),
+                            dy=rng.uniform(0, 0.1, 1000))
+
+    def test_data(self):
+        """
+            Test operations between data sets match the scalar uncertainties
+        """
+        for operation in OPERATIONS:
+            result = operation(self.data, self.other)
+            y, dy = point_by_point(self.data.y, self.data.dy, self.other.y,
+                                   self.other.dy, operation)
+            np.testing.assert_array_equal(result.y, y)
+            np.testing.assert_array_equal(result.dy, dy)
+            np.testing.assert_array_equal(result.x, self.data.x)
+            dx = np.sqrt((self.data.dx*self.data.dx
+                          + self.other.dx*self.other.dx)/2)
+            np.testing.assert_array_equal(result.dx, dx)
+
+    def test_scalar(self):
+        """
+            Test operations with a number, on either side
+        """
+        for operation in OPERATIONS:
+            for args in ((self.data, 2.5), (2.5, self.data)):
+                result = operation(*args)
+                dy = self.data.dy
+                if args[0] is self.data:
+                    y, dy = point_by_point(self.data.y, dy, 2.5, None,
+                                           operation)
+                else:
+                    y, dy = point_by_point(self.data.y, dy, 2.5, None,
+                                           lambda a, b: operation(b, a))
+                np.testing.assert_array_equal(result.y, y)
+                np.testing.assert_array_equal(result.dy, dy)
+
+    def test_mismatch(self):
+        """
+            Test data sets with different x values are rejected
+        """
+        self.other.x[10] *= 1.1
+        self.assertRaises(ValueError, operator.add, self.data, self.other)
+
+
+class data2d_operations(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        qx = rng.uniform(-0.3, 0.3, 2000)
+        qy = rng.uniform(-0.3, 0.3, 2000)
+        mask = np.ones(2000, dtype=bool)
+        mask[::7] = False
+        self.data = Data2D(data=rng.uniform(1, 2, 2000),
+                           err_data=rng.uniform(0, 0.1, 2000),
+                           qx_data=qx, qy_data=qy,
+                           q_data=np.sqrt(qx*qx + qy*qy), mask=mask)
+        self.other = Data2D(data=rng.uniform(-2, 2, 2000),
+                            err_data=rng.uniform(0, 0.1, 2000),
+                            qx_data=qx.copy(), qy_data=qy.copy(),
+                            q_data=np.sqrt(qx*qx + qy*qy), mask=mask)
+
+    def test_data(self):
+        """
+            Test operations between detectors match the scalar uncertainties
+        """
+        for operation in OPERATIONS:
+            result = operation(self.data, self.other)
+            data, err = point_by_point(self.data.data, self.data.err_data,
+                                       self.other.data, self.other.err_data,
+                                       operation)
+            np.testing.assert_array_equal(result.data, data)
+            np.testing.assert_array_equal(result.err_data, err)
+            np.testing.assert_array_equal(result.qx_data, self.data.qx_data)
+            np.testing.assert_array_equal(result.mask, self.data.mask)
+
+    def test_scalar(self):
+        """
+            Test operations with a number, on either side
+        """
+        for operation in OPERATIONS:
+            for args in ((self.data, 2.5), (2.5, self.data)):
+                result = operation(*args)
+                if args[0] is self.data:
+                    op = operation
+                else:
+                    op = lambda a, b: operation(b, a)
+                data, err = point_by_point(self.data.data, self.data.err_data,
+                                           2.5, None, op)
+                np.testing.assert_array_equal(result.data, data)
+                np.testing.assert_array_equal(result.err_data, err)
+
+    def test_mismatch(self):
+        """
+            Test the first point with different q values is reported
+        """
+        self.other.qx_data[20] *= 1.1
+        self.other.qy_data[10] *= 1.1
+        try:
+            self.data - self.other
+        except ValueError as exc:
+            self.assertIn("qy-values do not match: %s" % self.data.qy_data[10],
+                          str(exc))
+        else:
+            self.fail("q values were not checked")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,7 +8,9 @@ import os
 import shutil
 import numpy as np
 
-from sas.sascalc.dataloader.loader import Registry as Loader
+from sas.sascalc.dataloader.loader import Registry as Loader, guess_reader
+from sas.sascalc.dataloader.readers import ascii_reader, cansas_reader, \
+    cansas_reader_HDF5, red2d_reader
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +28,9 @@ class ExtensionRegistryTests(unittest.TestCase):
         shutil.copyfile(self.valid_file, self.valid_file_wrong_known_ext)
         shutil.copyfile(self.valid_file, self.valid_file_wrong_unknown_ext)
         self.invalid_file = find("cansas1d_notitle.xml")
+        self.igor_2d_file = find("exp18_14_igor_2dqxqy.dat")
+        self.igor_2d_file_unknown_ext = find("exp18_14_igor_2dqxqy.xyz")
+        shutil.copyfile(self.igor_2d_file, self.igor_2d_file_unknown_ext)
 
         self.loader = Loader()
 
@@ -76,8 +81,51 @@ class ExtensionRegistryTests(unittest.TestCase):
         err_msg = data.errors[0]
         self.assertTrue("does not fully meet the CanSAS v1.x specification" in err_msg)
 
+    def test_guess_reader(self):
+        """
+        Check the default reader guessed from the contents of the files
+        """
+        self.assertIs(guess_reader(self.valid_file_wrong_unknown_ext),
+                      cansas_reader)
+        self.assertIs(guess_reader(find("test_data/TestExtensions.nxs")),
+                      cansas_reader)
+        self.assertIs(guess_reader(find("test_data/x25000_no_di.h5")),
+                      cansas_reader_HDF5)
+        self.assertIs(guess_reader(self.igor_2d_file_unknown_ext),
+                      red2d_reader)
+        self.assertIs(guess_reader(find("ascii_test_1.txt")), ascii_reader)
+        self.assertIs(guess_reader(find("sam14_cor.ABS")), ascii_reader)
+        self.assertIsNone(guess_reader(find("angles_flat.png")))
+        self.assertIsNone(guess_reader(find("missing.xyz")))
+
+    def test_igor_2d_unknown_ext(self):
+        """
+        Load an IGOR 2D file that has the extension '.xyz', which isn't in the
+        extension registry, with the 2D reader
+        """
+        correct = self.loader.load(self.igor_2d_file)
+        wrong_ext = self.loader.load(self.igor_2d_file_unknown_ext)
+        self.assertEqual(len(wrong_ext), 1)
+        self.assertEqual(wrong_ext[0].__class__.__name__, "Data2D")
+        self.assertTrue(np.all(correct[0].data == wrong_ext[0].data))
+        self.assertTrue(np.all(correct[0].qx_data == wrong_ext[0].qx_data))
+
+    def test_extensions(self):
+        """
+        Check the sorted extensions follow the registered loaders
+        """
+        extensions = self.loader.extensions()
+        self.assertEqual(extensions, sorted(extensions))
+        self.assertNotIn('.xyz', extensions)
+        self.loader['.xyz'] = cansas_reader.Reader().read
+        self.assertIn('.xyz', self.loader.extensions())
+        self.assertEqual(
+            len(self.loader.lookup(self.valid_file_wrong_unknown_ext)), 1)
+
     def tearDown(self):
         if os.path.isfile(self.valid_file_wrong_known_ext):
             os.remove(self.valid_file_wrong_known_ext)
         if os.path.isfile(self.valid_file_wrong_unknown_ext):
             os.remove(self.valid_file_wrong_unknown_ext)
+        if os.path.isfile(self.igor_2d_file_unknown_ext):
+            os.remove(self.igor_2d_file_unknown_ext)
@@ -0,0 +1,102 @@
+"""
+    Unit tests for the multi-frame data of the NXcanSAS reader
+"""
+
+import os.path
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+try:
+    import h5py
+    from sas.sascalc.dataloader.readers import cansas_reader_HDF5
+except ImportError:
+    # The NXcanSAS reader needs h5py
+    h5py = None
+
+
+def write_frames(path, nframes, nq=20):
+    """
+    Write a SASentry with nframes frames of I(Q) and dI(Q), and return
+    the Q values and the intensities
+    """
+    q = np.linspace(0.001, 0.5, nq)
+    frames = np.random.RandomState(0).uniform(1, 2, (nframes, nq))
+    with h5py.File(path, 'w') as f_open:
+        entry = f_open.create_group("sasentry01")
+        entry.attrs["canSAS_class"] = "SASentry"
+        entry.create_dataset("title", data=b"kinetics")
+        sasdata = entry.create_group("sasdata01")
+        sasdata.attrs["canSAS_class"] = "SASdata"
+        sasdata.attrs["signal"] = "I"
+        sasdata.attrs["I_axes"] = "Time,Q"
+        sasdata.attrs["Q_indices"] = [1]
+        sasdata.create_dataset("Q", data=q).attrs["units"] = "1/A"
+        intensity = sasdata.create_dataset("I", data=frames)
+        intensity.attrs["units"] = "1/cm"
+        intensity.attrs["uncertainties"] = "Idev"
+        sasdata.create_dataset("Idev", data=frames / 10)
+    return q, frames
+
+
+@unittest.skipIf(h5py is None, "h5py is not installed")
+class nxcansas_frames(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "frames.h5")
+        self.q, self.frames = write_frames(self.path, 6)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_read(self):
+        """
+            Test each frame is read in its own data set
+        """
+        output = cansas_reader_HDF5.Reader().read(self.path)
+        self.assertEqual(len(output), 6)
+        for data, frame in zip(output, self.frames):
+            np.testing.assert_array_equal(data.x, self.q)
+            np.testing.assert_array_equal(data.y, frame)
+            np.testing.assert_array_equal(data.dy, frame / 10)
+            self.assertEqual(data.title, "kinetics")
+
+    def test_read_frames(self):
+        """
+            Test the frames are read one at a time, as read() gives them
+        """
+        expected = cansas_reader_HDF5.Reader().read(self.path)
+        reads = []
+        iter_frames = cansas_reader_HDF5.FrameLoader.iter_frames
+
+        def spy(loader, raw_data):
+            for frame in iter_frames(loader, raw_data):
+                reads.append(frame)
+                yield frame
+        cansas_reader_HDF5.FrameLoader.iter_frames = spy
+        try:
+            reader = cansas_reader_HDF5.Reader()
+            frames = reader.read_frames(self.path)
+            first = next(frames)
+            self.assertEqual(len(reads), 1)
+            output = [first] + list(frames)
+        finally:
+            cansas_reader_HDF5.FrameLoader.iter_frames = iter_frames
+        self.assertEqual(len(reads), 6)
+        self.assertEqual(len(output), 6)
+        for data, other in zip(output, expected):
+            for field in ('x', 'y', 'dx', 'dy'):
+                np.testing.assert_array_equal(getattr(data, field),
+                                              getattr(other, field))
+            self.assertEqual(data.x_unit, other.x_unit)
+            self.assertEqual(data.title, other.title)
+        # The reader is left ready to read all the frames at once again
+        self.assertFalse(reader.lazy_frames)
+        self.assertEqual(len(reader.read(self.path)), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,6 +8,10 @@ import unittest
 from sas.sascalc.dataloader.loader import  Loader
 
 import os.path
+import shutil
+import tempfile
+
+import numpy as np
 
 
 def find(filename):
@@ -36,5 +40,43 @@ class abs_reader(unittest.TestCase):
         self.assertEqual(f.meta_data['loader'],"IGOR/DAT 2D Q_map")
 
 
+class block_reader(unittest.TestCase):
+
+    def setUp(self):
+        self.loader = Loader()
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def load_lines(self, lines):
+        path = os.path.join(self.tmpdir, "block.dat")
+        with open(path, 'w') as fid:
+            fid.write("Data columns Qx - Qy - I(Qx,Qy)\n\nASCII data\n\n")
+            fid.write("\n".join(lines))
+        return self.loader.load(path)[0]
+
+    def test_trailing_lines(self):
+        """
+            Test empty lines at the end of the file are ignored
+        """
+        lines = ["%g %g %g" % (0.01 * i, -0.01 * i, i) for i in range(1, 17)]
+        f = self.load_lines(lines + ["", "  ", "", ""])
+        self.assertEqual(len(f.data), 16)
+        np.testing.assert_array_equal(f.qx_data, 0.01 * np.arange(1, 17))
+        np.testing.assert_array_equal(f.data, np.arange(1, 17))
+
+    def test_not_numbers(self):
+        """
+            Test values which are not numbers are read as zero
+        """
+        lines = ["%g\t%g\t%g" % (0.01 * i, -0.01 * i, i) for i in range(1, 17)]
+        lines[3] = "0.04\t-0.04\tfour"
+        f = self.load_lines(lines)
+        self.assertEqual(len(f.data), 16)
+        self.assertEqual(f.data[3], 0.0)
+        self.assertEqual(f.data[4], 5.0)
+
+
 if __name__ == '__main__':
     unittest.main()
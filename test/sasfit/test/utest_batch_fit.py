@@ -0,0 +1,263 @@
+"""
+    Unit tests for the batch fits of the fit engine
+"""
+
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from sas.sascalc.calculator.BaseComponent import BaseComponent
+from sas.sascalc.dataloader.data_info import Data1D
+from sas.sascalc.fit.AbstractFitEngine import FitEngine, FResult, Model, \
+    futures, register_model_pickling
+try:
+    from sasmodels.core import load_model_info
+    from sasmodels.sasview_model import make_model_from_info
+    from sas.sascalc.fit.BumpsFitting import BumpsFit
+except ImportError:
+    # Fits with the sasmodels models need sasmodels and bumps
+    BumpsFit = None
+
+
+class Line(BaseComponent):
+    """
+    I(q) = scale*q + background, fitted by LinearEngine
+    """
+    def __init__(self, name="line", delay=0.0, logdir=None):
+        BaseComponent.__init__(self)
+        self.name = name
+        self.params = {'scale': 1.0, 'background': 0.0}
+        self.details = {'scale': ['', None, None],
+                        'background': ['', None, None]}
+        # Time the fit takes, and directory recording the fits
+        self.delay = delay
+        self.logdir = logdir
+
+    def evalDistribution(self, qdist):
+        return self.params['scale'] * qdist + self.params['background']
+
+
+class LinearEngine(FitEngine):
+    """
+    Fit engine solving for the parameters of a line by least squares
+    """
+    def fit(self, msg_q=None, q=None, handler=None, curr_thread=None,
+            ftol=1.49012e-8, reset_flag=False):
+        fitproblem = list(self.fit_arrange_dict.values())[0]
+        model = fitproblem.get_model()
+        data = fitproblem.get_data()
+        line = model.model
+        if line.logdir is not None:
+            open(os.path.join(line.logdir, line.name), 'w').close()
+        time.sleep(line.delay)
+        if line.name == "bad":
+            raise ValueError("cannot fit %s" % line.name)
+        x, y = data.x[data.idx], data.y[data.idx]
+        pvec = np.linalg.lstsq(np.column_stack((x, np.ones_like(x))), y,
+                               rcond=None)[0]
+        model.set_params(fitproblem.pars, pvec)
+        result = FResult(model=model, data=data, param_list=fitproblem.pars)
+        result.pvec = pvec
+        result.fitness = np.sum(data.residuals(line.evalDistribution)[0]**2)
+        result.success = True
+        result.fitter_id = self.fitter_id
+        return [result]
+
+
+class Handler(object):
+    """
+    Record the notifications of a batch fit
+    """
+    def __init__(self):
+        self.errors = []
+        self.results = []
+        self.progress_calls = []
+
+    def error(self, msg):
+        self.errors.append(msg)
+
+    def set_result(self, result):
+        self.results.append(result)
+
+    def improvement(self):
+        pass
+
+    def progress(self, current, total):
+        self.progress_calls.append((current, total))
+
+    def update_fit(self, last=False):
+        pass
+
+
+class Quit(object):
+    """
+    Thread which is stopped on the nth call to isquit()
+    """
+    def __init__(self, calls):
+        self.calls = calls
+
+    def isquit(self):
+        self.calls -= 1
+        if self.calls <= 0:
+            raise KeyboardInterrupt("fit stopped")
+
+
+def make_engine(names, delay=0.0, logdir=None):
+    """
+    Engine with a problem for each of the models *names*
+    """
+    engine = LinearEngine()
+    engine.fitter_id = 3
+    x = np.linspace(0.01, 0.5, 20)
+    noise = np.random.RandomState(0).normal(0, 0.01, len(x))
+    for k, name in enumerate(names):
+        data = Data1D(x=x, y=(k + 1)*x + 0.5 + noise, dy=np.ones_like(x))
+        engine.set_model(Line(name, delay, logdir), id=k,
+                         pars=['scale', 'background'])
+        engine.set_data(data, id=k)
+        engine.select_problem_for_fit(id=k, value=1)
+    return engine
+
+
+class batch_fit(unittest.TestCase):
+
+    def test_serial(self):
+        """
+        Test the problems are fitted in order in this process by default
+        """
+        engine = make_engine(["a", "b", "c"])
+        handler = Handler()
+        results = engine.fit_batch(handler=handler)
+        self.assertEqual(len(results), 3)
+        for k, (result,) in enumerate(results):
+            self.assertTrue(result.success)
+            self.assertEqual(result.fitter_id, 3)
+            np.testing.assert_allclose(result.pvec, [k + 1, 0.5], atol=0.05)
+            # The models of the engine are fitted
+            self.assertEqual(engine.get_model(k).model.getParam('scale'),
+                             result.pvec[0])
+        self.assertEqual(handler.progress_calls, [(1, 3), (2, 3), (3, 3)])
+
+    @unittest.skipIf(futures is None, "concurrent.futures is not available")
+    def test_pool(self):
+        """
+        Test the worker processes give the results of the serial fit
+        """
+        names = ["a", "b", "c", "d"]
+        serial = make_engine(names).fit_batch()
+        engine = make_engine(names)
+        handler = Handler()
+        results = engine.fit_batch(handler=handler, nworkers=2)
+        for (expected,), (result,) in zip(serial, results):
+            self.assertEqual(result.model.name, expected.model.name)
+            np.testing.assert_array_equal(result.pvec, expected.pvec)
+            self.assertEqual(result.fitness, expected.fitness)
+        self.assertEqual(sorted(current for current, _ in
+                                handler.progress_calls), [1, 2, 3, 4])
+        # The models of the engine are left to the caller
+        self.assertEqual(engine.get_model(0).model.getParam('scale'), 1.0)
+
+    def test_error(self):
+        """
+        Test a failed fit is reported for its problem only
+        """
+        for nworkers in (1, 2) if futures is not None else (1,):
+            handler = Handler()
+            results = make_engine(["a", "bad", "c"]).fit_batch(
+                handler=handler, nworkers=nworkers)
+            self.assertEqual([r.success for r, in results],
+                             [True, False, True])
+            self.assertIn("cannot fit bad", results[1][0].mesg)
+            self.assertTrue(np.isnan(results[1][0].fitness))
+            self.assertEqual(len(handler.errors), 1)
+            self.assertEqual(len(handler.results), 3)
+
+    def test_quit(self):
+        """
+        Test stopping the fit cancels the problems not started
+        """
+        engine = make_engine(["a", "b", "c"])
+        fitted = []
+        with self.assertRaises(KeyboardInterrupt):
+            for id, _ in engine.iter_batch(curr_thread=Quit(2)):
+                fitted.append(id)
+        self.assertEqual(fitted, [0])
+
+    @unittest.skipIf(futures is None, "concurrent.futures is not available")
+    def test_quit_pool(self):
+        """
+        Test stopping the fit cancels the problems waiting for a worker
+        """
+        logdir = tempfile.mkdtemp()
+        try:
+            names = ["p%d" % k for k in range(8)]
+            engine = make_engine(names, delay=0.3, logdir=logdir)
+            with self.assertRaises(KeyboardInterrupt):
+                list(engine.iter_batch(curr_thread=Quit(1), nworkers=2))
+            # Let the fits started, and the one queued to the workers, end
+            time.sleep(1.0)
+            self.assertLessEqual(len(os.listdir(logdir)), 3)
+        finally:
+            shutil.rmtree(logdir)
+
+
+@unittest.skipIf(BumpsFit is None, "sasmodels or bumps is not installed")
+class sasmodels_batch_fit(unittest.TestCase):
+
+    def setUp(self):
+        self.sphere = make_model_from_info(load_model_info("sphere"))
+
+    def make_engine(self):
+        """
+        Bumps engine fitting the radius of spheres
+        """
+        engine = BumpsFit()
+        q = np.linspace(0.005, 0.3, 60)
+        for k in range(3):
+            truth = self.sphere()
+            truth.setParam('radius', 50.0 + 5*k)
+            y = truth.evalDistribution(q)
+            model = self.sphere()
+            model.setParam('radius', 45.0 + 5*k)
+            engine.set_model(Model(model), id=k, pars=['radius'])
+            engine.set_data(Data1D(x=q, y=y, dy=0.01*y), id=k)
+            engine.select_problem_for_fit(id=k, value=1)
+        return engine
+
+    def test_pickle(self):
+        """
+        Test a model class built by sasmodels pickles with its state
+        """
+        model = self.sphere()
+        model.setParam('radius', 42.0)
+        self.assertRaises(Exception, pickle.dumps, model)
+        register_model_pickling(self.sphere)
+        copy = pickle.loads(pickle.dumps(model))
+        self.assertIs(copy.__class__, self.sphere)
+        self.assertEqual(copy.getParam('radius'), 42.0)
+        q = np.linspace(0.01, 0.2, 5)
+        np.testing.assert_array_equal(copy.evalDistribution(q),
+                                      model.evalDistribution(q))
+
+    @unittest.skipIf(futures is None, "concurrent.futures is not available")
+    def test_pool(self):
+        """
+        Test the sasmodels models are fitted in the worker processes
+        """
+        serial = self.make_engine().fit_batch()
+        results = self.make_engine().fit_batch(nworkers=2)
+        for k, ((expected,), (result,)) in enumerate(zip(serial, results)):
+            self.assertTrue(result.success, result.mesg)
+            np.testing.assert_allclose(result.pvec, [50.0 + 5*k], rtol=1e-3)
+            np.testing.assert_allclose(result.pvec, expected.pvec,
+                                       rtol=1e-12)
+            self.assertIs(result.model.__class__, self.sphere)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,240 @@
+"""
+    Unit tests for the evaluations of the theory during fits
+"""
+
+import unittest
+
+import numpy as np
+
+from sas.sascalc.calculator.BaseComponent import BaseComponent
+from sas.sascalc.dataloader.data_info import Data2D
+from sas.sascalc.fit.AbstractFitEngine import FitData1D, FitData2D, Model
+try:
+    from sas.sascalc.fit.qsmearing import PySmear
+except ImportError:
+    # The smearers need sasmodels
+    PySmear = None
+try:
+    from sas.sascalc.fit import BumpsFitting
+except ImportError:
+    BumpsFitting = None
+
+
+class Line(BaseComponent):
+    """
+    I(q) = scale*q^2 + background, counting the q values evaluated
+    """
+    def __init__(self):
+        BaseComponent.__init__(self)
+        self.name = "line"
+        self.params = {'scale': 1.0, 'background': 0.0}
+        self.details = {'scale': ['', None, None],
+                        'background': ['', None, None]}
+        self.calls = []
+
+    def evalDistribution(self, qdist):
+        self.calls.append(len(qdist))
+        return self.params['scale'] * qdist**2 + self.params['background']
+
+
+class Boxcar(object):
+    """
+    Resolution averaging the theory over 2*width+1 points, which needs
+    *width* points on each side of the data
+    """
+    def __init__(self, q, width=3):
+        step = q[1] - q[0]
+        self.q = q
+        self.q_calc = np.hstack((q[0] - step*np.arange(width, 0, -1), q,
+                                 q[-1] + step*np.arange(1, width + 1)))
+        self.width = width
+
+    def apply(self, theory):
+        kernel = np.ones(2*self.width + 1) / (2*self.width + 1)
+        return np.convolve(theory, kernel, mode='valid')
+
+
+class Magnet(BaseComponent):
+    """
+    I(q) = 1 + M0*qx, with the magnetic parameters listed as sasmodels does
+    """
+    def __init__(self):
+        BaseComponent.__init__(self)
+        self.name = "magnet"
+        magnetic = ['sld_M0', 'sld_mtheta', 'sld_mphi']
+        self.params = dict((name, 0.0) for name in magnetic)
+        self.details = dict((name, ['', None, None]) for name in magnetic)
+        self.magnetic_params = magnetic[:]
+        self.orientation_params = magnetic[:]
+
+    def evalDistribution(self, qdist):
+        return 1 + self.params['sld_M0'] * qdist[0]
+
+
+def make_data(model, smeared=True):
+    """
+    Data on the curve with a fit range inside the data
+    """
+    x = np.linspace(0.01, 0.2, 40)
+    y = 2 * x**2 + 0.1 + np.random.RandomState(0).normal(0, 1e-4, len(x))
+    smearer = PySmear(Boxcar(x), model) if smeared else None
+    data = FitData1D(x=x, y=y, dy=np.full(len(x), 1e-4), smearer=smearer)
+    data.set_fit_range(qmin=0.05, qmax=0.15)
+    return data
+
+
+@unittest.skipIf(PySmear is None, "sasmodels is not installed")
+class fit_data_1d(unittest.TestCase):
+
+    def test_smeared_eval(self):
+        """
+        Test the smeared theory is computed in one evaluation and is that
+        of separate evaluations in and out of the range
+        """
+        model = Line()
+        data = make_data(model)
+        residuals, theory = data.residuals(model.evalDistribution)
+        self.assertEqual(len(model.calls), 1)
+        q_calc = data.smearer.resolution.q_calc
+        self.assertEqual(model.calls[0], len(q_calc))
+
+        # Evaluate the data bins, then let the smearer evaluate the rest
+        del model.calls[:]
+        data._q_eval = None
+        data._get_q_eval = lambda: None
+        expected = data.residuals(model.evalDistribution)
+        self.assertEqual(len(model.calls), 3)
+        np.testing.assert_array_equal(residuals, expected[0])
+        np.testing.assert_array_equal(theory, expected[1])
+
+        # And the direct calculation
+        smeared = data.smearer.resolution.apply(model.evalDistribution(q_calc))
+        np.testing.assert_allclose(theory, smeared[data.idx], rtol=1e-14)
+
+    def test_q_eval(self):
+        """
+        Test the q values are kept until the fit range changes
+        """
+        data = make_data(Line())
+        q_calc, low, high = data._get_q_eval()
+        self.assertIs(data._get_q_eval()[0], q_calc)
+        np.testing.assert_array_equal(q_calc[low:high],
+                                      data.x[data.idx_unsmeared])
+        data.set_fit_range(qmin=0.02, qmax=0.15)
+        self.assertIsNot(data._get_q_eval()[0], q_calc)
+        self.assertIsNone(make_data(Line(), smeared=False)._get_q_eval())
+
+
+@unittest.skipIf(BumpsFitting is None or PySmear is None,
+                 "bumps or sasmodels is not installed")
+class sas_fitness(unittest.TestCase):
+
+    def setUp(self):
+        self.line = Line()
+        self.data = make_data(self.line)
+        self.fitness = BumpsFitting.SasFitness(
+            model=Model(self.line), data=self.data,
+            fitted=['scale', 'background'])
+
+    def evaluate(self, scale):
+        """
+        Theory for the given scale, and whether the model was evaluated
+        """
+        ncalls = len(self.line.calls)
+        self.fitness.parameters()['scale'].value = scale
+        self.fitness.update()
+        return self.fitness.theory(), len(self.line.calls) > ncalls
+
+    def test_hit(self):
+        """
+        Test a parameter vector evaluated again comes from the cache
+        """
+        theory, evaluated = self.evaluate(1.0)
+        self.assertTrue(evaluated)
+        self.assertTrue(self.evaluate(2.0)[1])
+        cached, evaluated = self.evaluate(1.0)
+        self.assertFalse(evaluated)
+        self.assertIs(cached, theory)
+        self.assertIs(self.fitness.residuals(), self.fitness._residuals)
+
+    def test_size(self):
+        """
+        Test the least recently used vectors are dropped at the size limit
+        """
+        self.fitness.cache_size = 3
+        for scale in (1.0, 2.0, 3.0, 4.0):
+            self.assertTrue(self.evaluate(scale)[1])
+        self.assertEqual(len(self.fitness._cache), 3)
+        self.assertFalse(self.evaluate(2.0)[1])
+        self.assertTrue(self.evaluate(1.0)[1])
+        # 3.0 is now the least recently used
+        self.assertTrue(self.evaluate(3.0)[1])
+        self.assertFalse(self.evaluate(2.0)[1])
+
+        # The number of values held is limited as well
+        self.fitness.cache_points = 2 * len(self.data.y[self.data.idx])
+        for scale in (5.0, 6.0, 7.0):
+            self.evaluate(scale)
+        self.assertEqual(len(self.fitness._cache), 2)
+
+        self.fitness.cache_size = 0
+        self.fitness.clear_cache()
+        self.evaluate(1.0)
+        self.assertTrue(self.evaluate(1.0)[1])
+        self.assertEqual(len(self.fitness._cache), 0)
+
+    def test_clear(self):
+        """
+        Test the fit evaluates the model again at the best point
+        """
+        cleared = []
+        clear_cache = BumpsFitting.SasFitness.clear_cache
+
+        def spy(fitness):
+            cleared.append(len(fitness._cache))
+            clear_cache(fitness)
+            self.assertEqual(len(fitness._cache), 0)
+        BumpsFitting.SasFitness.clear_cache = spy
+        try:
+            engine = BumpsFitting.BumpsFit()
+            engine.set_model(Model(self.line), id=0,
+                             pars=['scale', 'background'])
+            engine.set_data(self.data, id=0)
+            engine.select_problem_for_fit(id=0, value=1)
+            result, = engine.fit()
+        finally:
+            BumpsFitting.SasFitness.clear_cache = clear_cache
+        self.assertEqual(len(cleared), 1)
+        self.assertGreater(cleared[0], 0)
+        np.testing.assert_allclose(result.pvec, [2.0, 0.1], rtol=1e-2)
+        # The model was left at the best point with its theory
+        self.assertEqual(self.line.getParam('scale'), result.pvec[0])
+        np.testing.assert_array_equal(
+            result.theory, result.data.residuals(self.line.evalDistribution)[1])
+
+    def test_symmetric(self):
+        """
+        Test the 2D symmetry is decided again as the magnetization is fitted
+        """
+        x = np.linspace(-0.1, 0.1, 21)
+        qx, qy = [v.flatten() for v in np.meshgrid(x, x)]
+        data = Data2D(data=np.ones(qx.size), err_data=np.ones(qx.size),
+                      qx_data=qx, qy_data=qy, q_data=np.sqrt(qx*qx + qy*qy),
+                      mask=np.ones(qx.size, dtype=bool))
+        data.xmin, data.xmax, data.ymin, data.ymax = -0.1, 0.1, -0.1, 0.1
+        fit_data = FitData2D(sas_data2d=data, data=data.data,
+                             err_data=data.err_data)
+        fit_data.symmetric = True
+        fitness = BumpsFitting.SasFitness(model=Model(Magnet()), data=fit_data,
+                                          fitted=['sld_M0'])
+        np.testing.assert_array_equal(fitness.theory(), 1.0)
+        self.assertTrue(fit_data.symmetric)
+        fitness.parameters()['sld_M0'].value = 2.0
+        fitness.update()
+        np.testing.assert_allclose(fitness.theory(),
+                                   1 + 2.0*qx[fit_data.idx], rtol=1e-14)
+        self.assertFalse(fit_data.symmetric)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Unit tests for the P(Q)*S(Q) model
+"""
+
+import unittest
+
+import numpy as np
+
+from sas.sascalc.calculator.BaseComponent import BaseComponent
+from sas.sascalc.fit.MultiplicationModel import MultiplicationModel
+
+
+class FormFactor(BaseComponent):
+    """
+    Gaussian form factor counting its evaluations
+    """
+    def __init__(self):
+        BaseComponent.__init__(self)
+        self.name = "form"
+        self.params = {'scale': 1.0, 'radius': 20.0, 'background': 0.0}
+        self.details = {'radius': ['A', None, None]}
+        self.dispersion = {'radius': {'npts': 35, 'nsigmas': 3,
+                                      'width': 0.0, 'type': 'gaussian'}}
+        self.non_fittable = 0
+        self.calls = 0
+
+    def calculate_ER(self):
+        return self.params['radius']
+
+    def evalDistribution(self, qdist):
+        self.calls += 1
+        q = np.sqrt(qdist[0]**2 + qdist[1]**2) \
+            if isinstance(qdist, list) else qdist
+        return self.params['scale'] * np.exp(-(q*self.params['radius'])**2)
+
+
+class StructureFactor(BaseComponent):
+    """
+    Structure factor counting its evaluations
+    """
+    def __init__(self):
+        BaseComponent.__init__(self)
+        self.name = "structure"
+        self.params = {'volfraction': 0.2, 'radius_effective': 50.0}
+        self.details = {'volfraction': ['', None, None]}
+        self.calls = 0
+
+    def evalDistribution(self, qdist):
+        self.calls += 1
+        q = np.sqrt(qdist[0]**2 + qdist[1]**2) \
+            if isinstance(qdist, list) else qdist
+        return 1 + self.params['volfraction'] \
+            * np.cos(q*self.params['radius_effective'])
+
+
+class MultiplicationModelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.model = MultiplicationModel(FormFactor(), StructureFactor())
+        self.q = np.linspace(0.001, 0.5, 50)
+
+    def calls(self):
+        return self.model.p_model.calls, self.model.s_model.calls
+
+    def test_components(self):
+        """
+        Test the components of the last evaluation are reused
+        """
+        self.model.setParam('scale_factor', 2.0)
+        out = self.model.evalDistribution(self.q)
+        pq_values, sq_values = self.model.calc_composition_models(self.q)
+        self.assertEqual(self.calls(), (1, 1))
+        np.testing.assert_allclose(out, 2.0 * pq_values * sq_values)
+        p_model, s_model = FormFactor(), StructureFactor()
+        p_model.params['scale'] = 0.2
+        s_model.params['radius_effective'] = 20.0
+        np.testing.assert_allclose(pq_values, p_model.evalDistribution(self.q))
+        np.testing.assert_allclose(sq_values, s_model.evalDistribution(self.q))
+        # The product returned is not the cached one
+        out[:] = 0
+        self.assertTrue(np.all(self.model.evalDistribution(self.q) > 0))
+        self.assertEqual(self.calls(), (1, 1))
+
+    def test_invalidation(self):
+        """
+        Test changed parameters or q values are evaluated again
+        """
+        first = self.model.evalDistribution(self.q)
+        self.model.setParam('radius', 30.0)
+        second = self.model.evalDistribution(self.q)
+        self.assertEqual(self.calls(), (2, 2))
+        self.assertFalse(np.allclose(first, second))
+        self.model.setParam('radius.width', 0.1)
+        self.model.evalDistribution(self.q)
+        self.assertEqual(self.calls(), (3, 3))
+        self.model.evalDistribution(self.q[1:])
+        self.assertEqual(self.calls(), (4, 4))
+        qx, qy = self.q, self.q[::-1]
+        self.model.evalDistribution([qx, qy])
+        self.model.calc_composition_models([qx, qy])
+        self.assertEqual(self.calls(), (5, 5))
+        self.model.calc_composition_models([qy, qx])
+        self.assertEqual(self.calls(), (6, 6))
+        # Clones do not share the evaluation
+        self.assertEqual(self.model.clone()._cache, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+    Unit tests for the fit page states
+"""
+
+import copy
+import tracemalloc
+import unittest
+
+import numpy as np
+
+from sas.sascalc.dataloader.data_info import Data2D
+try:
+    from sas.sascalc.fit import pagestate
+except ImportError:
+    # The page states need sasmodels
+    pagestate = None
+
+
+def make_2d(npixels):
+    """
+    Detector of npixels x npixels pixels
+    """
+    q = np.linspace(-0.3, 0.3, npixels)
+    qx, qy = [v.flatten() for v in np.meshgrid(q, q)]
+    rng = np.random.RandomState(0)
+    data = Data2D(data=rng.uniform(1, 2, qx.size),
+                  err_data=rng.uniform(0, 0.1, qx.size),
+                  qx_data=qx, qy_data=qy, q_data=np.sqrt(qx*qx + qy*qy),
+                  mask=np.ones(qx.size, dtype=bool),
+                  dqx_data=np.full(qx.size, 0.001),
+                  dqy_data=np.full(qx.size, 0.001))
+    data.name = "detector"
+    return data
+
+
+@unittest.skipIf(pagestate is None, "sasmodels is not installed")
+class page_state_data(unittest.TestCase):
+
+    def setUp(self):
+        self.data = make_2d(200)
+        self.state = pagestate.PageState(data=self.data)
+
+    def test_snapshot(self):
+        """
+            Test saved states share the arrays but not later changes
+        """
+        self.state.data = pagestate.snapshot_data(self.data)
+        saved = self.state.clone()
+        self.assertIs(saved.data, self.state.data)
+        self.assertIs(saved.data.data, self.data.data)
+        mask = self.data.mask
+        self.data.mask = np.zeros(len(mask), dtype=bool)
+        self.data.title = "other page"
+        self.assertIs(saved.data.mask, mask)
+        self.assertNotEqual(saved.data.title, "other page")
+        self.assertIsNone(pagestate.snapshot_data(None))
+        batch = pagestate.snapshot_data([self.data, self.data])
+        self.assertIsNot(batch[0], self.data)
+        self.assertIs(batch[1].qx_data, self.data.qx_data)
+
+    def test_memory(self):
+        """
+            Test the states of the undo history do not copy the data
+        """
+        history = pagestate.PageStateHistory(max_length=None)
+        nstates = 500
+        tracemalloc.start()
+        try:
+            start = tracemalloc.get_traced_memory()[0]
+            data_copy = copy.deepcopy(self.data)
+            copy_size = tracemalloc.get_traced_memory()[0] - start
+            del data_copy
+            start = tracemalloc.get_traced_memory()[0]
+            for edit in range(nstates):
+                self.state.tcChi = edit
+                self.state.data = pagestate.snapshot_data(self.data)
+                history.appendItem(self.state.clone())
+            growth = tracemalloc.get_traced_memory()[0] - start
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(len(history), nstates)
+        # A copy of the detector arrays takes 2.2 MB
+        self.assertGreater(copy_size, 2000000)
+        self.assertLess(growth / nstates, copy_size / 100)
+
+
+@unittest.skipIf(pagestate is None, "sasmodels is not installed")
+class page_state_history(unittest.TestCase):
+
+    def test_undo_redo(self):
+        """
+            Test moving through the history and dropping the redo states
+        """
+        history = pagestate.PageStateHistory(max_length=3)
+        self.assertEqual(history.getCurrentPosition(), -1)
+        self.assertIsNone(history.getPreviousItem())
+        for state in "abcd":
+            history.appendItem(state)
+        self.assertEqual(len(history), 3)
+        self.assertEqual(history.getCurrentPosition(), 2)
+        self.assertEqual(history.getPreviousItem(), "c")
+        self.assertEqual(history.getPreviousItem(), "b")
+        self.assertEqual(history.getPreviousItem(), "b")
+        self.assertEqual(history.getNextItem(), "c")
+        history.appendItem("e")
+        self.assertEqual(len(history), 3)
+        self.assertEqual(history.getNextItem(), "e")
+        self.assertEqual(history.getPreviousItem(), "c")
+
+    def test_unlimited(self):
+        """
+            Test no states are dropped without a maximum length
+        """
+        history = pagestate.PageStateHistory(max_length=None)
+        for state in range(100):
+            history.appendItem(state)
+        self.assertEqual(len(history), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
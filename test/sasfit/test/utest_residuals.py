@@ -0,0 +1,106 @@
+"""
+    Unit tests for the chi2 and residuals of the fit pages
+"""
+
+import unittest
+
+import numpy as np
+
+from sas.sascalc.dataloader.data_info import Data1D, Data2D
+try:
+    from sas.sasgui.perspectives.fitting.utils import ResidualCalculator
+except ImportError:
+    # The fitting perspective needs wx
+    ResidualCalculator = None
+
+
+@unittest.skipIf(ResidualCalculator is None, "wx is not installed")
+class residual_calculator(unittest.TestCase):
+
+    def setUp(self):
+        self.calculator = ResidualCalculator()
+        rng = np.random.RandomState(0)
+        x = np.linspace(0.001, 0.5, 100)
+        self.data_1d = Data1D(x=x, y=rng.uniform(1, 2, 100),
+                              dy=rng.uniform(0, 0.1, 100))
+        self.data_1d.dy[:5] = 0
+        self.index = (x > 0.1) & (x < 0.4)
+        qx, qy = [v.flatten() for v in np.meshgrid(x - 0.25, x - 0.25)]
+        self.data_2d = Data2D(data=rng.uniform(1, 2, qx.size),
+                              err_data=rng.uniform(0, 0.1, qx.size),
+                              qx_data=qx, qy_data=qy,
+                              q_data=np.sqrt(qx*qx + qy*qy),
+                              mask=np.ones(qx.size, dtype=bool))
+        self.data_2d.err_data[:10] = 0
+        self.data_2d.data[10:20] = np.nan
+
+    def test_chisqr_1d(self):
+        """
+        Test 1D chi2 of the points in range, with zero errors set to 1
+        """
+        data, index = self.data_1d, self.index
+        theory = 1.5 * np.ones(np.count_nonzero(index))
+        res, chisqr = self.calculator.residuals(data, theory, index=index,
+                                                fid=1, chisqr=True)
+        err = data.dy[index].copy()
+        err[err == 0] = 1
+        expected = (data.y[index] - theory) / err
+        np.testing.assert_allclose(res, expected)
+        self.assertAlmostEqual(chisqr, np.average(expected**2))
+        # The theory must match the range
+        self.assertEqual(self.calculator.residuals(data, theory[1:],
+                                                   index=index,
+                                                   chisqr=True),
+                         (None, None))
+
+    def test_chisqr_2d(self):
+        """
+        Test 2D chi2 skips the points without error or intensity
+        """
+        data = self.data_2d
+        theory = np.full(len(data.data), 1.5)
+        index = data.q_data < 0.2
+        chisqr = self.calculator.residuals(data, theory, index=index, fid=1,
+                                           chisqr=True)[1]
+        selected = index & (data.err_data != 0) & np.isfinite(data.data)
+        expected = (data.data - theory)[selected] / data.err_data[selected]
+        self.assertAlmostEqual(chisqr, np.average(expected**2))
+        # The theory must match the data
+        self.assertEqual(self.calculator.residuals(data, theory[1:],
+                                                   chisqr=True),
+                         (None, None))
+        self.assertIsNone(self.calculator.residuals(data, theory[1:]))
+
+    def test_plot_arrays(self):
+        """
+        Test the residuals for plots are not overwritten by later calls
+        """
+        for data, theory, index in (
+                (self.data_1d, np.ones(np.count_nonzero(self.index)),
+                 self.index),
+                (self.data_2d, np.ones(len(self.data_2d.data)), None)):
+            first = self.calculator.residuals(data, theory, index=index,
+                                              fid=1)
+            saved = first.copy()
+            second = self.calculator.residuals(data, 2 * theory, index=index,
+                                               fid=1)
+            self.calculator.residuals(data, 3 * theory, index=index, fid=1,
+                                      chisqr=True)
+            self.assertIsNot(first, second)
+            np.testing.assert_array_equal(first, saved)
+
+    def test_weight(self):
+        """
+        Test the weight is computed again when the errors are replaced
+        """
+        data = self.data_1d
+        weight = self.calculator.get_weight(data, is2d=False, flag=1)
+        self.assertIs(self.calculator.get_weight(data, False, 1), weight)
+        self.assertIsNot(self.calculator.get_weight(data, False, 2), weight)
+        data.dy = data.dy + 1
+        np.testing.assert_array_equal(
+            self.calculator.get_weight(data, False, 1), data.dy)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,310 @@
+"""
+    Unit tests for the pair distance distribution of the real-space canvas
+"""
+
+import math
+import unittest
+
+import numpy as np
+
+import sas.sascalc.realspace.pair_distance as pair_distance
+from sas.sascalc.realspace.pair_distance import (PairDistribution,
+                                                 distance_counts)
+import sas.sascalc.realspace.VolumeCanvas as VolumeCanvas
+
+
+class CountCalls(object):
+    """
+    Count the point pairs of the distance histograms computed
+    """
+    def __init__(self):
+        self.pairs = []
+
+    def __enter__(self):
+        self._distance_counts = pair_distance.distance_counts
+
+        def counted(a, b=None, rstep=1.0):
+            self.pairs.append(len(a)*(len(a) if b is None else len(b)))
+            return self._distance_counts(a, b, rstep)
+        pair_distance.distance_counts = counted
+        return self
+
+    def __exit__(self, *args):
+        pair_distance.distance_counts = self._distance_counts
+
+
+def random_points(npts, center=(0, 0, 0), seed=0):
+    return np.random.RandomState(seed).uniform(-10, 10, (npts, 3)) + center
+
+
+class pair_distribution(unittest.TestCase):
+
+    def setUp(self):
+        self.shapes = {
+            'a': (random_points(200, seed=1), 1.0),
+            'b': (random_points(150, (15, 0, 0), seed=2), -0.5),
+            'c': (random_points(100, (0, 20, 5), seed=3), 2.0),
+        }
+
+    def make(self, shapes, rstep=0.1):
+        pr = PairDistribution(rstep=rstep)
+        for key in sorted(shapes):
+            pr.set_points(key, *shapes[key])
+        return pr
+
+    def test_counts(self):
+        """
+        Test the histograms of the distances with those of all the pairs
+        """
+        a, b = random_points(300, seed=1), random_points(70, seed=2)
+        diff = a[:, None, :] - a[None, :, :]
+        dist = np.sqrt(np.sum(diff*diff, axis=2))[np.triu_indices(len(a), 1)]
+        expected = np.bincount((dist/0.5).astype(int))
+        cross = np.sqrt(np.sum((a[:, None, :] - b[None, :, :])**2, axis=2))
+        expected_cross = np.bincount((cross/0.5).astype(int).ravel())
+        block_size = pair_distance.BLOCK_SIZE
+        try:
+            # Small blocks split the points of a in several parts
+            for pair_distance.BLOCK_SIZE in (block_size, 1000, 7):
+                counts = distance_counts(a, rstep=0.5)
+                np.testing.assert_array_equal(
+                    np.trim_zeros(counts, 'b'), expected)
+                counts = distance_counts(a, b, rstep=0.5)
+                np.testing.assert_array_equal(
+                    np.trim_zeros(counts, 'b'), expected_cross)
+        finally:
+            pair_distance.BLOCK_SIZE = block_size
+
+    def test_incremental(self):
+        """
+        Test a shape change only computes the distances of its pairs, and
+        gives the P(r) of the distances computed from scratch
+        """
+        pr = self.make(self.shapes)
+        pr.get_pr()
+        shapes = dict(self.shapes)
+        shapes['b'] = (random_points(120, (-12, 3, 0), seed=4), -0.5)
+        with CountCalls() as calls:
+            pr.set_points('b', *shapes['b'])
+            result = pr.get_pr()
+        self.assertEqual(sorted(calls.pairs), [120*100, 120*120, 120*200])
+        for value, expected in zip(result, self.make(shapes).get_pr()):
+            np.testing.assert_array_equal(value, expected)
+
+        # Removing a shape only changes the normalization
+        del shapes['c']
+        with CountCalls() as calls:
+            pr.remove('c')
+            result = pr.get_pr()
+        self.assertEqual(calls.pairs, [])
+        for value, expected in zip(result, self.make(shapes).get_pr()):
+            np.testing.assert_allclose(value[:len(expected)], expected,
+                                       rtol=1e-13)
+        self.assertEqual(pr.npts, 320)
+
+    def test_contrast(self):
+        """
+        Test a contrast change reuses the distances
+        """
+        pr = self.make(self.shapes)
+        pr.get_pr()
+        shapes = dict(self.shapes)
+        shapes['a'] = (shapes['a'][0], 3.0)
+        with CountCalls() as calls:
+            pr.set_contrast('a', 3.0)
+            result = pr.get_pr()
+        self.assertEqual(calls.pairs, [])
+        for value, expected in zip(result, self.make(shapes).get_pr()):
+            np.testing.assert_allclose(value, expected, rtol=1e-13)
+
+    def test_iq(self):
+        """
+        Test I(q) with the Debye sum over all pairs of points
+        """
+        points = np.vstack([self.shapes[key][0] for key in sorted(self.shapes)])
+        contrast = np.hstack([np.full(len(self.shapes[key][0]),
+                                      self.shapes[key][1])
+                              for key in sorted(self.shapes)])
+        i, j = np.triu_indices(len(points), 1)
+        dist = np.sqrt(np.sum((points[i] - points[j])**2, axis=1))
+        weight = contrast[i]*contrast[j]
+        pr = self.make(self.shapes, rstep=0.001)
+        q = np.array([0.0, 0.01, 0.05, 0.1, 0.2])
+        iq = pr.get_iq(q)
+        for q_k, iq_k in zip(q, iq):
+            qr = q_k*dist
+            debye = np.sin(qr)/qr if q_k > 0 else 1.0
+            expected = 2*np.sum(weight*debye)/len(points)
+            self.assertAlmostEqual(iq_k/expected, 1.0, 3)
+        # Arrays of q, in any shape, give the values of single q
+        self.assertEqual(pr.get_iq(q[2]).shape, ())
+        np.testing.assert_allclose(pr.get_iq(q[2]), iq[2], rtol=1e-14)
+        np.testing.assert_allclose(pr.get_iq(q.reshape(1, 5)), [iq],
+                                   rtol=1e-14)
+        error = pr.get_iq_error(q)
+        self.assertTrue(np.all(np.isfinite(error)) and np.all(error > 0))
+        np.testing.assert_allclose(pr.get_iq_error(q[1:3]), error[1:3],
+                                   rtol=1e-14)
+
+    def test_iq_2d(self):
+        """
+        Test I(qx, qy) with the squared amplitude of the points
+        """
+        pr = self.make(self.shapes)
+        qx = np.array([0.0, 0.1, -0.05, 0.2])
+        qy = np.array([0.0, 0.02, 0.1, -0.3])
+        block_size = pair_distance.BLOCK_SIZE
+        try:
+            for pair_distance.BLOCK_SIZE in (block_size, 150):
+                iq = pr.get_iq_2d(qx, qy)
+                error = pr.get_iq_2d_error(qx, qy)
+                for k in range(len(qx)):
+                    amplitude = 0
+                    for points, contrast in self.shapes.values():
+                        phase = qx[k]*points[:, 0] + qy[k]*points[:, 1]
+                        amplitude += contrast*np.sum(np.exp(1j*phase))
+                    self.assertAlmostEqual(iq[k]/(abs(amplitude)**2/450), 1.0,
+                                           10)
+                    self.assertAlmostEqual(pr.get_iq_2d(qx[k], qy[k]), iq[k],
+                                           10)
+                    self.assertAlmostEqual(
+                        pr.get_iq_2d_error(qx[k], qy[k]), error[k], 10)
+        finally:
+            pair_distance.BLOCK_SIZE = block_size
+
+
+class volume_canvas(unittest.TestCase):
+
+    def setUp(self):
+        self.canvas = VolumeCanvas.VolumeCanvas()
+        self.canvas._random = np.random.RandomState(0)
+        self.canvas.setParam('lores_density', 0.1)
+
+    def add_sphere(self, radius, contrast=1.0, center=(0, 0, 0)):
+        handle = self.canvas.add('sphere')
+        self.canvas.setParam('%s.radius' % handle, radius)
+        self.canvas.setParam('%s.contrast' % handle, contrast)
+        self.canvas.setParam('%s.center' % handle, list(center))
+        return handle
+
+    def test_fill(self):
+        """
+        Test the shapes are filled with their number of points
+        """
+        random = np.random.RandomState(0)
+        for shape in ('sphere', 'cylinder', 'ellipsoid', 'singlehelix'):
+            desc = VolumeCanvas.shape_dict[shape]()
+            desc.params['orientation'] = [30, 45, 60]
+            desc.params['center'] = [5, -3, 2]
+            points = desc.transform(desc.fill(0.5, random))
+            self.assertEqual(len(points), int(0.5*desc.get_volume()))
+            self.assertTrue(np.all(desc.is_inside(points)))
+            # The points fill the shape uniformly: the fraction of a box
+            # inside the shape is its volume over that of the box
+            extent = np.asarray(desc._get_extent())
+            trial = random.uniform(-1, 1, (200000, 3))*extent
+            fraction = np.mean(desc._is_inside(trial))
+            self.assertAlmostEqual(fraction*np.prod(2*extent)
+                                   / desc.get_volume(), 1.0, 1)
+
+    def test_sphere(self):
+        """
+        Test I(q) of a sphere with the analytical form factor
+        """
+        radius = 20.0
+        self.add_sphere(radius)
+        q = np.array([0.001, 0.05, 0.1])
+        qr = q*radius
+        volume = 4.0/3.0*math.pi*radius**3
+        expected = 1.0e8*volume \
+            * (3*(np.sin(qr) - qr*np.cos(qr))/qr**3)**2
+        iq = self.canvas.getIq(q)
+        np.testing.assert_allclose(iq, expected, rtol=0.05)
+        for q_k, iq_k in zip(q, iq):
+            self.assertIsInstance(self.canvas.getIq(q_k), float)
+            self.assertAlmostEqual(self.canvas.getIq(q_k)/iq_k, 1.0, 13)
+        iq_2d = self.canvas.getIq2D(q/math.sqrt(2), q/math.sqrt(2))
+        np.testing.assert_allclose(iq_2d, expected, rtol=0.1)
+        self.assertEqual(self.canvas.runXY([q[1], 0.0]),
+                         self.canvas.getIq2D(q[1], 0.0))
+        np.testing.assert_array_equal(self.canvas.evalDistribution(q), iq)
+
+    def test_reuse(self):
+        """
+        Test the points and distances are reused when only the contrast
+        of a shape changes, and only the moved shape is computed again
+        """
+        outer = self.add_sphere(15.0, contrast=-0.5)
+        inner = self.add_sphere(8.0, center=(30, 0, 0))
+        self.canvas.getIq(0.05)
+        points = dict(self.canvas.pair_dist.points)
+
+        with CountCalls() as calls:
+            self.canvas.setParam('%s.contrast' % outer, 2.0)
+            self.canvas.getPr()
+            iq = self.canvas.getIq(0.05)
+        self.assertEqual(calls.pairs, [])
+        for key in points:
+            self.assertIs(self.canvas.pair_dist.points[key], points[key])
+
+        npts = len(points[inner])
+        with CountCalls() as calls:
+            self.canvas.setParam('%s.center' % inner, [25, 5, 0])
+            self.assertNotEqual(self.canvas.getIq(0.05), iq)
+        self.assertEqual(sorted(calls.pairs),
+                         sorted([npts*npts, npts*len(points[outer])]))
+        self.assertIs(self.canvas.pair_dist.points[outer], points[outer])
+        np.testing.assert_allclose(
+            self.canvas.pair_dist.points[inner],
+            points[inner] + [-5, 5, 0], atol=1e-12)
+
+        # The same P(r) as all the distances computed again
+        pr = PairDistribution(self.canvas.pair_dist.rstep)
+        for key in (inner, outer):
+            pr.set_points(key, self.canvas.pair_dist.points[key],
+                          self.canvas.pair_dist.contrast[key])
+        for value, expected in zip(self.canvas.pair_dist.get_pr(),
+                                   pr.get_pr()):
+            np.testing.assert_allclose(value, expected, rtol=1e-13)
+
+        # Removing a shape keeps the others
+        self.canvas.delete(inner)
+        with CountCalls() as calls:
+            self.canvas.getIq(0.05)
+        self.assertEqual(calls.pairs, [])
+        self.assertEqual(self.canvas.npts, len(points[outer]))
+
+    def test_order(self):
+        """
+        Test the points of a shape are hidden by shapes of higher order
+        """
+        outer = self.add_sphere(15.0, contrast=-0.5)
+        inner = self.add_sphere(8.0)
+        self.canvas.getIq(0.05)
+        points = self.canvas.pair_dist.points
+        self.assertEqual(len(points[inner]),
+                         int(0.1*4.0/3.0*math.pi*8.0**3))
+        self.assertFalse(np.any(self.canvas.shapes[inner].is_inside(
+            points[outer])))
+        self.assertEqual(self.canvas.npts,
+                         len(points[inner]) + len(points[outer]))
+
+        # The outer sphere hides the inner one when it comes first
+        self.canvas.setParam('%s.order' % outer, 10)
+        self.canvas.getIq(0.05)
+        self.assertEqual(len(self.canvas.pair_dist.points[inner]), 0)
+        self.assertEqual(len(self.canvas.pair_dist.points[outer]),
+                         int(0.1*4.0/3.0*math.pi*15.0**3))
+
+    def test_empty(self):
+        """
+        Test an empty canvas gives no intensity
+        """
+        self.assertEqual(self.canvas.getIq(0.1), 0)
+        self.assertEqual(self.canvas.getIq2DError(0.1, 0.1), (0, 0))
+        np.testing.assert_array_equal(self.canvas.getIq(np.ones(3)), 0)
+        self.assertEqual(self.canvas.getPrData(), ([], []))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -236,6 +236,19 @@ class TestSphere(unittest.TestCase):
         result_2 = self.canvas.getIq(0.1)
         self.assertNotAlmostEqual(result_1, result_2, 2)
 
+    def testScaleKeepsPoints(self):
+        """ Test that the space points are reused when only the
+            scale and background change
+        """
+        handle = self.canvas.add('sphere')
+        self.canvas.setParam('%s.radius' % handle, 10.0)
+        result_1 = self.canvas.getIq(0.01)
+        points = self.canvas.points
+        self.canvas.setParam('scale', 2.0)
+        self.canvas.setParam('background', 1.0)
+        self.assertTrue(self.canvas.points is points)
+        self.assertAlmostEqual(self.canvas.getIq(0.01), 2*result_1 + 1.0)
+
 class TestCanvas(unittest.TestCase):
     """ Unit tests for all shapes in canvas model """
 
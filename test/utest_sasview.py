@@ -27,7 +27,10 @@ try:
 except ImportError:
     HAS_MPL_WX = False
 
-SKIPPED_DIRS = ["sasrealspace", "calculatorview"]
+SKIPPED_DIRS = ["calculatorview"]
+# The real-space simulations compared to the models use the sld units
+# and angles of the models from before sasmodels
+SKIPPED_FILES = ["utest_realspace.py", "utest_oriented.py"]
 if not HAS_MPL_WX:
     SKIPPED_DIRS.append("sasguiframe")
 
@@ -56,7 +59,8 @@ def run_tests(dirs=None, run_all=False):
         if os.path.isdir(module_dir):
             for f in os.listdir(module_dir):
                 file_path = os.path.join(module_dir,f)
-                if os.path.isfile(file_path) and f.startswith("utest_") and f.endswith(".py"):
+                if os.path.isfile(file_path) and f.startswith("utest_") and f.endswith(".py") \
+                        and f not in SKIPPED_FILES:
                     module_name,_ = os.path.splitext(f)
                     code = '"%s" %s %s'%(sys.executable, run_one_py, file_path)
                     proc = subprocess.Popen(code, shell=True, stdout=subprocess.PIPE, stderr = subprocess.STDOUT)